@@ -1,28 +1,68 @@
+import secrets
+
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import decode_access_token
-from app.db.session import get_db
-from app.services.user_service import get_user
+from app.core.config import settings
+from app.db.session import get_async_read_db, use_primary
+from app.schemas.user import UserRead
+from app.services.principal_cache import principal_cache
+from app.services.user_service import get_user_async
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+admin_key_scheme = APIKeyHeader(name="X-Admin-Key", auto_error=False)
+
 
+async def load_principal(db: AsyncSession, user_id: int) -> UserRead | None:
+    principal = await principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    # A miss usually follows an invalidation, and a lagging replica could hand back
+    # the row from before the change, which would then be cached for the full TTL.
+    use_primary(db)
+    user = await get_user_async(db, user_id)
+    if user is None:
+        return None
+    principal = UserRead.model_validate(user)
+    await principal_cache.set(principal)
+    return principal
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    subject = decode_access_token(token)
-    if subject is None or not subject.isdigit():
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_read_db), token: str = Depends(oauth2_scheme)
+) -> UserRead:
+    user_id = principal_cache.subject_for_token(token)
+    if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication"
         )
-    user = get_user(db, int(subject))
-    if user is None:
+    principal = await load_principal(db, user_id)
+    if principal is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
-    return user
+    return principal
+
+
+async def get_stream_user(
+    db: AsyncSession = Depends(get_async_read_db), token: str = Depends(oauth2_scheme)
+) -> UserRead:
+    # A streaming response keeps its dependencies open until the stream ends, so the
+    # session is closed as soon as the user is known rather than pinning a connection.
+    try:
+        return await get_current_user(db, token)
+    finally:
+        await db.close()
 
 
-def require_user(user=Depends(get_current_user)):
+def require_user(user: UserRead = Depends(get_current_user)) -> UserRead:
     return user
+
+
+def require_admin(api_key: str | None = Depends(admin_key_scheme)) -> None:
+    if settings.admin_api_key is None:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin API disabled")
+    if api_key is None or not secrets.compare_digest(api_key, settings.admin_api_key):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin key")
@@ -0,0 +1,33 @@
+from collections.abc import AsyncIterator
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from app.services.bulk_io import iter_json_array_rows, iter_ndjson_rows
+
+NDJSON_MEDIA_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+
+def request_media_type(request: Request) -> str:
+    content_type = request.headers.get("content-type", "application/json")
+    return content_type.split(";", maxsplit=1)[0].strip().lower()
+
+
+def iter_request_rows(request: Request) -> AsyncIterator[object] | None:
+    # Streamed row bodies are either NDJSON or one JSON array; anything else is left
+    # to the caller to reject with the media types it actually supports.
+    media_type = request_media_type(request)
+    if media_type in NDJSON_MEDIA_TYPES:
+        return iter_ndjson_rows(request.stream())
+    if media_type == "application/json":
+        return iter_json_array_rows(request.stream())
+    return None
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    # StreamingResponse normally listens on `receive` for disconnects while it streams,
+    # which would race the body iterator for request chunks. Here the body iterator
+    # consumes the request itself, so disconnects surface through `request.stream()`.
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
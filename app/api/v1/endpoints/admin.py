@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import require_admin
+from app.api.streaming import DuplexStreamingResponse, iter_request_rows
+from app.core.config import settings
+from app.db.session import get_async_db
+from app.schemas.predict import ModelReloadResponse
+from app.schemas.user import UserImportRow
+from app.services.prediction_service import (
+    model_version,
+    reload_model_async,
+    request_master_reload,
+)
+from app.services.user_import_service import import_users
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+_IMPORT_REQUEST_BODY = {
+    "content": {
+        "application/json": {
+            "schema": {"type": "array", "items": UserImportRow.model_json_schema()}
+        },
+        "application/x-ndjson": {"schema": UserImportRow.model_json_schema()},
+    },
+    "required": True,
+}
+
+
+@router.post(
+    "/model/reload",
+    response_model=ModelReloadResponse,
+    responses={status.HTTP_202_ACCEPTED: {"description": "Forwarded to the prefork master"}},
+)
+async def reload_model() -> ModelReloadResponse | JSONResponse:
+    if request_master_reload():
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"detail": "Reload requested; the prefork master is replacing every worker"},
+        )
+    try:
+        result = await reload_model_async(force=True)
+    except Exception as exc:  # noqa: BLE001
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Model reload failed; still serving version {model_version()}",
+        ) from exc
+    return ModelReloadResponse(**result._asdict())
+
+
+@router.post(
+    "/users/import",
+    response_class=StreamingResponse,
+    openapi_extra={"requestBody": _IMPORT_REQUEST_BODY},
+)
+async def import_users_in_bulk(
+    request: Request, db: AsyncSession = Depends(get_async_db)
+) -> Response:
+    rows = iter_request_rows(request)
+    if rows is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Expected application/json or application/x-ndjson",
+        )
+    # The session only holds a connection while a chunk is being inserted.
+    return DuplexStreamingResponse(
+        import_users(db, rows, settings.user_import_chunk_size),
+        media_type="application/x-ndjson",
+    )
@@ -1,22 +1,40 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import create_access_token
-from app.db.session import get_db
-from app.schemas.token import Token
-from app.services.user_service import authenticate_user
+from app.db.session import get_async_db, get_async_read_db
+from app.schemas.token import RefreshRequest, Token
+from app.services.token_service import issue_token_pair, revoke_refresh_token, rotate_refresh_token
+from app.services.user_service import authenticate_user_async
 
 router = APIRouter()
 
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)) -> Token:
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_read_db),
+) -> Token:
+    user = await authenticate_user_async(db, form_data.username, form_data.password)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
         )
-    token = create_access_token(str(user.id))
-    return Token(access_token=token)
+    return await issue_token_pair(db, user.id)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(payload: RefreshRequest, db: AsyncSession = Depends(get_async_db)) -> Token:
+    token = await rotate_refresh_token(db, payload.refresh_token)
+    if token is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+    return token
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(payload: RefreshRequest, db: AsyncSession = Depends(get_async_db)) -> None:
+    await revoke_refresh_token(db, payload.refresh_token)
@@ -1,21 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.db.session import get_async_db, replicas
 
 router = APIRouter()
 
 
 @router.get("/live")
-def live() -> dict[str, str]:
+async def live() -> dict[str, str]:
     return {"status": "ok"}
 
 
 @router.get("/ready")
-def ready(db: Session = Depends(get_db)) -> dict[str, str]:
+async def ready(db: AsyncSession = Depends(get_async_db)) -> dict[str, object]:
     try:
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=503, detail="database unavailable") from exc
-    return {"status": "ok"}
+    if not replicas:
+        return {"status": "ok"}
+    # Reads fall back to the primary, so an unavailable replica degrades rather than
+    # fails readiness.
+    return {"status": "ok", "replicas": await replicas.check()}
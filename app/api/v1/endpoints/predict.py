@@ -1,12 +1,195 @@
-from fastapi import APIRouter
+import asyncio
+import math
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager, suppress
+from typing import TypeVar
 
-from app.schemas.predict import PredictRequest, PredictResponse
-from app.services.prediction_service import predict
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+
+from app.api.streaming import DuplexStreamingResponse, iter_request_rows, request_media_type
+from app.core.config import settings
+from app.ml.float32_matrix import MEDIA_TYPE as MATRIX_MEDIA_TYPE
+from app.ml.float32_matrix import MatrixFormatError, decode_matrix, encode_matrix
+from app.schemas.predict import FEATURE_COUNT, PredictRequest, PredictResponse
+from app.services.admission import (
+    AdmissionRejectedError,
+    cancelled_counter,
+    predict_admission,
+)
+from app.services.bulk_prediction_service import score_rows
+from app.services.inference_pool import InferencePoolError, InferenceTimeoutError
+from app.services.model_registry import ModelNotFoundError, model_registry
+from app.services.prediction_service import model_version, predict_async, predict_matrix_async
 
 router = APIRouter()
 
+T = TypeVar("T")
+
+DEADLINE_HEADER = "X-Request-Timeout-Ms"
+CLIENT_CLOSED_REQUEST = 499
+_BULK_REQUEST_BODY = {
+    "content": {
+        "application/json": {
+            "schema": {"type": "array", "items": PredictRequest.model_json_schema()}
+        },
+        "application/x-ndjson": {"schema": PredictRequest.model_json_schema()},
+        MATRIX_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+    },
+    "required": True,
+}
+
+
+@contextmanager
+def _inference_errors() -> Iterator[None]:
+    try:
+        yield
+    except InferenceTimeoutError as exc:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(exc)) from exc
+    except InferencePoolError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc)
+        ) from exc
+
+
+def _request_deadline(request: Request) -> float | None:
+    timeout_ms = settings.predict_default_timeout_ms
+    raw = request.headers.get(DEADLINE_HEADER)
+    if raw is not None:
+        try:
+            timeout_ms = float(raw)
+        except ValueError:
+            timeout_ms = math.nan
+        if not math.isfinite(timeout_ms) or timeout_ms <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{DEADLINE_HEADER} must be a positive number of milliseconds",
+            )
+    if timeout_ms is None:
+        return None
+    return asyncio.get_running_loop().time() + timeout_ms / 1000
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    # The body has already been read, so the next message is the disconnect.
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _run_admitted(request: Request, work: Callable[[], Awaitable[T]]) -> T:
+    deadline = _request_deadline(request)
+
+    async def admitted() -> T:
+        try:
+            async with predict_admission.admit(deadline):
+                async with asyncio.timeout_at(deadline):
+                    with _inference_errors():
+                        return await work()
+        except AdmissionRejectedError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(exc),
+                headers={"Retry-After": str(exc.retry_after_seconds)},
+            ) from exc
+        except TimeoutError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Request deadline exceeded"
+            ) from exc
+
+    # Race the work against the client going away so abandoned requests release their
+    # admission slot and drop out of the micro-batch queue instead of running anyway.
+    work_task = asyncio.create_task(admitted())
+    disconnect_task = asyncio.create_task(_wait_for_disconnect(request))
+    try:
+        await asyncio.wait((work_task, disconnect_task), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnect_task.cancel()
+        if not work_task.done():
+            work_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await work_task
+    if work_task.cancelled():
+        cancelled_counter.inc()
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+    return work_task.result()
+
 
 @router.post("/", response_model=PredictResponse)
-def run_prediction(payload: PredictRequest) -> PredictResponse:
-    value = predict(payload.features)
-    return PredictResponse(prediction=value)
+async def run_prediction(
+    payload: PredictRequest, request: Request, response: Response
+) -> PredictResponse:
+    prediction = await _run_admitted(request, lambda: predict_async(payload.features))
+    response.headers["X-Model-Version"] = prediction.model_version
+    return PredictResponse(prediction=prediction.value, model_version=prediction.model_version)
+
+
+@router.post(
+    "/batch",
+    response_class=StreamingResponse,
+    responses={200: {"content": {MATRIX_MEDIA_TYPE: {}}}},
+    openapi_extra={"requestBody": _BULK_REQUEST_BODY},
+)
+async def run_batch_prediction(request: Request) -> Response:
+    if request_media_type(request) == MATRIX_MEDIA_TYPE:
+        return await _run_matrix_prediction(request)
+    rows = iter_request_rows(request)
+    if rows is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Expected application/json, application/x-ndjson or {MATRIX_MEDIA_TYPE}",
+        )
+
+    return DuplexStreamingResponse(
+        score_rows(rows, settings.predict_bulk_chunk_size, _request_deadline(request)),
+        media_type="application/x-ndjson",
+        headers={"X-Model-Version": model_version()},
+    )
+
+
+async def _read_body(request: Request, limit: int) -> bytearray:
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > limit:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Matrix bodies are limited to {limit} bytes",
+            )
+    return body
+
+
+async def _run_matrix_prediction(request: Request) -> Response:
+    body = await _read_body(request, settings.predict_matrix_max_bytes)
+    try:
+        features = decode_matrix(body)
+    except MatrixFormatError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    if features.shape[1] != FEATURE_COUNT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Expected {FEATURE_COUNT} columns, got {features.shape[1]}",
+        )
+
+    result = await _run_admitted(request, lambda: predict_matrix_async(features))
+    return Response(
+        encode_matrix(result.values),
+        media_type=MATRIX_MEDIA_TYPE,
+        headers={"X-Model-Version": result.model_version},
+    )
+
+
+# Registered last so that fixed paths such as /batch take precedence.
+@router.post("/{model_name}", response_model=PredictResponse)
+async def run_named_prediction(
+    model_name: str, payload: PredictRequest, request: Request, response: Response
+) -> PredictResponse:
+    try:
+        prediction = await _run_admitted(
+            request, lambda: model_registry.predict(model_name, payload.features)
+        )
+    except ModelNotFoundError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Model not found"
+        ) from exc
+    response.headers["X-Model-Version"] = prediction.model_version
+    return PredictResponse(prediction=prediction.value, model_version=prediction.model_version)
@@ -1,10 +1,14 @@
 import asyncio
 import json
+import re
 from datetime import UTC, datetime
 
+import msgpack
 from fastapi import (
     APIRouter,
     Depends,
+    Header,
+    HTTPException,
     Query,
     Request,
     WebSocket,
@@ -13,23 +17,38 @@ from fastapi import (
 )
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
-
-from app.api.deps import require_user
-from app.core.security import decode_access_token
-from app.db.session import get_db
-from app.services.realtime_service import realtime_hub
-from app.services.user_service import get_user
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_stream_user, load_principal, require_user
+from app.db.session import get_async_read_db
+from app.schemas.user import UserRead
+from app.services.principal_cache import principal_cache
+from app.services.realtime_frames import (
+    KEEP_ALIVE_FRAME,
+    MSGPACK_SUBPROTOCOL,
+    connected_message,
+    msgpack_frame,
+    sse_frame,
+)
+from app.services.realtime_service import DEFAULT_TOPIC, realtime_hub
 
 router = APIRouter()
 
+TOPIC_PATTERN = r"^[A-Za-z0-9_.:-]{1,100}$"
+MAX_TOPICS = 20
+_topic_re = re.compile(TOPIC_PATTERN)
+
 
 class StreamMessageCreate(BaseModel):
     message: str = Field(min_length=1, max_length=1000)
+    topic: str = Field(default=DEFAULT_TOPIC, pattern=TOPIC_PATTERN)
 
 
-def _format_sse(event_name: str, data: dict[str, object]) -> str:
-    return f"event: {event_name}\\ndata: {json.dumps(data)}\\n\\n"
+def _parse_topics(values: list[str]) -> tuple[str, ...] | None:
+    topics = tuple(dict.fromkeys(values)) or (DEFAULT_TOPIC,)
+    if len(topics) > MAX_TOPICS or not all(_topic_re.match(topic) for topic in topics):
+        return None
+    return topics
 
 
 def _get_websocket_token(websocket: WebSocket) -> str | None:
@@ -39,41 +58,76 @@ def _get_websocket_token(websocket: WebSocket) -> str | None:
     return websocket.query_params.get("token")
 
 
-def _get_websocket_user(websocket: WebSocket, db: Session) -> object:
+async def _get_websocket_user(websocket: WebSocket, db: AsyncSession) -> UserRead:
     token = _get_websocket_token(websocket)
     if token is None:
         raise WebSocketException(code=1008, reason="Missing authentication token")
 
-    subject = decode_access_token(token)
-    if subject is None or not subject.isdigit():
+    user_id = principal_cache.subject_for_token(token)
+    if user_id is None:
         raise WebSocketException(code=1008, reason="Invalid authentication token")
 
-    user = get_user(db, int(subject))
+    user = await load_principal(db, user_id)
     if user is None:
         raise WebSocketException(code=1008, reason="User not found")
 
     return user
 
 
+async def _receive_client_message(websocket: WebSocket) -> str:
+    # Text frames always work; binary frames must hold a MessagePack string.
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    if message.get("text") is not None:
+        return message["text"]
+    try:
+        text = msgpack.unpackb(message.get("bytes") or b"")
+    except (ValueError, msgpack.UnpackException):
+        text = None
+    if not isinstance(text, str):
+        raise WebSocketException(code=1003, reason="Expected a MessagePack string")
+    return text
+
+
 @router.get("/sse")
 async def sse_stream(
     request: Request,
     max_events: int | None = Query(default=None, ge=1, le=1000),
-    current_user=Depends(require_user),
+    topic: list[str] = Query(default=[], description="Topics to follow; repeatable"),
+    last_event_id: str | None = Header(default=None, alias="Last-Event-ID", max_length=64),
+    current_user: UserRead = Depends(get_stream_user),
 ) -> StreamingResponse:
-    subscriber_id, queue = await realtime_hub.register_sse()
+    topics = _parse_topics(topic)
+    if topics is None:
+        raise HTTPException(
+            status_code=422, detail=f"Up to {MAX_TOPICS} topics matching {TOPIC_PATTERN}"
+        )
+    subscriber_id, queue = await realtime_hub.register_sse(topics)
 
     async def event_generator():
         sent_events = 0
         try:
-            connected_event = {
-                "type": "connected",
-                "user_id": current_user.id,
-                "timestamp": datetime.now(UTC).isoformat(),
-            }
-            yield _format_sse("connected", connected_event)
+            yield sse_frame("connected", connected_message(current_user.id))
             sent_events += 1
 
+            # Live events are already queueing, so anything replayed may arrive twice.
+            replayed: set[str] = set()
+            if last_event_id is not None:
+                missed = await realtime_hub.replay(topics, last_event_id)
+                if missed is None:
+                    # Too far behind for the replay log: the client must refetch state.
+                    gap = {"type": "gap", "last_event_id": last_event_id}
+                    yield sse_frame("gap", json.dumps(gap))
+                    sent_events += 1
+                else:
+                    for event in missed:
+                        if max_events is not None and sent_events >= max_events:
+                            return
+                        yield event.sse_frame
+                        sent_events += 1
+                    replayed = {event.id for event in missed}
+
             while True:
                 if max_events is not None and sent_events >= max_events:
                     break
@@ -81,12 +135,14 @@ async def sse_stream(
                     break
 
                 try:
-                    message = await asyncio.wait_for(queue.get(), timeout=15)
-                    payload = json.loads(message)
-                    yield _format_sse("message", payload)
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                    if event.id in replayed:
+                        replayed.discard(event.id)
+                        continue
+                    yield event.sse_frame
                     sent_events += 1
                 except TimeoutError:
-                    yield ": keep-alive\\n\\n"
+                    yield KEEP_ALIVE_FRAME
         finally:
             await realtime_hub.unregister_sse(subscriber_id)
 
@@ -101,42 +157,53 @@ async def sse_stream(
 @router.post("/messages", status_code=202)
 async def publish_message(
     payload: StreamMessageCreate,
-    current_user=Depends(require_user),
+    current_user: UserRead = Depends(require_user),
 ) -> dict[str, int]:
     event = {
         "type": "message",
+        "topic": payload.topic,
         "user_id": current_user.id,
         "message": payload.message,
         "timestamp": datetime.now(UTC).isoformat(),
     }
-    await realtime_hub.broadcast(event)
+    await realtime_hub.broadcast(event, payload.topic)
     return await realtime_hub.counts()
 
 
 @router.websocket("/ws")
-async def websocket_stream(websocket: WebSocket, db: Session = Depends(get_db)) -> None:
-    current_user = _get_websocket_user(websocket, db)
-    await websocket.accept()
-    await realtime_hub.add_websocket(websocket)
-
-    await websocket.send_json(
-        {
-            "type": "connected",
-            "user_id": current_user.id,
-            "timestamp": datetime.now(UTC).isoformat(),
-        }
-    )
+async def websocket_stream(
+    websocket: WebSocket, db: AsyncSession = Depends(get_async_read_db)
+) -> None:
+    try:
+        current_user = await _get_websocket_user(websocket, db)
+    finally:
+        # Only the handshake needs the database; release the connection before streaming.
+        await db.close()
+    topics = _parse_topics(websocket.query_params.getlist("topic"))
+    if topics is None:
+        raise WebSocketException(code=1008, reason="Invalid topics")
+    binary = MSGPACK_SUBPROTOCOL in websocket.scope.get("subprotocols", [])
+    await websocket.accept(subprotocol=MSGPACK_SUBPROTOCOL if binary else None)
+    # Sent before registering so that the hub's writer task is the only other sender.
+    connected = connected_message(current_user.id)
+    if binary:
+        await websocket.send_bytes(msgpack_frame(connected))
+    else:
+        await websocket.send_text(connected)
+    await realtime_hub.add_websocket(websocket, topics, binary)
 
     try:
         while True:
-            message_text = await websocket.receive_text()
+            message_text = await _receive_client_message(websocket)
+            # Text sent by a client goes to the first topic it subscribed to.
             event = {
                 "type": "message",
+                "topic": topics[0],
                 "user_id": current_user.id,
                 "message": message_text,
                 "timestamp": datetime.now(UTC).isoformat(),
             }
-            await realtime_hub.broadcast(event)
+            await realtime_hub.broadcast(event, topics[0])
     except WebSocketDisconnect:
         pass
     finally:
@@ -1,23 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import require_user
-from app.db.session import get_db
-from app.schemas.user import UserCreate, UserRead
-from app.services.user_service import create_user, get_user_by_email
+from app.api.deps import require_admin, require_user
+from app.db.session import get_async_db, get_async_read_db, remember_write
+from app.schemas.user import UserCreate, UserPage, UserRead
+from app.services.user_export_service import ExportFormat, export_users
+from app.services.user_service import (
+    create_user_async,
+    get_user_by_email_async,
+    list_users_async,
+)
 
 router = APIRouter()
 
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+@router.get("/", response_model=UserPage, dependencies=[Depends(require_admin)])
+async def list_users(
+    after: int | None = Query(default=None, ge=0, description="`next_cursor` of the last page"),
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_read_db),
+) -> UserPage:
+    users = await list_users_async(db, after, limit + 1)
+    next_cursor = users[limit - 1].id if len(users) > limit else None
+    return UserPage(
+        items=[UserRead.model_validate(user) for user in users[:limit]], next_cursor=next_cursor
+    )
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    dependencies=[Depends(require_admin)],
+    responses={200: {"content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()}}},
+)
+async def export_all_users(
+    export_format: ExportFormat = Query(default="ndjson", alias="format"),
+    db: AsyncSession = Depends(get_async_read_db),
+) -> StreamingResponse:
+    return StreamingResponse(
+        export_users(db, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="users.{export_format}"'},
+    )
+
 
 @router.post("/", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def create_new_user(payload: UserCreate, db: Session = Depends(get_db)) -> UserRead:
-    existing = get_user_by_email(db, payload.email)
+async def create_new_user(
+    payload: UserCreate, response: Response, db: AsyncSession = Depends(get_async_db)
+) -> UserRead:
+    existing = await get_user_by_email_async(db, payload.email)
     if existing is not None:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already registered")
-    user = create_user(db, payload.email, payload.password)
+    user = await create_user_async(db, payload.email, payload.password)
+    # A login right after sign-up must not miss the new row on a lagging replica.
+    remember_write(response)
     return UserRead.model_validate(user)
 
 
 @router.get("/me", response_model=UserRead)
-def me(current_user=Depends(require_user)) -> UserRead:
-    return UserRead.model_validate(current_user)
+def me(current_user: UserRead = Depends(require_user)) -> UserRead:
+    return current_user
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, health, predict, stream, users
+from app.api.v1.endpoints import admin, auth, health, metrics, predict, stream, users
 
 api_router = APIRouter()
 api_router.include_router(health.router, prefix="/health", tags=["health"])
@@ -8,3 +8,5 @@ api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(predict.router, prefix="/predict", tags=["predict"])
 api_router.include_router(stream.router, prefix="/stream", tags=["stream"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
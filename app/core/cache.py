@@ -0,0 +1,88 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from threading import Lock
+from typing import Generic, TypeVar
+
+from app.core.metrics import registry
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+cache_hits_counter = registry.counter(
+    "cache_hits_total", "Cache lookups that found a live entry", labelnames=("cache", "tier")
+)
+cache_misses_counter = registry.counter(
+    "cache_misses_total", "Cache lookups that found no live entry", labelnames=("cache", "tier")
+)
+cache_evictions_counter = registry.counter(
+    "cache_evictions_total",
+    "Entries removed from a cache before being read again",
+    labelnames=("cache", "reason"),
+)
+
+
+class TTLCache(Generic[K, V]):
+    def __init__(
+        self,
+        name: str,
+        maxsize: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = Lock()
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key: K) -> V | None:
+        if not self.enabled:
+            return None
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                cache_evictions_counter.inc(cache=self.name, reason="ttl")
+                entry = None
+            if entry is None:
+                cache_misses_counter.inc(cache=self.name, tier="local")
+                return None
+            self._entries.move_to_end(key)
+        cache_hits_counter.inc(cache=self.name, tier="local")
+        return entry[1]
+
+    def set(self, key: K, value: V, ttl_seconds: float | None = None) -> None:
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                cache_evictions_counter.inc(cache=self.name, reason="size")
+
+    def delete(self, key: K) -> None:
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                cache_evictions_counter.inc(cache=self.name, reason="invalidate")
+
+    def clear(self) -> None:
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+        if removed:
+            cache_evictions_counter.inc(removed, cache=self.name, reason="invalidate")
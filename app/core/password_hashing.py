@@ -0,0 +1,13 @@
+from passlib.context import CryptContext
+
+# Imported by spawned hashing workers, so this module must stay free of settings,
+# database and application imports.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def check_password(password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(password, hashed_password)
@@ -1,31 +1,65 @@
 from datetime import UTC, datetime, timedelta
+from typing import Any
 
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 
 from app.core.config import settings
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.password_hashing import check_password, hash_password
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return check_password(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return hash_password(password)
+
+
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
 
 
 def create_access_token(subject: str) -> str:
     expire = datetime.now(UTC) + timedelta(minutes=settings.access_token_expire_minutes)
-    payload = {"sub": subject, "exp": expire}
+    payload = {"sub": subject, "exp": expire, "typ": ACCESS_TOKEN_TYPE}
     return jwt.encode(payload, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
 
 
-def decode_access_token(token: str) -> str | None:
+def create_refresh_token(subject: str, jti: str, family_id: str, expire: datetime) -> str:
+    payload = {
+        "sub": subject,
+        "exp": expire,
+        "jti": jti,
+        "fam": family_id,
+        "typ": REFRESH_TOKEN_TYPE,
+    }
+    return jwt.encode(payload, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+
+
+def _decode_claims(token: str, token_type: str) -> dict[str, Any] | None:
     try:
-        payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
-        subject: str | None = payload.get("sub")
-        return subject
+        claims: dict[str, Any] = jwt.decode(
+            token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm]
+        )
     except JWTError:
         return None
+    # Tokens issued before the claim existed are access tokens.
+    if claims.get("typ", ACCESS_TOKEN_TYPE) != token_type:
+        return None
+    return claims
+
+
+def decode_access_token_claims(token: str) -> dict[str, Any] | None:
+    return _decode_claims(token, ACCESS_TOKEN_TYPE)
+
+
+def decode_refresh_token_claims(token: str) -> dict[str, Any] | None:
+    return _decode_claims(token, REFRESH_TOKEN_TYPE)
+
+
+def decode_access_token(token: str) -> str | None:
+    claims = decode_access_token_claims(token)
+    if claims is None:
+        return None
+    subject: str | None = claims.get("sub")
+    return subject
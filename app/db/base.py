@@ -1,4 +1,5 @@
 from app.db.base_class import Base
+from app.db.models.refresh_token import RefreshToken
 from app.db.models.user import User
 
-__all__ = ["Base", "User"]
+__all__ = ["Base", "RefreshToken", "User"]
@@ -0,0 +1,135 @@
+import time
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry, Pool, QueuePool
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+CHECKED_IN_AT = "checked_in_at"
+
+checkout_wait_histogram = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection, including any new connect",
+    labelnames=("pool",),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+)
+checkout_timeouts_counter = registry.counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after DB_POOL_TIMEOUT_SECONDS",
+    labelnames=("pool",),
+)
+checked_out_gauge = registry.gauge(
+    "db_pool_checked_out", "Database connections currently checked out", labelnames=("pool",)
+)
+overflow_gauge = registry.gauge(
+    "db_pool_overflow", "Connections open beyond DB_POOL_SIZE", labelnames=("pool",)
+)
+invalidations_counter = registry.counter(
+    "db_pool_invalidations_total",
+    "Pooled connections discarded as unusable",
+    labelnames=("pool", "reason"),
+)
+
+
+def _pool_label(pool: Pool) -> str:
+    return getattr(pool, "_orig_logging_name", None) or "default"
+
+
+class _TimedCheckoutMixin:
+    # `_do_get` is where a caller blocks when the pool is exhausted, so timing it
+    # measures queueing for a connection rather than query time.
+    def _do_get(self) -> ConnectionPoolEntry:
+        label = _pool_label(self)  # type: ignore[arg-type]
+        started = time.perf_counter()
+        try:
+            return super()._do_get()  # type: ignore[misc]
+        except exc.TimeoutError:
+            checkout_timeouts_counter.inc(pool=label)
+            raise
+        finally:
+            checkout_wait_histogram.observe(time.perf_counter() - started, pool=label)
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(database_url: str, name: str, is_async: bool = False) -> dict[str, Any]:
+    backend = make_url(database_url).get_backend_name()
+    if backend == "sqlite":
+        # SQLite connections are local files; sizing and liveness checks do not apply.
+        return {}
+
+    options: dict[str, Any] = {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_logging_name": name,
+        "pool_pre_ping": False,
+    }
+    if backend == "postgresql":
+        # Kernel keepalives notice dead peers without costing a query round trip.
+        options["connect_args"] = {
+            "keepalives": 1,
+            "keepalives_idle": 30,
+            "keepalives_interval": 10,
+            "keepalives_count": 3,
+        }
+    return options
+
+
+def instrument_engine(engine: Engine) -> None:
+    # Replaces pool_pre_ping: only connections that sat idle in the pool for longer
+    # than DB_POOL_PING_IDLE_SECONDS are pinged on checkout.
+    dialect = engine.dialect
+    ping_after = settings.db_pool_ping_idle_seconds
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(_dbapi_connection: Any, record: ConnectionPoolEntry) -> None:
+        record.info.pop(CHECKED_IN_AT, None)
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection: Any, record: ConnectionPoolEntry, _proxy: Any) -> None:
+        pool = engine.pool
+        label = _pool_label(pool)
+        checked_in_at = record.info.get(CHECKED_IN_AT)
+        if (
+            ping_after >= 0
+            and checked_in_at is not None
+            and time.monotonic() - checked_in_at >= ping_after
+        ):
+            try:
+                dialect.do_ping(dbapi_connection)
+            except Exception as error:  # noqa: BLE001
+                # The pool discards this connection and retries with a fresh one.
+                raise exc.DisconnectionError("Idle connection failed liveness ping") from error
+        checked_out_gauge.inc(pool=label)
+        if isinstance(pool, QueuePool):
+            overflow_gauge.set(max(pool.overflow(), 0), pool=label)
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(_dbapi_connection: Any, record: ConnectionPoolEntry) -> None:
+        pool = engine.pool
+        label = _pool_label(pool)
+        record.info[CHECKED_IN_AT] = time.monotonic()
+        checked_out_gauge.dec(pool=label)
+        if isinstance(pool, QueuePool):
+            overflow_gauge.set(max(pool.overflow(), 0), pool=label)
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(_dbapi_connection: Any, _record: ConnectionPoolEntry, error: Any) -> None:
+        reason = "ping" if isinstance(error, exc.DisconnectionError) else "error"
+        invalidations_counter.inc(pool=_pool_label(engine.pool), reason=reason)
+
+    @event.listens_for(engine, "soft_invalidate")
+    def _on_soft_invalidate(_dbapi_connection: Any, _record: ConnectionPoolEntry, _: Any) -> None:
+        invalidations_counter.inc(pool=_pool_label(engine.pool), reason="soft")
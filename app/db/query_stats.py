@@ -0,0 +1,101 @@
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+_STARTED_AT = "query_started_at"
+
+repeated_statements_counter = registry.counter(
+    "db_repeated_statement_warnings_total",
+    "Requests that ran one statement shape more than DB_REPEATED_STATEMENT_THRESHOLD times",
+)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest_statement: str = ""
+    shapes: Counter[str] = field(default_factory=Counter)
+    warned: set[str] = field(default_factory=set)
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_seconds += elapsed
+        if elapsed > self.slowest_seconds:
+            self.slowest_seconds = elapsed
+            self.slowest_statement = statement
+        # Statements are compiled with bound parameters, so the SQL text is already
+        # the shape: the same lookup for different ids produces the same string.
+        self.shapes[statement] += 1
+        threshold = settings.db_repeated_statement_threshold
+        if threshold and self.shapes[statement] > threshold and statement not in self.warned:
+            self.warned.add(statement)
+            repeated_statements_counter.inc()
+            logger.warning(
+                "Statement ran more than %d times in one request (possible N+1): %s",
+                threshold,
+                _shorten(statement),
+            )
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def _shorten(statement: str, limit: int = 200) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= limit else statement[: limit - 3] + "..."
+
+
+def begin_query_stats() -> tuple[QueryStats, Token[QueryStats | None]]:
+    stats = QueryStats()
+    return stats, _current.set(stats)
+
+
+def end_query_stats(token: Token[QueryStats | None]) -> None:
+    _current.reset(token)
+
+
+def server_timing(stats: QueryStats, total_seconds: float) -> str:
+    return (
+        f'db;dur={stats.total_seconds * 1000:.2f};desc="{stats.count} queries", '
+        f"db-slowest;dur={stats.slowest_seconds * 1000:.2f}, "
+        f"total;dur={total_seconds * 1000:.2f}"
+    )
+
+
+def slowest_statement(stats: QueryStats) -> str:
+    return _shorten(stats.slowest_statement)
+
+
+# Registered on the Engine class so every engine (sync, async, replicas) is covered.
+# Work that runs in a threadpool or greenlet inherits the request's context, so the
+# statements are attributed to the request that issued them.
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(
+    conn: Connection, _cursor: Any, _statement: str, _parameters: Any, _context: Any, _many: bool
+) -> None:
+    if _current.get() is not None:
+        conn.info.setdefault(_STARTED_AT, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(
+    conn: Connection, _cursor: Any, statement: str, _parameters: Any, _context: Any, _many: bool
+) -> None:
+    stats = _current.get()
+    started = conn.info.get(_STARTED_AT)
+    if stats is None or not started:
+        return
+    stats.record(statement, time.perf_counter() - started.pop())
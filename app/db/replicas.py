@@ -0,0 +1,99 @@
+import logging
+import time
+from itertools import count
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine, ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.core.metrics import registry
+from app.db.pool import engine_options, instrument_engine
+
+logger = logging.getLogger(__name__)
+
+replica_reads_counter = registry.counter(
+    "db_replica_sessions_total",
+    "Read sessions routed to a replica, or to the primary when none was healthy",
+    labelnames=("target",),
+)
+replica_failures_counter = registry.counter(
+    "db_replica_failures_total",
+    "Replica connection failures that took a replica out of rotation",
+    labelnames=("replica",),
+)
+
+
+class ReplicaSet:
+    # Round-robin over the replicas that are currently healthy. A replica that fails
+    # to connect or drops a connection sits out for `retry_seconds`, and reads fall
+    # back to the primary while no replica is available.
+    def __init__(self, urls: list[str], async_urls: list[str], retry_seconds: float) -> None:
+        self._retry_seconds = retry_seconds
+        self._engines: list[AsyncEngine] = []
+        self._unhealthy_until: dict[Engine, float] = {}
+        self._names: dict[Engine, str] = {}
+        self._turn = count()
+        for number, (url, async_url) in enumerate(zip(urls, async_urls, strict=True)):
+            name = f"replica{number}"
+            engine = create_async_engine(async_url, **engine_options(url, name, is_async=True))
+            instrument_engine(engine.sync_engine)
+            self._watch(engine.sync_engine)
+            self._engines.append(engine)
+            self._names[engine.sync_engine] = name
+
+    def __len__(self) -> int:
+        return len(self._engines)
+
+    def _watch(self, engine: Engine) -> None:
+        @event.listens_for(engine, "handle_error")
+        def _on_error(context: ExceptionContext) -> None:
+            if context.is_disconnect or context.connection is None:
+                self.mark_unhealthy(engine)
+
+    def name(self, engine: Engine) -> str:
+        return self._names.get(engine, "primary")
+
+    def is_healthy(self, engine: Engine) -> bool:
+        return self._unhealthy_until.get(engine, 0.0) <= time.monotonic()
+
+    def mark_unhealthy(self, engine: Engine) -> None:
+        if not self.is_healthy(engine):
+            return
+        self._unhealthy_until[engine] = time.monotonic() + self._retry_seconds
+        replica_failures_counter.inc(replica=self.name(engine))
+        logger.warning(
+            "Replica %s unavailable; routing its reads elsewhere for %.0fs",
+            self.name(engine),
+            self._retry_seconds,
+        )
+
+    def choose(self) -> Engine | None:
+        healthy = [
+            engine.sync_engine for engine in self._engines if self.is_healthy(engine.sync_engine)
+        ]
+        if not healthy:
+            replica_reads_counter.inc(target="primary")
+            return None
+        engine = healthy[next(self._turn) % len(healthy)]
+        replica_reads_counter.inc(target=self.name(engine))
+        return engine
+
+    async def check(self) -> dict[str, str]:
+        # Probing also puts recovered replicas straight back into rotation.
+        statuses: dict[str, str] = {}
+        for engine in self._engines:
+            name = self.name(engine.sync_engine)
+            try:
+                async with engine.connect() as connection:
+                    await connection.execute(text("SELECT 1"))
+            except Exception:  # noqa: BLE001
+                self.mark_unhealthy(engine.sync_engine)
+                statuses[name] = "unavailable"
+            else:
+                self._unhealthy_until.pop(engine.sync_engine, None)
+                statuses[name] = "ok"
+        return statuses
+
+    async def dispose(self) -> None:
+        for engine in self._engines:
+            await engine.dispose()
@@ -1,13 +1,135 @@
-from collections.abc import Generator
+import math
+import time
+from collections.abc import AsyncGenerator, Generator
+from typing import Any
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Connection, Engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
+from starlette.requests import HTTPConnection
+from starlette.responses import Response
 
 from app.core.config import settings
+from app.db.pool import engine_options, instrument_engine
+from app.db.replicas import ReplicaSet
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
+ASYNC_DRIVERS = {"sqlite": "aiosqlite"}
+USE_PRIMARY_KEY = "use_primary"
+REPLICA_KEY = "replica"
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+
+def async_database_url(url: str) -> str:
+    # psycopg 3 serves both engines from the same URL; other backends need their
+    # asyncio driver named explicitly.
+    backend = make_url(url).get_backend_name()
+    driver = ASYNC_DRIVERS.get(backend)
+    if driver is None:
+        return url
+    return f"{backend}+{driver}://{url.split('://', maxsplit=1)[1]}"
+
+
+engine = create_engine(settings.database_url, **engine_options(settings.database_url, "sync"))
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    async_database_url(settings.database_url),
+    **engine_options(settings.database_url, "async", is_async=True),
+)
+instrument_engine(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+class RoutingSession(Session):
+    # Reads go to one replica per session; the session pins itself to the primary
+    # (its `bind`) as soon as it flushes, writes or locks rows, so anything it wrote
+    # is read back from the primary for the rest of its life.
+    def __init__(self, *args: Any, replicas: ReplicaSet, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+
+    def get_bind(self, mapper: Any = None, *, clause: Any = None, **kw: Any) -> Engine | Connection:
+        if (
+            self.info.get(USE_PRIMARY_KEY)
+            or self._flushing
+            or isinstance(clause, UpdateBase)
+            or getattr(clause, "_for_update_arg", None) is not None
+        ):
+            self.info[USE_PRIMARY_KEY] = True
+            return super().get_bind(mapper, clause=clause, **kw)
+
+        replica = self.info.get(REPLICA_KEY)
+        if replica is None or not self.replicas.is_healthy(replica):
+            replica = self.replicas.choose()
+            if replica is None:
+                return super().get_bind(mapper, clause=clause, **kw)
+            self.info[REPLICA_KEY] = replica
+        return replica
+
+
+def read_session_factory(
+    primary: AsyncEngine, replicas: ReplicaSet
+) -> async_sessionmaker[AsyncSession]:
+    if not replicas:
+        return async_sessionmaker(primary, autoflush=False, expire_on_commit=False)
+    return async_sessionmaker(
+        primary,
+        sync_session_class=RoutingSession,
+        replicas=replicas,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+def use_primary(db: AsyncSession) -> bool:
+    # Read-your-writes escape hatch: route the rest of this session to the primary.
+    # Returns True when earlier reads went to a replica, i.e. when retrying a read
+    # that found nothing could give a different answer.
+    was_on_replica = db.info.get(REPLICA_KEY) is not None and not db.info.get(USE_PRIMARY_KEY)
+    db.info[USE_PRIMARY_KEY] = True
+    return was_on_replica
+
+
+def remember_write(response: Response) -> None:
+    # Read-your-writes across requests: the client that just wrote reads from the
+    # primary until the replicas have had time to catch up. Everyone else's reads,
+    # including misses, stay on the replicas.
+    window = settings.database_read_your_writes_seconds
+    if replicas and window > 0:
+        response.set_cookie(
+            READ_PRIMARY_COOKIE,
+            f"{time.time() + window:.3f}",
+            max_age=math.ceil(window),
+            httponly=True,
+            samesite="lax",
+        )
+
+
+def recently_wrote(connection: HTTPConnection) -> bool:
+    try:
+        until = float(connection.cookies.get(READ_PRIMARY_COOKIE, ""))
+    except ValueError:
+        return False
+    # Bounded by the window so a forged cookie cannot pin a client to the primary.
+    now = time.time()
+    return now < until <= now + settings.database_read_your_writes_seconds
+
+
+replicas = ReplicaSet(
+    settings.replica_urls,
+    [async_database_url(url) for url in settings.replica_urls],
+    retry_seconds=settings.database_replica_retry_seconds,
+)
+AsyncReadSessionLocal = read_session_factory(async_engine, replicas)
+
 
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
@@ -15,3 +137,15 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db(connection: HTTPConnection) -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncReadSessionLocal() as db:
+        if recently_wrote(connection):
+            use_primary(db)
+        yield db
@@ -1,16 +1,29 @@
+import asyncio
 import logging
 import time
 import uuid
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.api.v1.router import api_router
 from app.core.config import settings
 from app.core.logging_config import configure_logging
-from app.services.prediction_service import preload_model
+from app.db.query_stats import (
+    begin_query_stats,
+    end_query_stats,
+    server_timing,
+    slowest_statement,
+)
+from app.db.session import AsyncSessionLocal, async_engine, replicas
+from app.services.admission import AdmissionRejectedError
+from app.services.password_hasher import password_hasher
+from app.services.prediction_service import preload_model, start_inference, stop_inference
+from app.services.principal_cache import principal_cache
 from app.services.realtime_service import realtime_hub
+from app.services.token_service import start_refresh_token_purge, stop_refresh_token_purge
 
 logger = logging.getLogger(__name__)
 
@@ -18,12 +31,26 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     preload_model()
-    realtime_hub.configure(settings.realtime_redis_url, settings.realtime_redis_channel)
+    await start_inference()
+    await asyncio.to_thread(password_hasher.start)
+    await principal_cache.start()
+    realtime_hub.configure(
+        settings.realtime_redis_url,
+        settings.realtime_redis_channel,
+        settings.realtime_replay_redis_stream,
+    )
     await realtime_hub.start()
+    start_refresh_token_purge(AsyncSessionLocal)
     try:
         yield
     finally:
+        await stop_refresh_token_purge()
         await realtime_hub.stop()
+        await principal_cache.stop()
+        await asyncio.to_thread(password_hasher.shutdown)
+        await stop_inference()
+        await replicas.dispose()
+        await async_engine.dispose()
 
 
 def create_app() -> FastAPI:
@@ -42,19 +69,38 @@ def create_app() -> FastAPI:
     async def request_context(request: Request, call_next):
         request_id = str(uuid.uuid4())
         started = time.perf_counter()
-        response = await call_next(request)
-        duration_ms = (time.perf_counter() - started) * 1000
+        stats, token = begin_query_stats()
+        try:
+            response = await call_next(request)
+        finally:
+            end_query_stats(token)
+        # Streaming bodies run after this point, so their queries are not counted.
+        duration = time.perf_counter() - started
         response.headers["X-Request-ID"] = request_id
+        response.headers["Server-Timing"] = server_timing(stats, duration)
         logger.info(
-            "%s %s status=%s duration_ms=%.2f",
+            "%s %s status=%s duration_ms=%.2f db_queries=%d db_ms=%.2f db_slowest_ms=%.2f"
+            " db_slowest=%r",
             request.method,
             request.url.path,
             response.status_code,
-            duration_ms,
+            duration * 1000,
+            stats.count,
+            stats.total_seconds * 1000,
+            stats.slowest_seconds * 1000,
+            slowest_statement(stats),
             extra={"request_id": request_id},
         )
         return response
 
+    @app.exception_handler(AdmissionRejectedError)
+    async def overloaded(_: Request, exc: AdmissionRejectedError) -> JSONResponse:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": str(exc)},
+            headers={"Retry-After": str(exc.retry_after_seconds)},
+        )
+
     app.include_router(api_router, prefix="/api/v1")
     return app
 
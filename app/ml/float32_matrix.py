@@ -0,0 +1,42 @@
+import struct
+
+import numpy as np
+from numpy.typing import NDArray
+
+MEDIA_TYPE = "application/x-float32-matrix"
+MAGIC = b"F32M"
+FORMAT_VERSION = 1
+
+# magic, format version, 3 padding bytes, rows, columns. The 16-byte header keeps the
+# float32 payload 4-byte aligned so it can be viewed in place.
+HEADER = struct.Struct("<4sB3xII")
+
+
+class MatrixFormatError(ValueError):
+    pass
+
+
+def decode_matrix(body: bytes | bytearray | memoryview) -> NDArray[np.float32]:
+    if len(body) < HEADER.size:
+        raise MatrixFormatError("body is shorter than the matrix header")
+    magic, version, rows, columns = HEADER.unpack_from(body)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise MatrixFormatError("unrecognised matrix header")
+
+    expected = HEADER.size + rows * columns * 4
+    if len(body) != expected:
+        raise MatrixFormatError(f"expected {expected} bytes for a {rows}x{columns} matrix")
+
+    # A view over the request buffer: no per-value parsing or copying.
+    values = np.frombuffer(body, dtype="<f4", count=rows * columns, offset=HEADER.size)
+    return values.reshape(rows, columns)
+
+
+def encode_matrix(values: NDArray[np.floating]) -> bytes:
+    matrix = np.asarray(values, dtype="<f4")
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(-1, 1)
+    if matrix.ndim != 2:
+        raise MatrixFormatError("only 1-D or 2-D arrays can be encoded")
+    rows, columns = matrix.shape
+    return HEADER.pack(MAGIC, FORMAT_VERSION, rows, columns) + matrix.tobytes()
@@ -0,0 +1,32 @@
+from typing import Any, NamedTuple
+
+import numpy as np
+
+from app.ml.model_loader import load_model_artifact
+
+_model: Any = None
+_version = ""
+
+
+class PackedOutputs(NamedTuple):
+    values: bytes
+    # The version this worker loaded, which can differ from the parent's if the
+    # artifact changed before the worker was (re)started.
+    model_version: str
+
+
+def init_worker(model_path: str) -> None:
+    global _model, _version
+    loaded = load_model_artifact(model_path)
+    _model, _version = loaded.model, loaded.version
+
+
+def predict_packed(payload: bytes, width: int, dtype: str = "<f8") -> PackedOutputs:
+    # Rows travel as packed buffers in the caller's dtype: one memcpy to pickle instead
+    # of a Python object per feature in each direction. Outputs are always float64.
+    features = np.frombuffer(payload, dtype=dtype).reshape(-1, width)
+    if hasattr(_model, "predict_array"):
+        outputs = _model.predict_array(features)
+    else:
+        outputs = _model.predict(features.tolist())
+    return PackedOutputs(np.asarray(outputs, dtype="<f8").tobytes(), _version)
@@ -1,13 +1,75 @@
+import hashlib
+import mmap
+import os
 import pickle
+from dataclasses import dataclass
 from pathlib import Path
 
-_model: object | None = None
+WEIGHTS_SUFFIX = ".weights"
+
+
+@dataclass(frozen=True, slots=True)
+class ArtifactFingerprint:
+    inode: int
+    size: int
+    mtime_ns: int
+
+
+@dataclass(frozen=True, slots=True)
+class LoadedModel:
+    model: object
+    version: str
+    path: str
+    fingerprint: ArtifactFingerprint
+
+
+def artifact_fingerprint(path: str) -> ArtifactFingerprint:
+    stat = os.stat(path)
+    return ArtifactFingerprint(inode=stat.st_ino, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+
+
+def weights_path(path: str) -> Path:
+    return Path(path + WEIGHTS_SUFFIX)
+
+
+def _map_file(path: Path) -> mmap.mmap | None:
+    with path.open("rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return None
+        # The mapping stays valid after the descriptor is closed.
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def load_model_artifact(path: str) -> LoadedModel:
+    fingerprint = artifact_fingerprint(path)
+    digest = hashlib.sha256()
+
+    artifact = _map_file(Path(path))
+    if artifact is None:
+        raise ValueError(f"Model artifact {path} is empty")
+    try:
+        digest.update(artifact)
+        model = pickle.loads(artifact)
+    finally:
+        artifact.close()
+
+    # Large weights live in an optional sidecar that is memory-mapped read-only and
+    # handed to the model as a view, so they are paged in on demand and shared
+    # between processes instead of being copied onto each heap.
+    sidecar = weights_path(path)
+    if sidecar.exists():
+        weights = _map_file(sidecar)
+        if weights is not None:
+            digest.update(weights)
+            bind_weights = getattr(model, "bind_weights", None)
+            if bind_weights is None:
+                raise TypeError(f"{type(model).__name__} cannot bind weights from {sidecar}")
+            bind_weights(memoryview(weights))
+
+    return LoadedModel(
+        model=model, version=digest.hexdigest()[:12], path=path, fingerprint=fingerprint
+    )
 
 
 def load_model(path: str) -> object:
-    global _model
-    if _model is None:
-        model_path = Path(path)
-        with model_path.open("rb") as file:
-            _model = pickle.load(file)
-    return _model
+    return load_model_artifact(path).model
@@ -0,0 +1,268 @@
+import gc
+import logging
+import os
+import select
+import signal
+import socket
+import time
+from contextlib import suppress
+
+import uvicorn
+
+# The process pools spawn their workers, and a spawned child re-imports `__main__`;
+# under `python -m app.prefork` that is this module, so it must not import the
+# application at module level. The master imports it in run(), before fork().
+
+logger = logging.getLogger(__name__)
+
+MIN_WORKER_LIFETIME_SECONDS = 1.0
+WORKER_READY_TIMEOUT_SECONDS = 60.0
+HANDLED_SIGNALS = (signal.SIGTERM, signal.SIGINT, signal.SIGHUP)
+
+
+class _WorkerServer(uvicorn.Server):
+    # Tells the master, over a pipe, once the lifespan has run and the worker is
+    # accepting connections.
+    def __init__(self, config: uvicorn.Config, ready_fd: int) -> None:
+        super().__init__(config)
+        self._ready_fd = ready_fd
+
+    async def startup(self, sockets: list[socket.socket] | None = None) -> None:
+        await super().startup(sockets)
+        if self.started and not self.should_exit:
+            with suppress(OSError):
+                os.write(self._ready_fd, b"1")
+        os.close(self._ready_fd)
+
+
+class PreforkServer:
+    def __init__(self, workers: int, host: str, port: int, graceful_timeout: float) -> None:
+        self._worker_count = workers
+        self._host = host
+        self._port = port
+        self._graceful_timeout = graceful_timeout
+        self._workers: dict[int, float] = {}
+        self._retiring: set[int] = set()
+        self._pending_signals: list[int] = []
+        self._stopping = False
+        self._socket: socket.socket | None = None
+
+    def run(self) -> None:
+        from app.core.config import settings
+        from app.core.logging_config import configure_logging
+        from app.main import app  # noqa: F401
+        from app.services.prediction_service import preload_model
+
+        configure_logging()
+        # Everything loaded before fork() is shared copy-on-write by every worker.
+        preload_model()
+        self._socket = self._bind()
+        self._freeze_heap()
+
+        for sig in HANDLED_SIGNALS:
+            signal.signal(sig, self._on_signal)
+        for _ in range(self._worker_count):
+            os.close(self._spawn()[1])
+        logger.info(
+            "Prefork master pid=%d serving on %s:%d with %d workers",
+            os.getpid(),
+            self._host,
+            self._port,
+            self._worker_count,
+        )
+
+        # Only the master watches MODEL_PATH; a change rolls every worker onto it.
+        poll_interval = settings.model_reload_interval_seconds
+        next_poll = time.monotonic() + poll_interval
+        while not self._stopping:
+            while self._pending_signals:
+                self._handle_signal(self._pending_signals.pop(0))
+            if poll_interval > 0 and not self._stopping and time.monotonic() >= next_poll:
+                self._poll_model()
+                next_poll = time.monotonic() + poll_interval
+            self._reap(respawn=not self._stopping)
+            time.sleep(0.2)
+
+    def _bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self._host, self._port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    @staticmethod
+    def _freeze_heap() -> None:
+        # Move everything allocated so far into the permanent generation so the
+        # children's collector never writes to those objects and un-shares their pages.
+        gc.collect()
+        gc.freeze()
+
+    def _on_signal(self, signum: int, _frame: object) -> None:
+        self._pending_signals.append(signum)
+
+    def _handle_signal(self, signum: int) -> None:
+        if signum == signal.SIGHUP:
+            self._rolling_restart()
+        else:
+            self._shutdown()
+
+    def _spawn(self) -> tuple[int, int]:
+        # Returns the worker's pid and the read end of its readiness pipe.
+        ready_read, ready_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            exit_code = 0
+            try:
+                self._run_worker(ready_write)
+            except BaseException:  # noqa: BLE001
+                logger.exception("Worker pid=%d crashed", os.getpid())
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        os.close(ready_write)
+        self._workers[pid] = time.monotonic()
+        return pid, ready_read
+
+    @staticmethod
+    def _wait_ready(ready_fd: int, timeout: float) -> bool:
+        try:
+            readable, _, _ = select.select([ready_fd], [], [], timeout)
+            # EOF without the ready byte means the worker died during startup.
+            return bool(readable) and os.read(ready_fd, 1) == b"1"
+        finally:
+            os.close(ready_fd)
+
+    def _run_worker(self, ready_fd: int) -> None:
+        from app.core.config import settings
+        from app.db.session import async_engine, engine
+        from app.main import app
+        from app.services.prediction_service import forward_reloads_to
+
+        for sig in HANDLED_SIGNALS:
+            signal.signal(sig, signal.SIG_DFL)
+        # Workers serve the model the master loaded before fork(); reloading here would
+        # load a private copy, so the master polls the artifact and reload requests are
+        # forwarded to it.
+        settings.model_reload_interval_seconds = 0
+        forward_reloads_to(os.getppid())
+        # Connection pools must never be shared across processes; the engines have not
+        # connected in the master, but drop any inherited state to be safe. Redis clients
+        # and the inference pool are created by the app lifespan, i.e. after fork().
+        engine.dispose(close=False)
+        async_engine.sync_engine.dispose(close=False)
+
+        assert self._socket is not None
+        config = uvicorn.Config(
+            app,
+            lifespan="on",
+            log_config=None,
+            timeout_graceful_shutdown=int(self._graceful_timeout),
+            ws_per_message_deflate=settings.ws_per_message_deflate,
+        )
+        _WorkerServer(config, ready_fd).run(sockets=[self._socket])
+
+    def _reap(self, respawn: bool) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+            started = self._workers.pop(pid, None)
+            if pid in self._retiring:
+                self._retiring.discard(pid)
+                continue
+            if started is None or not respawn:
+                continue
+
+            logger.warning("Worker pid=%d exited status=%d; restarting", pid, status)
+            if time.monotonic() - started < MIN_WORKER_LIFETIME_SECONDS:
+                time.sleep(MIN_WORKER_LIFETIME_SECONDS)
+            os.close(self._spawn()[1])
+
+    def _poll_model(self) -> None:
+        from app.services.prediction_service import reload_model
+
+        try:
+            reloaded = reload_model().reloaded
+        except Exception:  # noqa: BLE001
+            logger.exception("Model reload failed; workers keep serving the current model")
+            return
+        if reloaded:
+            self._replace_workers()
+
+    def _rolling_restart(self) -> None:
+        from app.services.prediction_service import reload_model
+
+        try:
+            reload_model()
+        except Exception:  # noqa: BLE001
+            logger.exception("Model reload failed; restarting workers on the current model")
+        self._replace_workers()
+
+    def _replace_workers(self) -> None:
+        logger.info("Rolling restart of %d workers", len(self._workers))
+        self._freeze_heap()
+
+        # One worker at a time: its replacement must finish startup and be accepting
+        # on the shared socket before the old one is asked to drain, so serving
+        # capacity never drops below WEB_CONCURRENCY workers.
+        for pid in list(self._workers):
+            if pid not in self._workers:
+                continue
+            new_pid, ready_fd = self._spawn()
+            if not self._wait_ready(ready_fd, WORKER_READY_TIMEOUT_SECONDS):
+                logger.error(
+                    "Replacement worker pid=%d did not become ready; stopping the rolling "
+                    "restart with the remaining workers unchanged",
+                    new_pid,
+                )
+                self._retiring.add(new_pid)
+                with suppress(ProcessLookupError):
+                    os.kill(new_pid, signal.SIGKILL)
+                return
+            self._retiring.add(pid)
+            os.kill(pid, signal.SIGTERM)
+
+    def _shutdown(self) -> None:
+        self._stopping = True
+        logger.info("Stopping %d workers", len(self._workers))
+        for pid in list(self._workers):
+            os.kill(pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + self._graceful_timeout
+        while self._workers and time.monotonic() < deadline:
+            self._reap(respawn=False)
+            time.sleep(0.1)
+        for pid in list(self._workers):
+            logger.warning("Worker pid=%d did not stop in time; killing", pid)
+            os.kill(pid, signal.SIGKILL)
+        while self._workers:
+            try:
+                pid, _ = os.waitpid(-1, 0)
+            except ChildProcessError:
+                break
+            self._workers.pop(pid, None)
+
+        if self._socket is not None:
+            self._socket.close()
+
+
+def main() -> None:
+    from app.core.config import settings
+
+    server = PreforkServer(
+        workers=settings.web_workers,
+        host=settings.server_host,
+        port=settings.server_port,
+        graceful_timeout=settings.worker_graceful_timeout_seconds,
+    )
+    server.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,22 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+FEATURE_COUNT = 4
 
 
 class PredictRequest(BaseModel):
-    features: list[float] = Field(min_length=4, max_length=4)
+    features: list[float] = Field(min_length=FEATURE_COUNT, max_length=FEATURE_COUNT)
 
 
 class PredictResponse(BaseModel):
     prediction: float
+    model_version: str
+
+    model_config = ConfigDict(protected_namespaces=())
+
+
+class ModelReloadResponse(BaseModel):
+    previous_version: str
+    model_version: str
+    reloaded: bool
+
+    model_config = ConfigDict(protected_namespaces=())
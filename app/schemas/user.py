@@ -1,4 +1,6 @@
-from pydantic import BaseModel, ConfigDict, EmailStr
+from typing import Self
+
+from pydantic import BaseModel, ConfigDict, EmailStr, model_validator
 
 
 class UserCreate(BaseModel):
@@ -6,8 +8,25 @@ class UserCreate(BaseModel):
     password: str
 
 
+class UserImportRow(BaseModel):
+    email: EmailStr
+    password: str | None = None
+    hashed_password: str | None = None
+
+    @model_validator(mode="after")
+    def check_credentials(self) -> Self:
+        if (self.password is None) == (self.hashed_password is None):
+            raise ValueError("provide exactly one of password or hashed_password")
+        return self
+
+
 class UserRead(BaseModel):
     id: int
     email: EmailStr
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class UserPage(BaseModel):
+    items: list[UserRead]
+    next_cursor: int | None = None
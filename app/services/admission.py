@@ -0,0 +1,152 @@
+import asyncio
+import math
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram, registry
+
+SERVICE_TIME_SMOOTHING = 0.2
+
+admission_rejections_counter = registry.counter(
+    "predict_admission_rejections_total",
+    "Prediction requests shed before they started",
+    labelnames=("reason",),
+)
+cancelled_counter = registry.counter(
+    "predict_cancelled_total", "Prediction requests abandoned because the client disconnected"
+)
+admission_wait_histogram = registry.histogram(
+    "predict_admission_wait_seconds",
+    "Time a prediction request queued before it was admitted",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+class AdmissionRejectedError(RuntimeError):
+    def __init__(self, reason: str, retry_after_seconds: int) -> None:
+        super().__init__(f"Server is overloaded ({reason}); retry after {retry_after_seconds}s")
+        self.reason = reason
+        self.retry_after_seconds = retry_after_seconds
+
+
+class AdmissionController:
+    # At most max_in_flight holders run at once and at most max_queue more wait, in
+    # FIFO order. A released slot is handed straight to the next live waiter so a
+    # newcomer can never overtake the queue.
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_queue: int,
+        rejections: Counter | None = None,
+        wait_seconds: Histogram | None = None,
+    ) -> None:
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self._max_in_flight = max_in_flight
+        self._max_queue = max(max_queue, 0)
+        self._rejections = rejections
+        self._wait_seconds = wait_seconds
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._service_seconds = 0.0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    def retry_after_seconds(self) -> int:
+        # Roughly how long the current backlog takes to drain at the observed pace.
+        backlog = self.queue_depth + 1
+        return max(1, math.ceil(self._service_seconds * backlog / self._max_in_flight))
+
+    @asynccontextmanager
+    async def admit(self, deadline: float | None = None, shed: bool = True) -> AsyncIterator[None]:
+        # `deadline` is in event-loop time; a request that cannot start before it is
+        # rejected instead of waiting for work its client will no longer accept.
+        # `shed=False` waits in line even when the queue is full (bulk callers).
+        loop = asyncio.get_running_loop()
+        await self._acquire(loop, deadline, shed)
+        started = loop.time()
+        try:
+            yield
+        finally:
+            elapsed = loop.time() - started
+            self._service_seconds += SERVICE_TIME_SMOOTHING * (elapsed - self._service_seconds)
+            self._release()
+
+    async def _acquire(
+        self, loop: asyncio.AbstractEventLoop, deadline: float | None, shed: bool
+    ) -> None:
+        if self._in_flight < self._max_in_flight and not self._waiters:
+            self._in_flight += 1
+            self._observe_wait(0.0)
+            return
+        if shed and self.queue_depth >= self._max_queue:
+            raise self._reject("queue_full")
+        if deadline is not None and deadline <= loop.time():
+            raise self._reject("deadline")
+
+        waiter: asyncio.Future[None] = loop.create_future()
+        self._waiters.append(waiter)
+        enqueued_at = loop.time()
+        try:
+            async with asyncio.timeout_at(deadline):
+                await waiter
+        except TimeoutError:
+            self._abandon(waiter)
+            raise self._reject("deadline") from None
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        self._observe_wait(loop.time() - enqueued_at)
+
+    def _observe_wait(self, seconds: float) -> None:
+        if self._wait_seconds is not None:
+            self._wait_seconds.observe(seconds)
+
+    def _abandon(self, waiter: asyncio.Future[None]) -> None:
+        if waiter.done() and not waiter.cancelled():
+            # The slot was handed over just as we gave up; pass it on.
+            self._release()
+            return
+        waiter.cancel()
+        with suppress(ValueError):
+            self._waiters.remove(waiter)
+
+    def _release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def _reject(self, reason: str) -> AdmissionRejectedError:
+        if self._rejections is not None:
+            self._rejections.inc(reason=reason)
+        return AdmissionRejectedError(reason, self.retry_after_seconds())
+
+
+predict_admission = AdmissionController(
+    max_in_flight=settings.predict_max_in_flight,
+    max_queue=settings.predict_max_queue,
+    rejections=admission_rejections_counter,
+    wait_seconds=admission_wait_histogram,
+)
+
+registry.gauge(
+    "predict_admission_in_flight",
+    "Prediction requests currently admitted",
+    callback=lambda: predict_admission.in_flight,
+)
+registry.gauge(
+    "predict_admission_queue_depth",
+    "Prediction requests waiting for admission",
+    callback=lambda: predict_admission.queue_depth,
+)
@@ -0,0 +1,98 @@
+import codecs
+import json
+from collections.abc import AsyncIterator
+
+MAX_ROW_BYTES = 64 * 1024
+
+_WHITESPACE = " \t\r\n"
+
+
+class BulkInputError(ValueError):
+    pass
+
+
+class RowError(ValueError):
+    pass
+
+
+async def iter_ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[object]:
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer.extend(chunk)
+        start = 0
+        while (newline := buffer.find(b"\n", start)) != -1:
+            line = bytes(buffer[start:newline])
+            start = newline + 1
+            if line.strip():
+                yield _decode_ndjson_line(line)
+        del buffer[:start]
+        if len(buffer) > MAX_ROW_BYTES:
+            raise BulkInputError(f"row exceeds {MAX_ROW_BYTES} bytes")
+
+    if bytes(buffer).strip():
+        yield _decode_ndjson_line(bytes(buffer))
+
+
+def _decode_ndjson_line(line: bytes) -> object:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return RowError("invalid JSON")
+
+
+async def iter_json_array_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[object]:
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    started = False
+    expect_separator = False
+    finished = False
+
+    async for chunk in chunks:
+        try:
+            buffer += utf8.decode(chunk)
+        except UnicodeDecodeError as exc:
+            raise BulkInputError("request body is not valid UTF-8") from exc
+
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position >= len(buffer):
+                break
+            if finished:
+                raise BulkInputError("unexpected data after the JSON array")
+            if not started:
+                if buffer[position] != "[":
+                    raise BulkInputError("expected a JSON array of rows")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                finished = True
+                position += 1
+                continue
+            if expect_separator:
+                if buffer[position] != ",":
+                    raise BulkInputError("expected ',' between array elements")
+                expect_separator = False
+                position += 1
+                continue
+            try:
+                row, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The element is most likely split across chunks; wait for more data.
+                break
+            expect_separator = True
+            yield row
+
+        buffer = buffer[position:]
+        if len(buffer) > MAX_ROW_BYTES:
+            raise BulkInputError(f"row exceeds {MAX_ROW_BYTES} bytes")
+
+    if not finished:
+        raise BulkInputError("truncated JSON array")
+
+
+def encode_line(payload: dict[str, object]) -> bytes:
+    return json.dumps(payload, separators=(",", ":"), allow_nan=False).encode() + b"\n"
@@ -0,0 +1,69 @@
+import math
+from collections.abc import AsyncIterator
+
+from app.schemas.predict import FEATURE_COUNT
+from app.services.admission import AdmissionRejectedError, predict_admission
+from app.services.bulk_io import BulkInputError, RowError, encode_line
+from app.services.inference_pool import InferencePoolError
+from app.services.prediction_service import predict_batch_async
+
+
+def _coerce_features(row: object) -> list[float]:
+    features = row.get("features") if isinstance(row, dict) else row
+    if not isinstance(features, list) or len(features) != FEATURE_COUNT:
+        raise RowError(f"features must be a list of {FEATURE_COUNT} numbers")
+    for value in features:
+        if isinstance(value, bool) or not isinstance(value, int | float):
+            raise RowError(f"features must be a list of {FEATURE_COUNT} numbers")
+        # json.loads accepts NaN and Infinity, which are not JSON and cannot be echoed.
+        if not math.isfinite(value):
+            raise RowError("features must be finite numbers")
+    return [float(value) for value in features]
+
+
+def _result_line(index: int, value: float) -> bytes:
+    if not math.isfinite(value):
+        return encode_line({"index": index, "error": "prediction is not a finite number"})
+    return encode_line({"index": index, "prediction": value})
+
+
+async def _score_chunk(pending: list[tuple[int, list[float]]], deadline: float | None) -> bytes:
+    # Each chunk is admitted like a /predict request, so a long stream takes its turn
+    # with everyone else and is shed, chunk by chunk, when the server is overloaded.
+    try:
+        async with predict_admission.admit(deadline):
+            predictions = await predict_batch_async([features for _, features in pending])
+    except (AdmissionRejectedError, InferencePoolError) as exc:
+        return b"".join(encode_line({"index": index, "error": str(exc)}) for index, _ in pending)
+    return b"".join(
+        _result_line(index, prediction.value)
+        for (index, _), prediction in zip(pending, predictions, strict=True)
+    )
+
+
+async def score_rows(
+    rows: AsyncIterator[object], chunk_size: int, deadline: float | None = None
+) -> AsyncIterator[bytes]:
+    pending: list[tuple[int, list[float]]] = []
+    index = 0
+    try:
+        async for row in rows:
+            try:
+                if isinstance(row, RowError):
+                    raise row
+                pending.append((index, _coerce_features(row)))
+            except RowError as exc:
+                yield encode_line({"index": index, "error": str(exc)})
+            index += 1
+
+            if len(pending) >= chunk_size:
+                yield await _score_chunk(pending, deadline)
+                pending = []
+    except BulkInputError as exc:
+        if pending:
+            yield await _score_chunk(pending, deadline)
+        yield encode_line({"index": index, "error": str(exc), "fatal": True})
+        return
+
+    if pending:
+        yield await _score_chunk(pending, deadline)
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import chain
+from multiprocessing import get_context
+from threading import Lock
+
+from app.core.metrics import registry
+from app.ml.inference_worker import PackedOutputs, init_worker, predict_packed
+
+logger = logging.getLogger(__name__)
+
+pool_restarts_counter = registry.counter(
+    "inference_pool_restarts_total",
+    "Inference worker pool restarts",
+    labelnames=("reason",),
+)
+pool_task_latency_histogram = registry.histogram(
+    "inference_pool_task_seconds",
+    "Round-trip time of a batch dispatched to the inference worker pool",
+)
+
+
+# How often a queued task is checked for having been picked up by a worker.
+PICKUP_POLL_SECONDS = 0.01
+
+
+class InferencePoolError(RuntimeError):
+    pass
+
+
+class InferenceTimeoutError(InferencePoolError):
+    pass
+
+
+class InferencePool:
+    def __init__(
+        self,
+        model_path: str,
+        size: int | None,
+        task_timeout_seconds: float,
+        max_restarts: int,
+        web_workers: int = 1,
+    ) -> None:
+        self._model_path = model_path
+        # Every web worker runs its own pool, each holding a copy of the model, so by
+        # default they split the CPUs.
+        if size is None:
+            size = max((os.cpu_count() or 1) // max(web_workers, 1), 1)
+        self._size = size
+        self._task_timeout = task_timeout_seconds
+        self._max_restarts = max_restarts
+        self._lock = Lock()
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+        logger.info("Inference process pool started workers=%d", self._size)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def recycle(self) -> None:
+        # Replace the workers so they load the current artifact; tasks already running
+        # on the old pool finish there before its processes exit.
+        with self._lock:
+            previous = self._executor
+            if previous is None:
+                return
+            self._executor = self._create_executor()
+        pool_restarts_counter.inc(reason="reload")
+        previous.shutdown(wait=False)
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # Spawned workers start from a clean interpreter, so they never inherit
+        # the parent's event loop, threads or pooled connections.
+        return ProcessPoolExecutor(
+            max_workers=self._size,
+            mp_context=get_context("spawn"),
+            initializer=init_worker,
+            initargs=(self._model_path,),
+        )
+
+    def _restart(self, broken: ProcessPoolExecutor, reason: str) -> None:
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = self._create_executor()
+        pool_restarts_counter.inc(reason=reason)
+        logger.warning("Restarting inference process pool reason=%s", reason)
+        # A hung worker never returns its slot, so terminate the old processes
+        # instead of waiting for them to drain.
+        for process in list(getattr(broken, "_processes", {}).values()):
+            process.terminate()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    async def predict_batch(self, features_batch: list[list[float]]) -> tuple[list[float], str]:
+        if not features_batch:
+            raise ValueError("A batch needs at least one row")
+        width = len(features_batch[0])
+        if any(len(features) != width for features in features_batch):
+            raise ValueError("All rows in a batch must have the same number of features")
+        payload = array("d", chain.from_iterable(features_batch)).tobytes()
+
+        packed = await self.predict_packed(payload, width)
+        outputs = array("d")
+        outputs.frombytes(packed.values)
+        return outputs.tolist(), packed.model_version
+
+    async def predict_packed(self, payload: bytes, width: int, dtype: str = "<f8") -> PackedOutputs:
+        loop = asyncio.get_running_loop()
+        for _ in range(self._max_restarts + 1):
+            executor = self._executor
+            if executor is None:
+                raise InferencePoolError("Inference pool is not running")
+
+            started = loop.time()
+            try:
+                future = executor.submit(predict_packed, payload, width, dtype)
+                result = asyncio.wrap_future(future)
+                # Time spent queued behind busy workers is load, not a hang: the timeout
+                # (and the restart it triggers) only starts once a worker has the task.
+                while not future.running() and not future.done():
+                    await asyncio.wait({result}, timeout=PICKUP_POLL_SECONDS)
+                async with asyncio.timeout(self._task_timeout):
+                    return await result
+            except BrokenProcessPool:
+                self._restart(executor, "crash")
+                continue
+            except RuntimeError:
+                # Another caller swapped the pool between our read and submit().
+                if self._executor is not executor:
+                    continue
+                raise
+            except TimeoutError as exc:
+                self._restart(executor, "timeout")
+                raise InferenceTimeoutError(
+                    f"Inference did not finish within {self._task_timeout}s"
+                ) from exc
+            finally:
+                pool_task_latency_histogram.observe(loop.time() - started)
+
+        raise InferencePoolError("Inference workers kept crashing; giving up")
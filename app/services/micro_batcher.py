@@ -0,0 +1,172 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Sequence
+from contextlib import suppress
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+BatchRunner = Callable[[list[list[float]]], Awaitable[Sequence[T]]]
+
+batch_size_histogram = registry.histogram(
+    "predict_batch_size",
+    "Rows per micro-batched model call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+queue_wait_histogram = registry.histogram(
+    "predict_batch_queue_wait_seconds",
+    "Time a row waited in the micro-batch queue before its batch was dispatched",
+    buckets=(0.0001, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+
+@dataclass(slots=True)
+class _PendingRow(Generic[T]):
+    features: list[float]
+    future: asyncio.Future[T]
+    enqueued_at: float
+
+
+def _cancel_rows(rows: list[_PendingRow[T]]) -> None:
+    for row in rows:
+        if not row.future.done():
+            row.future.cancel()
+
+
+class MicroBatcher(Generic[T]):
+    # A batch is dispatched once it holds max_batch_size rows or its oldest row
+    # has waited max_wait_ms, whichever comes first. Up to max_concurrent_batches
+    # batches run at once (e.g. one per inference process) while the next one is
+    # being collected.
+    def __init__(
+        self,
+        run_batch: BatchRunner[T],
+        max_batch_size: int,
+        max_wait_ms: float,
+        max_concurrent_batches: int = 1,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self._run_batch = run_batch
+        self._max_batch_size = max_batch_size
+        self._max_wait = max(max_wait_ms, 0.0) / 1000
+        self._max_concurrent_batches = max_concurrent_batches
+        self._queue: asyncio.Queue[_PendingRow[T]] | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._in_flight: set[asyncio.Task[None]] = set()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self, max_concurrent_batches: int | None = None) -> None:
+        if self.running:
+            return
+        if max_concurrent_batches is not None:
+            self._max_concurrent_batches = max_concurrent_batches
+        if self._max_concurrent_batches < 1:
+            raise ValueError("max_concurrent_batches must be at least 1")
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+        for task in self._in_flight:
+            task.cancel()
+        await asyncio.gather(*self._in_flight, return_exceptions=True)
+        self._in_flight.clear()
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                self._queue.get_nowait().future.cancel()
+            self._queue = None
+
+    async def submit(self, features: list[float]) -> T:
+        if not self.running or self._queue is None:
+            outputs = await self._run_batch([features])
+            return outputs[0]
+
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[T] = loop.create_future()
+        self._queue.put_nowait(_PendingRow(features, future, loop.time()))
+        return await future
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self._max_concurrent_batches)
+        batch: list[_PendingRow[T]] = []
+
+        try:
+            while True:
+                first = await queue.get()
+                batch = [first]
+                deadline = first.enqueued_at + self._max_wait
+
+                while len(batch) < self._max_batch_size:
+                    if not queue.empty():
+                        batch.append(queue.get_nowait())
+                        continue
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        async with asyncio.timeout(remaining):
+                            batch.append(await queue.get())
+                    except TimeoutError:
+                        break
+
+                # Rows that arrive while every slot is busy join this batch.
+                await slots.acquire()
+                while len(batch) < self._max_batch_size and not queue.empty():
+                    batch.append(queue.get_nowait())
+
+                task = asyncio.create_task(self._dispatch(batch, loop.time()))
+                batch = []
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+                task.add_done_callback(lambda _task: slots.release())
+        except asyncio.CancelledError:
+            _cancel_rows(batch)
+            raise
+
+    async def _dispatch(self, batch: list[_PendingRow[T]], dispatched_at: float) -> None:
+        # Callers that gave up while queued are dropped before the model runs.
+        live = [row for row in batch if not row.future.done()]
+        if not live:
+            return
+
+        batch_size_histogram.observe(len(live))
+        for row in live:
+            queue_wait_histogram.observe(dispatched_at - row.enqueued_at)
+
+        try:
+            outputs = await self._run_batch([row.features for row in live])
+            if len(outputs) != len(live):
+                raise RuntimeError(
+                    f"Model returned {len(outputs)} outputs for a batch of {len(live)}"
+                )
+        except asyncio.CancelledError:
+            _cancel_rows(live)
+            raise
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Micro-batch of %d rows failed", len(live))
+            for row in live:
+                if not row.future.done():
+                    row.future.set_exception(exc)
+            return
+
+        for row, output in zip(live, outputs, strict=True):
+            if not row.future.done():
+                row.future.set_result(output)
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import re
+import sys
+from collections import OrderedDict
+from pathlib import Path
+from types import FunctionType, ModuleType
+from typing import cast
+
+from app.core.config import settings
+from app.core.metrics import registry as metrics_registry
+from app.ml.model_loader import LoadedModel, load_model_artifact
+from app.schemas.predict import FEATURE_COUNT
+from app.services.prediction_service import Prediction, PredictModel
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,127}$")
+MODEL_SUFFIX = ".pkl"
+
+registry_loads_counter = metrics_registry.counter(
+    "model_registry_loads_total", "Models loaded into the registry", labelnames=("outcome",)
+)
+registry_unloads_counter = metrics_registry.counter(
+    "model_registry_unloads_total", "Models unloaded to stay within the memory budget"
+)
+
+
+class ModelNotFoundError(LookupError):
+    pass
+
+
+def estimate_model_bytes(model: object) -> int:
+    # Models can report their own footprint; otherwise walk the object graph. Memory
+    # mapped weights are page cache shared across processes, so they are not counted.
+    reported = getattr(model, "memory_bytes", None)
+    if isinstance(reported, int):
+        return reported
+
+    total = 0
+    seen: set[int] = set()
+    stack: list[object] = [model]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, type | ModuleType | FunctionType | memoryview):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj, 0)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, list | tuple | set | frozenset):
+            stack.extend(obj)
+        if hasattr(obj, "__dict__"):
+            stack.append(vars(obj))
+        for slot in getattr(type(obj), "__slots__", ()):
+            if hasattr(obj, slot):
+                stack.append(getattr(obj, slot))
+    return total
+
+
+class _Resident:
+    __slots__ = ("loaded", "memory_bytes")
+
+    def __init__(self, loaded: LoadedModel, memory_bytes: int) -> None:
+        self.loaded = loaded
+        self.memory_bytes = memory_bytes
+
+
+class ModelRegistry:
+    def __init__(self, root: str | None, memory_budget_bytes: int) -> None:
+        self._root = Path(root) if root else None
+        self._memory_budget_bytes = memory_budget_bytes
+        self._resident: OrderedDict[str, _Resident] = OrderedDict()
+        self._loading: dict[str, asyncio.Task[_Resident]] = {}
+        self._resident_bytes = 0
+
+    @property
+    def resident_bytes(self) -> int:
+        return self._resident_bytes
+
+    def loaded_models(self) -> list[str]:
+        return list(self._resident)
+
+    def _artifact_path(self, name: str) -> Path:
+        if self._root is None or not MODEL_NAME_PATTERN.fullmatch(name):
+            raise ModelNotFoundError(name)
+        path = self._root / f"{name}{MODEL_SUFFIX}"
+        if not path.is_file():
+            raise ModelNotFoundError(name)
+        return path
+
+    async def get(self, name: str) -> LoadedModel:
+        resident = self._resident.get(name)
+        if resident is not None:
+            self._resident.move_to_end(name)
+            return resident.loaded
+
+        # Concurrent first requests share one load instead of racing to unpickle.
+        task = self._loading.get(name)
+        if task is None:
+            path = self._artifact_path(name)
+            task = asyncio.create_task(self._load(name, path))
+            self._loading[name] = task
+            task.add_done_callback(lambda _: self._loading.pop(name, None))
+        resident = await asyncio.shield(task)
+        return resident.loaded
+
+    async def _load(self, name: str, path: Path) -> _Resident:
+        try:
+            loaded, memory_bytes = await asyncio.to_thread(self._load_and_measure, path)
+        except Exception:
+            registry_loads_counter.inc(outcome="error")
+            raise
+        registry_loads_counter.inc(outcome="ok")
+
+        resident = _Resident(loaded, memory_bytes)
+        self._resident[name] = resident
+        self._resident_bytes += memory_bytes
+        logger.info("Loaded model name=%s version=%s bytes=%d", name, loaded.version, memory_bytes)
+        self._enforce_budget(keep=name)
+        return resident
+
+    @staticmethod
+    def _load_and_measure(path: Path) -> tuple[LoadedModel, int]:
+        loaded = load_model_artifact(str(path))
+        cast(PredictModel, loaded.model).predict([[0.0] * FEATURE_COUNT])
+        return loaded, estimate_model_bytes(loaded.model)
+
+    def _enforce_budget(self, keep: str) -> None:
+        while self._resident_bytes > self._memory_budget_bytes:
+            victim = next((name for name in self._resident if name != keep), None)
+            if victim is None:
+                logger.warning(
+                    "Model %s alone exceeds the registry memory budget of %d bytes",
+                    keep,
+                    self._memory_budget_bytes,
+                )
+                return
+            self.unload(victim)
+
+    def unload(self, name: str) -> None:
+        resident = self._resident.pop(name, None)
+        if resident is None:
+            return
+        # Requests already holding the model keep it alive until they finish.
+        self._resident_bytes -= resident.memory_bytes
+        registry_unloads_counter.inc()
+        logger.info("Unloaded model name=%s bytes=%d", name, resident.memory_bytes)
+
+    async def predict(self, name: str, features: list[float]) -> Prediction:
+        loaded = await self.get(name)
+        outputs = await asyncio.to_thread(cast(PredictModel, loaded.model).predict, [features])
+        return Prediction(float(outputs[0]), loaded.version)
+
+
+model_registry = ModelRegistry(
+    settings.model_registry_dir,
+    memory_budget_bytes=settings.model_registry_memory_budget_mb * 1024 * 1024,
+)
+
+metrics_registry.gauge(
+    "model_registry_resident_bytes",
+    "Estimated memory held by models resident in the registry",
+    callback=lambda: model_registry.resident_bytes,
+)
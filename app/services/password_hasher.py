@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import os
+import sys
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from threading import Lock
+from typing import TypeVar
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.password_hashing import check_password, hash_password
+from app.services.admission import AdmissionController
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+hash_wait_histogram = registry.histogram(
+    "password_hash_queue_wait_seconds",
+    "Time a password operation waited for a hashing slot",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+hash_task_histogram = registry.histogram(
+    "password_hash_seconds",
+    "Time spent hashing or verifying a password once it had a slot",
+    labelnames=("operation",),
+    buckets=(0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.5),
+)
+hash_pool_restarts_counter = registry.counter(
+    "password_hash_pool_restarts_total", "Password hashing worker pool restarts"
+)
+hash_rejections_counter = registry.counter(
+    "password_hash_rejections_total",
+    "Password operations shed because the queue was full",
+    labelnames=("reason",),
+)
+
+
+class PasswordHasher:
+    # bcrypt is deliberately CPU-heavy, so it runs in its own small process pool
+    # behind a concurrency cap; a login burst then queues here instead of holding
+    # the GIL and the threadpool slots that the rest of the API depends on.
+    def __init__(
+        self,
+        pool_size: int | None,
+        max_concurrency: int | None,
+        max_queue: int | None = None,
+        web_workers: int = 1,
+    ) -> None:
+        # Every web worker runs its own pool, so by default they split the CPUs.
+        if pool_size is None:
+            pool_size = max((os.cpu_count() or 1) // max(web_workers, 1), 1)
+        self._pool_size = pool_size
+        # By default only as many operations as there are workers are handed to the
+        # pool, so the backlog stays here where it is measured.
+        self._max_concurrency = max(max_concurrency or self._pool_size, 1)
+        # Logins and sign-ups queue here, and are shed with a Retry-After estimate
+        # once max_queue are already waiting (None leaves the queue unbounded).
+        self._admission = AdmissionController(
+            self._max_concurrency,
+            sys.maxsize if max_queue is None else max_queue,
+            rejections=hash_rejections_counter,
+            wait_seconds=hash_wait_histogram,
+        )
+        self._lock = Lock()
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    @property
+    def queue_depth(self) -> int:
+        return self._admission.queue_depth
+
+    @property
+    def in_flight(self) -> int:
+        return self._admission.in_flight
+
+    def start(self) -> None:
+        if self._pool_size < 1:
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+        logger.info("Password hashing pool started workers=%d", self._pool_size)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self._pool_size, mp_context=get_context("spawn"))
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = self._create_executor()
+        hash_pool_restarts_counter.inc()
+        logger.warning("Restarting password hashing pool after a worker crash")
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    async def hash(self, password: str, shed_load: bool = True) -> str:
+        return await self._run("hash", hash_password, password, shed_load=shed_load)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run("verify", check_password, password, hashed_password)
+
+    async def _run(
+        self, operation: str, func: Callable[..., T], *args: str, shed_load: bool = True
+    ) -> T:
+        loop = asyncio.get_running_loop()
+        async with self._admission.admit(shed=shed_load):
+            started = loop.time()
+            try:
+                return await self._dispatch(func, *args)
+            finally:
+                hash_task_histogram.observe(loop.time() - started, operation=operation)
+
+    async def _dispatch(self, func: Callable[..., T], *args: str) -> T:
+        executor = self._executor
+        if executor is None:
+            # No pool (tests, scripts or PASSWORD_HASH_POOL_SIZE=0): the concurrency
+            # cap still applies, but the work runs on the default threadpool.
+            return await asyncio.to_thread(func, *args)
+        try:
+            return await asyncio.wrap_future(executor.submit(func, *args))
+        except BrokenProcessPool:
+            self._restart(executor)
+        retry = self._executor
+        if retry is None:
+            return await asyncio.to_thread(func, *args)
+        return await asyncio.wrap_future(retry.submit(func, *args))
+
+
+password_hasher = PasswordHasher(
+    pool_size=settings.password_hash_pool_size,
+    max_concurrency=settings.password_hash_max_concurrency,
+    max_queue=settings.password_hash_max_queue,
+    web_workers=settings.web_workers,
+)
+
+registry.gauge(
+    "password_hash_queue_depth",
+    "Password operations waiting for a hashing slot",
+    callback=lambda: password_hasher.queue_depth,
+)
+registry.gauge(
+    "password_hash_in_flight",
+    "Password operations currently being hashed or verified",
+    callback=lambda: password_hasher.in_flight,
+)
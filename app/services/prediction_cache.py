@@ -0,0 +1,106 @@
+import hashlib
+import logging
+import struct
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.cache import TTLCache, cache_hits_counter, cache_misses_counter
+
+logger = logging.getLogger(__name__)
+
+CACHE_NAME = "prediction"
+
+
+def cache_key(features: list[float], model_version: str) -> str:
+    # Adding 0.0 folds -0.0 into 0.0 so equal vectors always hash the same.
+    packed = struct.pack(f"<{len(features)}d", *(float(value) + 0.0 for value in features))
+    return hashlib.sha256(model_version.encode() + b"\0" + packed).hexdigest()
+
+
+class PredictionCache:
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        redis_url: str | None = None,
+        redis_prefix: str = "predcache",
+    ) -> None:
+        self._local: TTLCache[str, float] = TTLCache(CACHE_NAME, max_entries, ttl_seconds)
+        self._ttl_seconds = ttl_seconds
+        self._model_version: str | None = None
+        self._redis_url = redis_url
+        self._redis_prefix = redis_prefix
+        self._redis_client: Redis | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._local.enabled or self._redis_url is not None
+
+    async def start(self) -> None:
+        if self._redis_url is None or self._redis_client is not None:
+            return
+        try:
+            self._redis_client = Redis.from_url(
+                self._redis_url, encoding="utf-8", decode_responses=True
+            )
+            await self._redis_client.ping()
+            logger.info("Prediction cache Redis tier enabled")
+        except RedisError:
+            logger.exception("Unable to connect to prediction cache Redis; using local tier only")
+            if self._redis_client is not None:
+                await self._redis_client.aclose()
+            self._redis_client = None
+
+    async def stop(self) -> None:
+        if self._redis_client is not None:
+            await self._redis_client.aclose()
+            self._redis_client = None
+
+    def _sync_model_version(self, model_version: str) -> None:
+        # Keys embed the version, so stale entries can never be served; clearing just
+        # releases their memory as soon as a new model is observed.
+        if self._model_version != model_version:
+            if self._model_version is not None:
+                self._local.clear()
+            self._model_version = model_version
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self._redis_prefix}:{key}"
+
+    async def get(self, features: list[float], model_version: str) -> float | None:
+        self._sync_model_version(model_version)
+        key = cache_key(features, model_version)
+        value = self._local.get(key)
+        if value is not None or self._redis_client is None:
+            return value
+
+        try:
+            raw = await self._redis_client.get(self._redis_key(key))
+        except RedisError:
+            logger.warning("Prediction cache Redis lookup failed", exc_info=True)
+            raw = None
+        if raw is None:
+            cache_misses_counter.inc(cache=CACHE_NAME, tier="redis")
+            return None
+
+        cache_hits_counter.inc(cache=CACHE_NAME, tier="redis")
+        value = float(raw)
+        self._local.set(key, value)
+        return value
+
+    async def set(self, features: list[float], model_version: str, value: float) -> None:
+        # A result computed by a model that has since been replaced is not worth storing.
+        if self._model_version is not None and model_version != self._model_version:
+            return
+        self._sync_model_version(model_version)
+        key = cache_key(features, model_version)
+        self._local.set(key, value)
+        if self._redis_client is None:
+            return
+        try:
+            await self._redis_client.set(
+                self._redis_key(key), repr(value), ex=max(int(self._ttl_seconds), 1)
+            )
+        except RedisError:
+            logger.warning("Prediction cache Redis write failed", exc_info=True)
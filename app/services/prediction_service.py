@@ -1,28 +1,246 @@
+import asyncio
+import dataclasses
+import logging
+import os
+import signal
+from contextlib import suppress
 from threading import Lock
-from typing import Protocol, cast
+from typing import NamedTuple, Protocol, cast
+
+import numpy as np
+from numpy.typing import NDArray
 
 from app.core.config import settings
-from app.ml.model_loader import load_model
+from app.ml.model_loader import LoadedModel, artifact_fingerprint, load_model_artifact
+from app.schemas.predict import FEATURE_COUNT
+from app.services.inference_pool import InferencePool
+from app.services.micro_batcher import MicroBatcher
+from app.services.prediction_cache import PredictionCache
+
+logger = logging.getLogger(__name__)
 
 
 class PredictModel(Protocol):
     def predict(self, features_batch: list[list[float]]) -> list[float]: ...
 
 
+class VectorizedPredictModel(PredictModel, Protocol):
+    def predict_array(self, features: NDArray[np.floating]) -> NDArray[np.floating]: ...
+
+
+class Prediction(NamedTuple):
+    value: float
+    model_version: str
+
+
+class MatrixPrediction(NamedTuple):
+    values: NDArray[np.float64]
+    model_version: str
+
+
+class ModelReload(NamedTuple):
+    previous_version: str
+    model_version: str
+    reloaded: bool
+
+
 _model_lock = Lock()
-_model: PredictModel | None = None
+_reload_lock = Lock()
+_active: LoadedModel | None = None
+_inference_pool: InferencePool | None = None
+_watch_task: asyncio.Task[None] | None = None
+# Set in app.prefork workers, where the master owns the model.
+_reload_master_pid: int | None = None
+
+
+def _load_and_warm(path: str) -> LoadedModel:
+    loaded = load_model_artifact(path)
+    # Run one throwaway prediction so lazy initialisation happens before traffic arrives.
+    cast(PredictModel, loaded.model).predict([[0.0] * FEATURE_COUNT])
+    return loaded
 
 
 def preload_model() -> None:
-    global _model
-    if _model is None:
+    global _active
+    if _active is None:
         with _model_lock:
-            if _model is None:
-                _model = cast(PredictModel, load_model(settings.model_path))
+            if _active is None:
+                _active = _load_and_warm(settings.model_path)
 
 
-def predict(features: list[float]) -> float:
+def active_model() -> LoadedModel:
     preload_model()
-    assert _model is not None
-    prediction = _model.predict([features])
-    return float(prediction[0])
+    assert _active is not None
+    return _active
+
+
+def model_version() -> str:
+    return active_model().version
+
+
+def reload_model(force: bool = False) -> ModelReload:
+    global _active
+    with _reload_lock:
+        current = active_model()
+        path = settings.model_path
+        if not force and artifact_fingerprint(path) == current.fingerprint:
+            return ModelReload(current.version, current.version, reloaded=False)
+
+        candidate = _load_and_warm(path)
+        if candidate.version == current.version:
+            # Same bytes under a new inode or mtime: keep serving the warm instance.
+            _active = dataclasses.replace(current, fingerprint=candidate.fingerprint)
+            return ModelReload(current.version, current.version, reloaded=False)
+
+        # Callers already holding `current` finish on it; new calls see the new handle.
+        _active = candidate
+        if _inference_pool is not None:
+            _inference_pool.recycle()
+
+    logger.info("Model reloaded previous_version=%s version=%s", current.version, candidate.version)
+    return ModelReload(current.version, candidate.version, reloaded=True)
+
+
+def forward_reloads_to(master_pid: int) -> None:
+    global _reload_master_pid
+    _reload_master_pid = master_pid
+
+
+def request_master_reload() -> bool:
+    # The master reloads the model and then replaces every worker, so all of them
+    # switch versions together; returns False when there is no master to ask.
+    if _reload_master_pid is None:
+        return False
+    os.kill(_reload_master_pid, signal.SIGHUP)
+    return True
+
+
+async def reload_model_async(force: bool = False) -> ModelReload:
+    return await asyncio.to_thread(reload_model, force)
+
+
+async def _watch_model_artifact(interval_seconds: float) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await reload_model_async()
+        except Exception:  # noqa: BLE001
+            logger.exception(
+                "Model reload from %s failed; still serving version %s",
+                settings.model_path,
+                model_version(),
+            )
+
+
+def _predict_with(loaded: LoadedModel, features_batch: list[list[float]]) -> list[Prediction]:
+    outputs = cast(PredictModel, loaded.model).predict(features_batch)
+    return [Prediction(float(value), loaded.version) for value in outputs]
+
+
+def predict_batch(features_batch: list[list[float]]) -> list[Prediction]:
+    return _predict_with(active_model(), features_batch)
+
+
+def predict(features: list[float]) -> Prediction:
+    return predict_batch([features])[0]
+
+
+async def predict_batch_async(features_batch: list[list[float]]) -> list[Prediction]:
+    if _inference_pool is not None:
+        # Labelled with the version the worker ran, not the one this process holds.
+        outputs, version = await _inference_pool.predict_batch(features_batch)
+        return [Prediction(value, version) for value in outputs]
+    return await asyncio.to_thread(_predict_rows, features_batch)
+
+
+def _predict_array_with(loaded: LoadedModel, features: NDArray[np.floating]) -> NDArray[np.float64]:
+    model = loaded.model
+    if hasattr(model, "predict_array"):
+        outputs = cast(VectorizedPredictModel, model).predict_array(features)
+        return np.asarray(outputs, dtype=np.float64).reshape(-1)
+    return np.asarray(cast(PredictModel, model).predict(features.tolist()), dtype=np.float64)
+
+
+def _predict_rows(features_batch: list[list[float]]) -> list[Prediction]:
+    loaded = active_model()
+    outputs = _predict_array_with(loaded, np.array(features_batch, dtype=np.float64))
+    return [Prediction(value, loaded.version) for value in outputs.tolist()]
+
+
+def predict_matrix(features: NDArray[np.floating]) -> MatrixPrediction:
+    loaded = active_model()
+    return MatrixPrediction(_predict_array_with(loaded, features), loaded.version)
+
+
+async def predict_matrix_async(features: NDArray[np.floating]) -> MatrixPrediction:
+    if _inference_pool is not None:
+        # Sent in the request's own dtype so float32 bodies are not widened; pickling
+        # to the worker is the one copy left.
+        features = np.ascontiguousarray(features)
+        packed = await _inference_pool.predict_packed(
+            features.tobytes(), features.shape[1], features.dtype.str
+        )
+        return MatrixPrediction(np.frombuffer(packed.values, dtype="<f8"), packed.model_version)
+    return await asyncio.to_thread(predict_matrix, features)
+
+
+_batcher: MicroBatcher[Prediction] = MicroBatcher(
+    predict_batch_async,
+    max_batch_size=settings.predict_batch_max_size,
+    max_wait_ms=settings.predict_batch_max_wait_ms,
+)
+_cache = PredictionCache(
+    max_entries=settings.prediction_cache_max_entries,
+    ttl_seconds=settings.prediction_cache_ttl_seconds,
+    redis_url=settings.prediction_cache_redis_url,
+)
+
+
+async def start_inference() -> None:
+    global _inference_pool, _watch_task
+    if settings.inference_backend == "process" and _inference_pool is None:
+        pool = InferencePool(
+            settings.model_path,
+            size=settings.inference_pool_size,
+            task_timeout_seconds=settings.inference_task_timeout_seconds,
+            max_restarts=settings.inference_max_restarts,
+            web_workers=settings.web_workers,
+        )
+        await asyncio.to_thread(pool.start)
+        _inference_pool = pool
+    await _cache.start()
+    # One batch per inference process; threads share the default executor.
+    await _batcher.start(
+        _inference_pool.size if _inference_pool is not None else os.cpu_count() or 1
+    )
+    if settings.model_reload_interval_seconds > 0 and _watch_task is None:
+        _watch_task = asyncio.create_task(
+            _watch_model_artifact(settings.model_reload_interval_seconds)
+        )
+
+
+async def stop_inference() -> None:
+    global _inference_pool, _watch_task
+    if _watch_task is not None:
+        _watch_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await _watch_task
+        _watch_task = None
+    await _batcher.stop()
+    await _cache.stop()
+    if _inference_pool is not None:
+        pool, _inference_pool = _inference_pool, None
+        await asyncio.to_thread(pool.shutdown)
+
+
+async def predict_async(features: list[float]) -> Prediction:
+    if not _cache.enabled:
+        return await _batcher.submit(features)
+
+    version = model_version()
+    cached = await _cache.get(features, version)
+    if cached is not None:
+        return Prediction(cached, version)
+    prediction = await _batcher.submit(features)
+    await _cache.set(features, prediction.model_version, prediction.value)
+    return prediction
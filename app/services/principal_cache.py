@@ -0,0 +1,253 @@
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from collections.abc import Iterable
+from contextlib import suppress
+from itertools import chain
+
+from pydantic import ValidationError
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.orm import Session, UOWTransaction
+
+from app.core.cache import TTLCache, cache_hits_counter, cache_misses_counter
+from app.core.config import settings
+from app.core.security import decode_access_token_claims
+from app.db.models.user import User
+from app.schemas.user import UserRead
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_CACHE_NAME = "principal"
+TOKEN_CACHE_NAME = "access_token"
+_CHANGED_USERS_KEY = "principal_cache_changed_user_ids"
+
+
+def _token_key(token: str) -> bytes:
+    # Keep digests rather than bearer tokens resident in memory.
+    return hashlib.sha256(token.encode()).digest()
+
+
+class PrincipalCache:
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        redis_url: str | None = None,
+        redis_prefix: str = "principal",
+    ) -> None:
+        self._principals: TTLCache[int, UserRead] = TTLCache(
+            PRINCIPAL_CACHE_NAME, max_entries, ttl_seconds
+        )
+        self._tokens: TTLCache[bytes, int] = TTLCache(TOKEN_CACHE_NAME, max_entries, ttl_seconds)
+        self._ttl_seconds = ttl_seconds
+        self._redis_url = redis_url
+        self._redis_prefix = redis_prefix
+        self._redis_client: Redis | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._background: set[asyncio.Task[None]] = set()
+        self._listener: asyncio.Task[None] | None = None
+        self._subscribed = asyncio.Event()
+
+    @property
+    def _channel(self) -> str:
+        return f"{self._redis_prefix}:invalidate"
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        if self._redis_url is None or self._redis_client is not None:
+            return
+        try:
+            self._redis_client = Redis.from_url(
+                self._redis_url, encoding="utf-8", decode_responses=True
+            )
+            await self._redis_client.ping()
+            logger.info("Principal cache Redis tier enabled")
+            self._subscribed = asyncio.Event()
+            self._listener = asyncio.create_task(self._listen(self._redis_client))
+        except RedisError:
+            logger.exception("Unable to connect to principal cache Redis; using local tier only")
+            if self._redis_client is not None:
+                await self._redis_client.aclose()
+            self._redis_client = None
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._listener
+            self._listener = None
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        if self._redis_client is not None:
+            await self._redis_client.aclose()
+            self._redis_client = None
+        self._loop = None
+
+    def _redis_key(self, user_id: int) -> str:
+        return f"{self._redis_prefix}:{user_id}"
+
+    def subject_for_token(self, token: str) -> int | None:
+        # A verified token maps to its user id until it expires, so hot tokens skip
+        # the HMAC check. Tokens that fail verification are never cached.
+        key = _token_key(token)
+        user_id = self._tokens.get(key)
+        if user_id is not None:
+            return user_id
+
+        claims = decode_access_token_claims(token)
+        if claims is None:
+            return None
+        subject = claims.get("sub")
+        if not isinstance(subject, str) or not subject.isdigit():
+            return None
+        user_id = int(subject)
+
+        expires_at = claims.get("exp")
+        ttl = None
+        if isinstance(expires_at, int | float):
+            ttl = expires_at - time.time()
+        self._tokens.set(key, user_id, ttl_seconds=ttl)
+        return user_id
+
+    async def get(self, user_id: int) -> UserRead | None:
+        principal = self._principals.get(user_id)
+        if principal is not None or self._redis_client is None:
+            return principal
+
+        try:
+            raw = await self._redis_client.get(self._redis_key(user_id))
+        except RedisError:
+            logger.warning("Principal cache Redis lookup failed", exc_info=True)
+            raw = None
+        principal = None
+        if raw is not None:
+            try:
+                principal = UserRead.model_validate_json(raw)
+            except ValidationError:
+                logger.warning("Discarding malformed principal cache entry user_id=%d", user_id)
+        if principal is None:
+            cache_misses_counter.inc(cache=PRINCIPAL_CACHE_NAME, tier="redis")
+            return None
+
+        cache_hits_counter.inc(cache=PRINCIPAL_CACHE_NAME, tier="redis")
+        self._principals.set(user_id, principal)
+        return principal
+
+    async def set(self, principal: UserRead) -> None:
+        self._principals.set(principal.id, principal)
+        if self._redis_client is None:
+            return
+        try:
+            await self._redis_client.set(
+                self._redis_key(principal.id),
+                principal.model_dump_json(),
+                ex=max(int(self._ttl_seconds), 1),
+            )
+        except RedisError:
+            logger.warning("Principal cache Redis write failed", exc_info=True)
+
+    async def invalidate(self, user_id: int) -> None:
+        self._principals.delete(user_id)
+        await self._delete_remote([user_id])
+
+    def invalidate_nowait(self, user_ids: Iterable[int]) -> None:
+        # Safe to call from any thread: the local tier is dropped immediately and the
+        # shared tier is cleared on the event loop the cache was started on.
+        user_ids = list(user_ids)
+        for user_id in user_ids:
+            self._principals.delete(user_id)
+        loop = self._loop
+        if self._redis_client is None or loop is None or not user_ids or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._schedule_remote_delete, user_ids)
+
+    def _schedule_remote_delete(self, user_ids: list[int]) -> None:
+        task = asyncio.create_task(self._delete_remote(user_ids))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _delete_remote(self, user_ids: list[int]) -> None:
+        if self._redis_client is None:
+            return
+        try:
+            async with self._redis_client.pipeline(transaction=False) as pipe:
+                pipe.delete(*(self._redis_key(user_id) for user_id in user_ids))
+                # Every process, this one included, drops the ids from its local tier.
+                pipe.publish(self._channel, ",".join(map(str, user_ids)))
+                await pipe.execute()
+        except RedisError:
+            logger.warning("Principal cache Redis invalidation failed", exc_info=True)
+
+    async def wait_subscribed(self) -> None:
+        await self._subscribed.wait()
+
+    async def _listen(self, client: Redis) -> None:
+        delay = 0.1
+        while True:
+            pubsub = client.pubsub()
+            try:
+                await pubsub.subscribe(self._channel)
+                if self._subscribed.is_set():
+                    # Invalidations published while we were disconnected are lost.
+                    logger.info("Principal cache invalidation channel restored")
+                    self._principals.clear()
+                self._subscribed.set()
+                delay = 0.1
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=None)
+                    data = message.get("data") if message is not None else None
+                    if isinstance(data, str):
+                        for user_id in data.split(","):
+                            if user_id.isdigit():
+                                self._principals.delete(int(user_id))
+            except RedisError:
+                task = asyncio.current_task()
+                if task is not None and task.cancelling():
+                    raise asyncio.CancelledError from None
+                logger.warning(
+                    "Principal cache invalidation channel lost; retrying in %.2fs",
+                    delay,
+                    exc_info=True,
+                )
+            finally:
+                with suppress(RedisError):
+                    await pubsub.aclose()
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            delay = min(delay * 2, 5.0)
+
+    def clear(self) -> None:
+        self._principals.clear()
+        self._tokens.clear()
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.principal_cache_max_entries,
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+    redis_url=settings.principal_cache_redis_url,
+)
+
+
+# Any ORM change to a user, from any session, evicts its cached principal once the
+# transaction commits. Bulk UPDATE/DELETE statements bypass the unit of work, so
+# callers issuing them must call `principal_cache.invalidate()` themselves.
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session: Session, _flush_context: UOWTransaction) -> None:
+    changed = [obj.id for obj in chain(session.dirty, session.deleted) if isinstance(obj, User)]
+    if changed:
+        session.info.setdefault(_CHANGED_USERS_KEY, set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session) -> None:
+    changed = session.info.pop(_CHANGED_USERS_KEY, None)
+    if changed:
+        principal_cache.invalidate_nowait(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session: Session) -> None:
+    session.info.pop(_CHANGED_USERS_KEY, None)
@@ -0,0 +1,27 @@
+import json
+from datetime import UTC, datetime
+
+import msgpack
+
+# Events are rendered once, when the hub receives them, and every subscriber is handed
+# the same immutable frame; per-subscriber delivery never touches JSON.
+KEEP_ALIVE_FRAME = b": keep-alive\n\n"
+
+# Opt-in WebSocket subprotocol: the same events as MessagePack binary frames.
+MSGPACK_SUBPROTOCOL = "realtime.msgpack.v1"
+
+_CONNECTED_MESSAGE = '{{"type": "connected", "user_id": {user_id}, "timestamp": "{timestamp}"}}'
+
+
+def sse_frame(event_name: str, data: str, event_id: str | None = None) -> bytes:
+    # `data` must be a single line, which json.dumps output always is.
+    id_line = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{id_line}event: {event_name}\ndata: {data}\n\n".encode()
+
+
+def msgpack_frame(data: str) -> bytes:
+    return msgpack.packb(json.loads(data))
+
+
+def connected_message(user_id: int) -> str:
+    return _CONNECTED_MESSAGE.format(user_id=user_id, timestamp=datetime.now(UTC).isoformat())
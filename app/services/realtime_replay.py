@@ -0,0 +1,114 @@
+import re
+import secrets
+import time
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from itertools import islice
+
+from app.services.realtime_frames import msgpack_frame, sse_frame
+
+# Redis Stream IDs ("<ms>-<seq>") or IDs assigned in-process ("<ms>-<seq>-<nonce>").
+_EVENT_ID = re.compile(r"^[0-9]{1,20}-[0-9]{1,20}(-[0-9a-f]{8})?$")
+
+
+def is_event_id(value: str) -> bool:
+    return _EVENT_ID.match(value) is not None
+
+
+@dataclass(frozen=True, slots=True)
+class RealtimeEvent:
+    id: str
+    topic: str
+    # The JSON payload, which is also the WebSocket text frame.
+    data: str
+    sse_frame: bytes = field(init=False, repr=False, compare=False)
+    _msgpack_frame: bytes | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "sse_frame", sse_frame("message", self.data, self.id))
+
+    @property
+    def msgpack_frame(self) -> bytes:
+        # Only encoded if a binary WebSocket subscriber receives the event, then shared.
+        if self._msgpack_frame is None:
+            object.__setattr__(self, "_msgpack_frame", msgpack_frame(self.data))
+        assert self._msgpack_frame is not None
+        return self._msgpack_frame
+
+
+class EventIds:
+    # "<milliseconds>-<sequence>-<nonce>", increasing for this generator even if the
+    # wall clock steps backwards. Pods publishing in the same millisecond would share
+    # the first two parts, so a random per-generator nonce keeps the IDs unique.
+    def __init__(self) -> None:
+        self._millis = 0
+        self._sequence = 0
+        self._nonce = secrets.token_hex(4)
+
+    def next(self) -> str:
+        millis = time.time_ns() // 1_000_000
+        if millis > self._millis:
+            self._millis, self._sequence = millis, 0
+        else:
+            self._sequence += 1
+        return f"{self._millis}-{self._sequence}-{self._nonce}"
+
+
+class ReplayLog:
+    # The most recent events this process delivered, in delivery order. A resume is
+    # only answered from memory when every requested topic was being received for the
+    # whole span since the client's last event; otherwise the caller has to look
+    # elsewhere or report a gap.
+    def __init__(self, size: int, complete: bool = True) -> None:
+        self._size = size
+        # True when every event passes through this process (no Redis fan-out), so
+        # the log covers every topic, subscribed or not.
+        self._complete = complete
+        self._entries: deque[tuple[int, RealtimeEvent]] = deque()
+        self._positions: dict[str, int] = {}
+        self._next_position = 0
+        self._tracked_since: dict[str, int] = {}
+
+    def record(self, event: RealtimeEvent) -> None:
+        if self._size == 0:
+            return
+        if len(self._entries) >= self._size:
+            position, evicted = self._entries.popleft()
+            if self._positions.get(evicted.id) == position:
+                del self._positions[evicted.id]
+        self._entries.append((self._next_position, event))
+        self._positions[event.id] = self._next_position
+        self._next_position += 1
+
+    def track(self, topic: str) -> None:
+        self._tracked_since.setdefault(topic, self._next_position)
+
+    def untrack(self, topic: str) -> None:
+        self._tracked_since.pop(topic, None)
+
+    def reset(self) -> None:
+        # Events may have been missed (e.g. the Redis subscription dropped), so
+        # nothing recorded so far can vouch for continuity.
+        self._entries.clear()
+        self._positions.clear()
+        for topic in self._tracked_since:
+            self._tracked_since[topic] = self._next_position
+
+    def after(self, event_id: str, topics: Iterable[str]) -> list[RealtimeEvent] | None:
+        position = self._positions.get(event_id)
+        if position is None:
+            return None
+        topics = set(topics)
+        if not self._complete and not all(self._covers(topic, position) for topic in topics):
+            return None
+        first = self._entries[0][0]
+        return [
+            event
+            for _, event in islice(self._entries, position - first + 1, None)
+            if event.topic in topics
+        ]
+
+    def _covers(self, topic: str, position: int) -> bool:
+        since = self._tracked_since.get(topic)
+        return since is not None and since <= position + 1
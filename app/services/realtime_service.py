@@ -3,154 +3,337 @@ import json
 import logging
 from collections.abc import Iterable
 from contextlib import suppress
+from typing import Literal
 
 from fastapi import WebSocket
-from redis.asyncio import Redis
 from redis.exceptions import RedisError
 
+from app.core.config import settings
+from app.core.metrics import registry
+from app.services.realtime_replay import EventIds, RealtimeEvent, ReplayLog, is_event_id
+from app.services.realtime_transport import RedisTransport
+
 logger = logging.getLogger(__name__)
 
+SlowConsumerPolicy = Literal["drop_oldest", "disconnect"]
+# Clients that do not ask for topics, and publishers that do not name one, use this.
+DEFAULT_TOPIC = "global"
+# "Try Again Later": the client fell too far behind and should reconnect.
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+dropped_messages_counter = registry.counter(
+    "realtime_dropped_messages_total",
+    "Realtime events discarded because a client's outbound queue was full",
+    labelnames=("transport",),
+)
+slow_consumer_disconnects_counter = registry.counter(
+    "realtime_slow_consumer_disconnects_total",
+    "WebSocket clients closed with 1013 for falling behind",
+)
+
+
+class _WebSocketClient:
+    # Each connection drains its own bounded queue from its own writer task, so a
+    # slow or stalled client only ever delays itself.
+    def __init__(
+        self, websocket: WebSocket, topics: tuple[str, ...], queue_size: int, binary: bool
+    ) -> None:
+        self.websocket = websocket
+        self.topics = topics
+        self.binary = binary
+        self.queue: asyncio.Queue[RealtimeEvent] = asyncio.Queue(maxsize=queue_size)
+        self.writer: asyncio.Task[None] | None = None
+        self.closing = False
+
 
 class RealtimeHub:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        queue_size: int = 100,
+        slow_consumer_policy: SlowConsumerPolicy = "drop_oldest",
+        replay_size: int = 1000,
+    ) -> None:
         self._lock = asyncio.Lock()
         self._next_subscriber_id = 0
-        self._sse_subscribers: dict[int, asyncio.Queue[str]] = {}
-        self._websocket_connections: set[WebSocket] = set()
+        self._queue_size = queue_size
+        self._slow_consumer_policy = slow_consumer_policy
+        self._sse_subscribers: dict[int, tuple[str, ...]] = {}
+        self._websocket_clients: dict[WebSocket, _WebSocketClient] = {}
+        # topic -> local subscribers, so an event only touches the connections that
+        # asked for its topic.
+        self._topic_sse: dict[str, dict[int, asyncio.Queue[RealtimeEvent]]] = {}
+        self._topic_websockets: dict[str, set[_WebSocketClient]] = {}
+        # Serializes reconciling Redis channel subscriptions with the index.
+        self._channel_lock = asyncio.Lock()
+        self._background: set[asyncio.Task[None]] = set()
+        self._ids = EventIds()
+        self._replay_size = replay_size
+        self._replay = ReplayLog(replay_size)
 
         self._redis_url: str | None = None
         self._redis_channel = "realtime:events"
-        self._redis_client: Redis | None = None
-        self._redis_pubsub_task: asyncio.Task[None] | None = None
+        self._redis_replay = False
+        self._transport: RedisTransport | None = None
 
-    def configure(self, redis_url: str | None, redis_channel: str) -> None:
+    def configure(
+        self, redis_url: str | None, redis_channel: str, redis_replay: bool = False
+    ) -> None:
         self._redis_url = redis_url or None
         self._redis_channel = redis_channel
+        self._redis_replay = redis_replay
 
     async def start(self) -> None:
         if self._redis_url is None:
             return
 
+        async with self._lock:
+            topics = set(self._topic_sse) | set(self._topic_websockets)
+        # With Redis fan-out this process only sees the topics it subscribes to, so
+        # its replay log vouches for a topic only while it is subscribed.
+        replay = ReplayLog(self._replay_size, complete=False)
+        transport = RedisTransport(
+            self._redis_url,
+            [self._topic_channel(topic) for topic in topics],
+            self._deliver,
+            replay_key=f"{self._redis_channel}:replay" if self._redis_replay else None,
+            replay_size=self._replay_size,
+            on_resubscribe=replay.reset,
+        )
         try:
-            self._redis_client = Redis.from_url(
-                self._redis_url,
-                encoding="utf-8",
-                decode_responses=True,
-            )
-            await self._redis_client.ping()
-            self._redis_pubsub_task = asyncio.create_task(self._consume_redis_pubsub())
-            logger.info("Realtime Redis backend enabled channel=%s", self._redis_channel)
+            await transport.start()
         except RedisError:
             logger.exception(
                 "Unable to connect to Redis backend; "
                 "falling back to in-process realtime broadcasting"
             )
-            if self._redis_client is not None:
-                await self._redis_client.aclose()
-            self._redis_client = None
+            return
+        for topic in topics:
+            replay.track(topic)
+        self._replay = replay
+        self._transport = transport
+        logger.info("Realtime Redis backend enabled channel_prefix=%s", self._redis_channel)
 
     async def stop(self) -> None:
-        if self._redis_pubsub_task is not None:
-            self._redis_pubsub_task.cancel()
-            with suppress(asyncio.CancelledError):
-                await self._redis_pubsub_task
-            self._redis_pubsub_task = None
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
 
-        if self._redis_client is not None:
-            await self._redis_client.aclose()
-            self._redis_client = None
+        if self._transport is not None:
+            await self._transport.stop()
+            self._transport = None
 
-    async def register_sse(self) -> tuple[int, asyncio.Queue[str]]:
-        queue: asyncio.Queue[str] = asyncio.Queue(maxsize=100)
+    def _topic_channel(self, topic: str) -> str:
+        return f"{self._redis_channel}:{topic}"
+
+    def _channel_topic(self, channel: str) -> str:
+        return channel.removeprefix(f"{self._redis_channel}:")
+
+    def _is_subscribed_locally(self, topic: str) -> bool:
+        return topic in self._topic_sse or topic in self._topic_websockets
+
+    async def _sync_channels(self, topics: Iterable[str]) -> None:
+        # Each pod subscribes only to the topics its own clients follow. Reconciling
+        # against the index (rather than acting on each join/leave) keeps concurrent
+        # joins and leaves from leaving the Redis subscription out of step.
+        transport = self._transport
+        if transport is None:
+            return
+        async with self._channel_lock:
+            for topic in topics:
+                channel = self._topic_channel(topic)
+                wanted = self._is_subscribed_locally(topic)
+                if wanted and channel not in transport.channels:
+                    await transport.subscribe(channel)
+                    self._replay.track(topic)
+                elif not wanted and channel in transport.channels:
+                    self._replay.untrack(topic)
+                    await transport.unsubscribe(channel)
+
+    async def register_sse(
+        self, topics: Iterable[str] = (DEFAULT_TOPIC,)
+    ) -> tuple[int, asyncio.Queue[RealtimeEvent]]:
+        topics = tuple(dict.fromkeys(topics))
+        queue: asyncio.Queue[RealtimeEvent] = asyncio.Queue(maxsize=self._queue_size)
         async with self._lock:
             subscriber_id = self._next_subscriber_id
             self._next_subscriber_id += 1
-            self._sse_subscribers[subscriber_id] = queue
+            self._sse_subscribers[subscriber_id] = topics
+            for topic in topics:
+                self._topic_sse.setdefault(topic, {})[subscriber_id] = queue
+        await self._sync_channels(topics)
         return subscriber_id, queue
 
     async def unregister_sse(self, subscriber_id: int) -> None:
         async with self._lock:
-            self._sse_subscribers.pop(subscriber_id, None)
+            topics = self._sse_subscribers.pop(subscriber_id, ())
+            for topic in topics:
+                subscribers = self._topic_sse.get(topic, {})
+                subscribers.pop(subscriber_id, None)
+                if not subscribers:
+                    self._topic_sse.pop(topic, None)
+        await self._sync_channels(topics)
 
-    async def add_websocket(self, websocket: WebSocket) -> None:
+    async def add_websocket(
+        self, websocket: WebSocket, topics: Iterable[str] = (DEFAULT_TOPIC,), binary: bool = False
+    ) -> None:
+        client = _WebSocketClient(websocket, tuple(dict.fromkeys(topics)), self._queue_size, binary)
+        client.writer = asyncio.create_task(self._write_websocket(client))
         async with self._lock:
-            self._websocket_connections.add(websocket)
+            self._websocket_clients[websocket] = client
+            for topic in client.topics:
+                self._topic_websockets.setdefault(topic, set()).add(client)
+        await self._sync_channels(client.topics)
 
     async def remove_websocket(self, websocket: WebSocket) -> None:
         async with self._lock:
-            self._websocket_connections.discard(websocket)
+            client = self._forget_websocket(websocket)
+        if client is None:
+            return
+        await self._sync_channels(client.topics)
+        if client.writer is not None and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+            with suppress(asyncio.CancelledError):
+                await client.writer
 
-    async def broadcast(self, payload: dict[str, object]) -> None:
-        message = json.dumps(payload)
+    def _forget_websocket(self, websocket: WebSocket) -> _WebSocketClient | None:
+        client = self._websocket_clients.pop(websocket, None)
+        if client is None:
+            return None
+        for topic in client.topics:
+            subscribers = self._topic_websockets.get(topic, set())
+            subscribers.discard(client)
+            if not subscribers:
+                self._topic_websockets.pop(topic, None)
+        return client
 
-        if self._redis_client is not None:
+    async def _write_websocket(self, client: _WebSocketClient) -> None:
+        while True:
+            event = await client.queue.get()
             try:
-                await self._redis_client.publish(self._redis_channel, message)
+                if client.binary:
+                    await client.websocket.send_bytes(event.msgpack_frame)
+                else:
+                    await client.websocket.send_text(event.data)
+            except Exception:  # noqa: BLE001
+                # The connection is gone; its receive loop will unregister it.
+                logger.debug("Stopping writer for closed WebSocket", exc_info=True)
+                await self.remove_websocket(client.websocket)
                 return
+
+    async def broadcast(self, payload: dict[str, object], topic: str = DEFAULT_TOPIC) -> str:
+        message = json.dumps(payload)
+
+        if self._transport is not None:
+            try:
+                return await self._transport.publish(self._topic_channel(topic), message)
             except RedisError:
                 logger.exception(
                     "Failed to publish realtime event to Redis; using in-process fallback"
                 )
 
-        await self._broadcast_local(message)
-
-    async def _consume_redis_pubsub(self) -> None:
-        if self._redis_client is None:
-            return
+        event = RealtimeEvent(self._ids.next(), topic, message)
+        await self._deliver_events([event])
+        return event.id
 
-        pubsub = self._redis_client.pubsub()
-        try:
-            await pubsub.subscribe(self._redis_channel)
-            while True:
-                event = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-                if event is None:
-                    await asyncio.sleep(0.01)
-                    continue
-
-                message = event.get("data")
-                if not isinstance(message, str):
-                    continue
-
-                await self._broadcast_local(message)
-        finally:
-            await pubsub.unsubscribe(self._redis_channel)
-            await pubsub.aclose()
-
-    async def _broadcast_local(self, message: str) -> None:
+    async def replay(self, topics: Iterable[str], last_event_id: str) -> list[RealtimeEvent] | None:
+        # Events on `topics` after `last_event_id`, or None when neither the local
+        # log nor the Redis stream can prove nothing in between was lost.
+        topics = tuple(topics)
+        if not is_event_id(last_event_id):
+            return None
         async with self._lock:
-            sse_queues = list(self._sse_subscribers.values())
-            ws_connections = list(self._websocket_connections)
+            events = self._replay.after(last_event_id, topics)
+        if events is not None or self._transport is None:
+            return events
+
+        logged = await self._transport.replay(last_event_id)
+        if logged is None:
+            return None
+        wanted = set(topics)
+        return [
+            event
+            for event in (
+                RealtimeEvent(event_id, self._channel_topic(channel), message)
+                for channel, event_id, message in logged
+            )
+            if event.topic in wanted
+        ]
 
-        self._fan_out_sse(message, sse_queues)
+    async def _deliver(self, messages: list[tuple[str, str, str]]) -> None:
+        # Called with every message drained from Redis in one wakeup.
+        await self._deliver_events(
+            [
+                RealtimeEvent(event_id, self._channel_topic(channel), message)
+                for channel, event_id, message in messages
+            ]
+        )
 
-        stale_websockets: list[WebSocket] = []
-        for websocket in ws_connections:
-            try:
-                await websocket.send_text(message)
-            except RuntimeError:
-                stale_websockets.append(websocket)
+    async def _deliver_events(self, events: list[RealtimeEvent]) -> None:
+        async with self._lock:
+            targets = []
+            for event in events:
+                self._replay.record(event)
+                targets.append(
+                    (
+                        event,
+                        list(self._topic_sse.get(event.topic, {}).values()),
+                        list(self._topic_websockets.get(event.topic, ())),
+                    )
+                )
 
-        if stale_websockets:
-            async with self._lock:
-                for websocket in stale_websockets:
-                    self._websocket_connections.discard(websocket)
+        for event, sse_queues, ws_clients in targets:
+            self._fan_out_sse(event, sse_queues)
+            for client in ws_clients:
+                self._enqueue_websocket(client, event)
 
-    def _fan_out_sse(self, message: str, queues: Iterable[asyncio.Queue[str]]) -> None:
+    def _fan_out_sse(
+        self, event: RealtimeEvent, queues: Iterable[asyncio.Queue[RealtimeEvent]]
+    ) -> None:
         for queue in queues:
-            if queue.full():
-                with suppress(asyncio.QueueEmpty):
-                    queue.get_nowait()
-            try:
-                queue.put_nowait(message)
-            except asyncio.QueueFull:
-                continue
+            self._put_dropping_oldest(queue, event, "sse")
+
+    def _put_dropping_oldest(
+        self, queue: asyncio.Queue[RealtimeEvent], event: RealtimeEvent, transport: str
+    ) -> None:
+        if queue.full():
+            with suppress(asyncio.QueueEmpty):
+                queue.get_nowait()
+                dropped_messages_counter.inc(transport=transport)
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            dropped_messages_counter.inc(transport=transport)
+
+    def _enqueue_websocket(self, client: _WebSocketClient, event: RealtimeEvent) -> None:
+        if client.closing:
+            return
+        if not client.queue.full() or self._slow_consumer_policy == "drop_oldest":
+            self._put_dropping_oldest(client.queue, event, "websocket")
+            return
+        client.closing = True
+        task = asyncio.create_task(self._disconnect_slow_consumer(client))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _disconnect_slow_consumer(self, client: _WebSocketClient) -> None:
+        slow_consumer_disconnects_counter.inc()
+        logger.warning("Closing WebSocket that fell %d events behind", client.queue.qsize())
+        await self.remove_websocket(client.websocket)
+        # A stalled peer may never accept the close frame either.
+        with suppress(Exception):
+            async with asyncio.timeout(5):
+                await client.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE, reason="Slow consumer")
 
     async def counts(self) -> dict[str, int]:
         async with self._lock:
             return {
                 "sse_connections": len(self._sse_subscribers),
-                "ws_connections": len(self._websocket_connections),
+                "ws_connections": len(self._websocket_clients),
+                "topics": len(set(self._topic_sse) | set(self._topic_websockets)),
             }
 
 
-realtime_hub = RealtimeHub()
+realtime_hub = RealtimeHub(
+    queue_size=settings.realtime_client_queue_size,
+    slow_consumer_policy=settings.realtime_slow_consumer_policy,
+    replay_size=settings.realtime_replay_size,
+)
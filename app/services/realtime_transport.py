@@ -0,0 +1,278 @@
+import asyncio
+import logging
+import random
+from collections.abc import Awaitable, Callable, Iterable
+from contextlib import suppress
+
+from redis.asyncio import Redis
+from redis.asyncio.client import PubSub
+from redis.exceptions import RedisError
+
+from app.core.metrics import registry
+from app.services.realtime_replay import EventIds
+
+logger = logging.getLogger(__name__)
+
+# (channel, event id, message) triples, in the order Redis delivered them.
+MessageHandler = Callable[[list[tuple[str, str, str]]], Awaitable[None]]
+_Outgoing = tuple[str, str, asyncio.Future[str]]
+
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+# Appends the event to the replay stream and publishes it under the stream ID in one
+# atomic step, so the ID every subscriber sees is the one replay will resume from.
+_LOG_AND_PUBLISH = """
+local id = redis.call(
+    'XADD', KEYS[1], 'MAXLEN', '~', ARGV[1], '*', 'channel', ARGV[2], 'data', ARGV[3]
+)
+redis.call('PUBLISH', ARGV[2], id .. ' ' .. ARGV[3])
+return id
+"""
+
+publish_batch_histogram = registry.histogram(
+    "realtime_redis_publish_batch_size",
+    "PUBLISH commands sent per pipelined round trip",
+    buckets=BATCH_BUCKETS,
+)
+receive_batch_histogram = registry.histogram(
+    "realtime_redis_receive_batch_size",
+    "Pub/Sub messages drained per wakeup of the subscriber",
+    buckets=BATCH_BUCKETS,
+)
+reconnects_counter = registry.counter(
+    "realtime_redis_reconnects_total", "Times the realtime Redis subscription was re-established"
+)
+
+
+def redis_client(url: str) -> Redis:
+    return Redis.from_url(url, encoding="utf-8", decode_responses=True)
+
+
+def _raise_if_cancelling() -> None:
+    # redis-py can turn a cancellation that lands mid-command into a ConnectionError;
+    # without this check the loops below would swallow stop() and retry forever.
+    task = asyncio.current_task()
+    if task is not None and task.cancelling():
+        raise asyncio.CancelledError
+
+
+def _settle(batch: list[_Outgoing], outcome: RedisError | list[str]) -> None:
+    # `outcome` is either the error for the whole batch or each message's event id.
+    for index, (_, _, future) in enumerate(batch):
+        if future.done():
+            continue
+        if isinstance(outcome, RedisError):
+            future.set_exception(outcome)
+        else:
+            future.set_result(outcome[index])
+
+
+class RedisTransport:
+    # Publishes are queued and flushed as one pipeline per round trip, so concurrent
+    # publishers share RTTs instead of each paying one. The subscriber blocks on the
+    # socket and drains whatever has arrived in one go, and a lost connection is
+    # retried with exponential backoff and every current channel resubscribed.
+    # Messages travel as "<event id> <message>". With a replay key, events are also
+    # appended to a capped Redis Stream and take its IDs; otherwise the publishing
+    # process assigns them.
+    def __init__(
+        self,
+        url: str,
+        channels: Iterable[str],
+        on_messages: MessageHandler,
+        max_batch: int = 256,
+        backoff_initial_seconds: float = 0.1,
+        backoff_max_seconds: float = 5.0,
+        replay_key: str | None = None,
+        replay_size: int = 0,
+        on_resubscribe: Callable[[], None] | None = None,
+    ) -> None:
+        self._url = url
+        self._channels = set(channels)
+        self._on_messages = on_messages
+        self._replay_key = replay_key
+        self._replay_size = replay_size
+        self._on_resubscribe = on_resubscribe
+        self._ids = EventIds()
+        self._max_batch = max_batch
+        self._backoff_initial = backoff_initial_seconds
+        self._backoff_max = backoff_max_seconds
+        self._client: Redis | None = None
+        self._outbox: asyncio.Queue[_Outgoing] = asyncio.Queue()
+        self._tasks: list[asyncio.Task[None]] = []
+        self._subscribed = asyncio.Event()
+        # Serializes SUBSCRIBE/UNSUBSCRIBE with (re)connecting the Pub/Sub session.
+        self._subscription_lock = asyncio.Lock()
+        self._pubsub: PubSub | None = None
+        self._channels_added = asyncio.Event()
+
+    async def start(self) -> None:
+        client = redis_client(self._url)
+        try:
+            await client.ping()
+        except RedisError:
+            await client.aclose()
+            raise
+        self._client = client
+        self._outbox = asyncio.Queue()
+        self._subscribed = asyncio.Event()
+        self._subscription_lock = asyncio.Lock()
+        self._channels_added = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._consume(client)),
+            asyncio.create_task(self._publish_batches(client)),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
+        pending = []
+        while not self._outbox.empty():
+            pending.append(self._outbox.get_nowait())
+        _settle(pending, RedisError("Realtime transport stopped"))
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def wait_subscribed(self) -> None:
+        await self._subscribed.wait()
+
+    @property
+    def channels(self) -> frozenset[str]:
+        return frozenset(self._channels)
+
+    async def subscribe(self, channel: str) -> None:
+        async with self._subscription_lock:
+            self._channels.add(channel)
+            if self._pubsub is not None:
+                try:
+                    await self._pubsub.subscribe(channel)
+                except RedisError:
+                    # The consumer notices the broken connection and resubscribes.
+                    logger.warning("Realtime Redis SUBSCRIBE failed channel=%s", channel)
+        self._channels_added.set()
+
+    async def unsubscribe(self, channel: str) -> None:
+        async with self._subscription_lock:
+            self._channels.discard(channel)
+            if self._pubsub is not None and self._pubsub.connection is not None:
+                with suppress(RedisError):
+                    await self._pubsub.unsubscribe(channel)
+
+    async def replay(self, after_id: str) -> list[tuple[str, str, str]] | None:
+        # Everything logged after `after_id`, or None when the stream no longer holds
+        # it (trimmed, unknown, or not a stream ID at all).
+        # IDs with a nonce were assigned in-process and were never logged to the stream.
+        if self._client is None or self._replay_key is None or after_id.count("-") != 1:
+            return None
+        try:
+            entries = await self._client.xrange(self._replay_key, min=after_id)
+        except RedisError:
+            logger.warning("Realtime replay read failed after_id=%s", after_id, exc_info=True)
+            return None
+        if not entries or entries[0][0] != after_id:
+            return None
+        return [
+            (str(fields["channel"]), str(event_id), str(fields["data"]))
+            for event_id, fields in entries[1:]
+            if fields is not None
+        ]
+
+    async def publish(self, channel: str, message: str) -> str:
+        if self._client is None:
+            raise RedisError("Realtime transport is not running")
+        future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        self._outbox.put_nowait((channel, message, future))
+        return await future
+
+    async def _publish_batches(self, client: Redis) -> None:
+        while True:
+            batch = [await self._outbox.get()]
+            while len(batch) < self._max_batch and not self._outbox.empty():
+                batch.append(self._outbox.get_nowait())
+            publish_batch_histogram.observe(len(batch))
+
+            event_ids: list[str] = []
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    for channel, message, _ in batch:
+                        if self._replay_key is None:
+                            event_ids.append(self._ids.next())
+                            pipe.publish(channel, f"{event_ids[-1]} {message}")
+                        else:
+                            pipe.eval(
+                                _LOG_AND_PUBLISH,
+                                1,
+                                self._replay_key,
+                                self._replay_size,
+                                channel,
+                                message,
+                            )
+                    results = await pipe.execute()
+                if self._replay_key is not None:
+                    event_ids = [str(event_id) for event_id in results]
+            except RedisError as exc:
+                _settle(batch, exc)
+                _raise_if_cancelling()
+            except asyncio.CancelledError:
+                _settle(batch, RedisError("Realtime transport stopped"))
+                raise
+            else:
+                _settle(batch, event_ids)
+
+    async def _consume(self, client: Redis) -> None:
+        delay = self._backoff_initial
+        while True:
+            pubsub = client.pubsub()
+            try:
+                async with self._subscription_lock:
+                    self._pubsub = pubsub
+                    if self._channels:
+                        await pubsub.subscribe(*self._channels)
+                if not self._subscribed.is_set():
+                    self._subscribed.set()
+                else:
+                    reconnects_counter.inc()
+                    logger.info("Realtime Redis subscription restored")
+                    if self._on_resubscribe is not None:
+                        self._on_resubscribe()
+                delay = self._backoff_initial
+                while True:
+                    _raise_if_cancelling()
+                    if pubsub.connection is None or not pubsub.subscribed:
+                        # Nothing subscribed, so there is nothing to block on.
+                        self._channels_added.clear()
+                        await self._channels_added.wait()
+                        continue
+                    await self._drain(pubsub)
+            except RedisError:
+                _raise_if_cancelling()
+                logger.warning(
+                    "Realtime Redis subscription lost; retrying in %.2fs", delay, exc_info=True
+                )
+            finally:
+                self._pubsub = None
+                with suppress(RedisError):
+                    await pubsub.aclose()
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            delay = min(delay * 2, self._backoff_max)
+
+    async def _drain(self, pubsub: PubSub) -> None:
+        # Block until something arrives, then take everything already buffered.
+        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=None)
+        batch: list[tuple[str, str, str]] = []
+        while message is not None:
+            data = message.get("data")
+            if message.get("type") == "message" and isinstance(data, str):
+                event_id, _, data = data.partition(" ")
+                batch.append((message["channel"], event_id, data))
+            if len(batch) >= self._max_batch:
+                break
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0)
+        if batch:
+            receive_batch_histogram.observe(len(batch))
+            await self._on_messages(batch)
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import uuid
+from contextlib import suppress
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.security import (
+    create_access_token,
+    create_refresh_token,
+    decode_refresh_token_claims,
+)
+from app.db.models.refresh_token import RefreshToken
+from app.schemas.token import Token
+
+logger = logging.getLogger(__name__)
+
+_purge_task: asyncio.Task[None] | None = None
+
+
+def _new_token_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _add_refresh_token(db: AsyncSession, user_id: int, family_id: str) -> tuple[str, str]:
+    jti = _new_token_id()
+    expires_at = datetime.now(UTC) + timedelta(days=settings.refresh_token_expire_days)
+    db.add(RefreshToken(jti=jti, family_id=family_id, user_id=user_id, expires_at=expires_at))
+    return jti, create_refresh_token(str(user_id), jti, family_id, expires_at)
+
+
+async def issue_token_pair(db: AsyncSession, user_id: int) -> Token:
+    _, refresh_token = _add_refresh_token(db, user_id, family_id=_new_token_id())
+    await db.commit()
+    return Token(access_token=create_access_token(str(user_id)), refresh_token=refresh_token)
+
+
+async def _revoke_family(db: AsyncSession, family_id: str, now: datetime) -> None:
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+    )
+
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> Token | None:
+    # Signature and expiry are checked by the JWT itself; the only database work is a
+    # primary-key lookup plus the rotation writes. No password is involved.
+    claims = decode_refresh_token_claims(token)
+    if claims is None:
+        return None
+    jti, family_id, subject = claims.get("jti"), claims.get("fam"), claims.get("sub")
+    if not (isinstance(jti, str) and isinstance(family_id, str) and str(subject).isdigit()):
+        return None
+
+    stored = await db.get(RefreshToken, jti)
+    if stored is None or stored.family_id != family_id or str(stored.user_id) != subject:
+        return None
+
+    now = datetime.now(UTC)
+    new_jti, new_refresh_token = _add_refresh_token(db, stored.user_id, family_id)
+    # The conditional update makes rotation single-use even under concurrent refreshes.
+    rotated = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.jti == jti, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now, replaced_by=new_jti)
+        .execution_options(synchronize_session=False)
+    )
+    if rotated.rowcount != 1:  # type: ignore[attr-defined]
+        # A rotated or revoked token was presented again: assume it leaked and revoke
+        # every token descended from the same login.
+        await db.rollback()
+        await _revoke_family(db, family_id, now)
+        await db.commit()
+        logger.warning("Refresh token reuse detected user_id=%s family=%s", subject, family_id)
+        return None
+
+    await db.commit()
+    return Token(access_token=create_access_token(subject), refresh_token=new_refresh_token)
+
+
+async def revoke_refresh_token(db: AsyncSession, token: str) -> bool:
+    claims = decode_refresh_token_claims(token)
+    if claims is None or not isinstance(claims.get("fam"), str):
+        return False
+    await _revoke_family(db, claims["fam"], datetime.now(UTC))
+    await db.commit()
+    return True
+
+
+async def purge_expired_refresh_tokens(db: AsyncSession) -> int:
+    # An expired row can never be presented again, since its JWT expires with it.
+    result = await db.execute(
+        delete(RefreshToken)
+        .where(RefreshToken.expires_at < datetime.now(UTC))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return int(result.rowcount)  # type: ignore[attr-defined]
+
+
+async def _purge_periodically(
+    session_factory: async_sessionmaker[AsyncSession], interval_seconds: float
+) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with session_factory() as db:
+                purged = await purge_expired_refresh_tokens(db)
+        except Exception:  # noqa: BLE001
+            logger.exception("Purging expired refresh tokens failed")
+            continue
+        if purged:
+            logger.info("Purged expired refresh tokens count=%d", purged)
+
+
+def start_refresh_token_purge(session_factory: async_sessionmaker[AsyncSession]) -> None:
+    global _purge_task
+    interval = settings.refresh_token_purge_interval_seconds
+    if interval > 0 and _purge_task is None:
+        _purge_task = asyncio.create_task(_purge_periodically(session_factory, interval))
+
+
+async def stop_refresh_token_purge() -> None:
+    global _purge_task
+    if _purge_task is not None:
+        _purge_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await _purge_task
+        _purge_task = None
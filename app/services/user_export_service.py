@@ -0,0 +1,43 @@
+import csv
+import io
+from collections.abc import AsyncIterator, Sequence
+from typing import Any, Literal
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.user import User
+from app.services.bulk_io import encode_line
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_COLUMNS = ("id", "email")
+EXPORT_BATCH_SIZE = 1000
+
+
+def _encode_csv(rows: Sequence[Sequence[Any]], header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def export_users(db: AsyncSession, export_format: ExportFormat) -> AsyncIterator[bytes]:
+    # A single ordered query read through a server-side cursor: rows arrive from the
+    # database EXPORT_BATCH_SIZE at a time and each batch is written out before the
+    # next is fetched, so memory stays flat however many users there are.
+    stmt = (
+        select(User.id, User.email).order_by(User.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    result = await db.stream(stmt)
+    header = True
+    async for rows in result.partitions():
+        if export_format == "csv":
+            yield _encode_csv(rows, header)
+            header = False
+        else:
+            yield b"".join(encode_line(dict(zip(EXPORT_COLUMNS, row, strict=True))) for row in rows)
+    if header and export_format == "csv":
+        yield _encode_csv([], header)
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from typing import Any
+
+from pydantic import ValidationError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.password_hashing import pwd_context
+from app.db.models.user import User
+from app.schemas.user import UserImportRow
+from app.services.bulk_io import BulkInputError, RowError, encode_line
+from app.services.password_hasher import password_hasher
+
+logger = logging.getLogger(__name__)
+
+_INSERT_BUILDERS: dict[str, Any] = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _validate_row(row: object) -> UserImportRow:
+    if isinstance(row, RowError):
+        raise row
+    try:
+        parsed = UserImportRow.model_validate(row)
+    except ValidationError as exc:
+        error = exc.errors()[0]
+        location = ".".join(str(part) for part in error["loc"])
+        raise RowError(f"{location}: {error['msg']}" if location else error["msg"]) from exc
+    if parsed.hashed_password is not None and pwd_context.identify(parsed.hashed_password) is None:
+        raise RowError("hashed_password is not a supported password hash")
+    return parsed
+
+
+async def _hash_passwords(pending: list[tuple[int, UserImportRow]]) -> list[str | BaseException]:
+    # The hasher caps concurrency itself, so the whole chunk is submitted at once and
+    # spread over the worker processes. An import waits its turn instead of being shed.
+    async def credential(row: UserImportRow) -> str:
+        if row.hashed_password is not None:
+            return row.hashed_password
+        assert row.password is not None
+        return await password_hasher.hash(row.password, shed_load=False)
+
+    return await asyncio.gather(*(credential(row) for _, row in pending), return_exceptions=True)
+
+
+async def _insert_chunk(db: AsyncSession, pending: list[tuple[int, UserImportRow]]) -> bytes:
+    results: dict[int, dict[str, object]] = {}
+    values: list[dict[str, str]] = []
+    indexes_by_email: dict[str, int] = {}
+    for (index, row), credential in zip(pending, await _hash_passwords(pending), strict=True):
+        if isinstance(credential, BaseException):
+            results[index] = {"index": index, "error": "password could not be hashed"}
+        elif row.email in indexes_by_email:
+            results[index] = {"index": index, "status": "conflict"}
+        else:
+            indexes_by_email[row.email] = index
+            values.append({"email": row.email, "hashed_password": credential})
+    if values:
+        created = await _insert_values(db, values)
+        for email, index in indexes_by_email.items():
+            outcome = "created" if email in created else "conflict"
+            results[index] = {"index": index, "status": outcome}
+    return b"".join(encode_line(results[index]) for index in sorted(results))
+
+
+async def _insert_values(db: AsyncSession, values: list[dict[str, str]]) -> set[str]:
+    # One multi-row INSERT per chunk. Rows whose email already exists are skipped by
+    # the database instead of failing the statement, and RETURNING says which landed.
+    insert = _INSERT_BUILDERS[db.get_bind().dialect.name]
+    stmt = (
+        insert(User)
+        .values(values)
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User.email)
+    )
+    created = set((await db.scalars(stmt)).all())
+    await db.commit()
+    return created
+
+
+async def import_users(
+    db: AsyncSession, rows: AsyncIterator[object], chunk_size: int
+) -> AsyncIterator[bytes]:
+    dialect = db.get_bind().dialect.name
+    if dialect not in _INSERT_BUILDERS:
+        raise RuntimeError(f"Bulk user import is not supported on {dialect}")
+
+    pending: list[tuple[int, UserImportRow]] = []
+    index = 0
+    try:
+        async for row in rows:
+            try:
+                pending.append((index, _validate_row(row)))
+            except RowError as exc:
+                yield encode_line({"index": index, "error": str(exc)})
+            index += 1
+
+            if len(pending) >= chunk_size:
+                yield await _insert_chunk(db, pending)
+                pending = []
+    except BulkInputError as exc:
+        if pending:
+            yield await _insert_chunk(db, pending)
+        yield encode_line({"index": index, "error": str(exc), "fatal": True})
+        return
+
+    if pending:
+        yield await _insert_chunk(db, pending)
+    logger.info("Bulk user import finished rows=%d", index)
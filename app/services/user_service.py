@@ -1,8 +1,10 @@
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.security import get_password_hash, verify_password
 from app.db.models.user import User
+from app.services.password_hasher import password_hasher
 
 
 def get_user_by_email(db: Session, email: str) -> User | None:
@@ -29,3 +31,37 @@ def authenticate_user(db: Session, email: str, password: str) -> User | None:
     if not verify_password(password, user.hashed_password):
         return None
     return user
+
+
+async def get_user_by_email_async(db: AsyncSession, email: str) -> User | None:
+    return await db.scalar(select(User).where(User.email == email))
+
+
+async def get_user_async(db: AsyncSession, user_id: int) -> User | None:
+    return await db.get(User, user_id)
+
+
+async def list_users_async(db: AsyncSession, after_id: int | None, limit: int) -> list[User]:
+    # Keyset pagination: seeking past the last seen id on the primary key index costs
+    # the same on page 1000 as on page 1, unlike OFFSET.
+    stmt = select(User).order_by(User.id).limit(limit)
+    if after_id is not None:
+        stmt = stmt.where(User.id > after_id)
+    return list(await db.scalars(stmt))
+
+
+async def create_user_async(db: AsyncSession, email: str, password: str) -> User:
+    user = User(email=email, hashed_password=await password_hasher.hash(password))
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    return user
+
+
+async def authenticate_user_async(db: AsyncSession, email: str, password: str) -> User | None:
+    user = await get_user_by_email_async(db, email)
+    if user is None:
+        return None
+    if not await password_hasher.verify(password, user.hashed_password):
+        return None
+    return user
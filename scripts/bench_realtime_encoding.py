@@ -0,0 +1,88 @@
+import argparse
+import json
+import sys
+import time
+import zlib
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from app.services.realtime_frames import msgpack_frame
+
+# RFC 7692: with context takeover each message is compressed as a continuation of the
+# previous ones and the trailing empty block (00 00 ff ff) is stripped.
+DEFLATE_TAIL = b"\x00\x00\xff\xff"
+
+
+def sample_events(count: int) -> list[str]:
+    start = datetime(2026, 1, 1, tzinfo=UTC)
+    return [
+        json.dumps(
+            {
+                "type": "message",
+                "topic": "orders",
+                "user_id": 1000 + number % 50,
+                "message": f"order {number} moved to status {('paid', 'shipped')[number % 2]}",
+                "timestamp": (start + timedelta(milliseconds=number * 37)).isoformat(),
+            }
+        )
+        for number in range(count)
+    ]
+
+
+def deflate_stream() -> Callable[[bytes], bytes]:
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+
+    def compress(frame: bytes) -> bytes:
+        data = compressor.compress(frame) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        return data[: -len(DEFLATE_TAIL)] if data.endswith(DEFLATE_TAIL) else data
+
+    return compress
+
+
+def measure(events: list[str], encode: Callable[[str], bytes]) -> tuple[float, ...]:
+    # Encoding runs once per event and is shared by every subscriber; deflate runs on
+    # each connection's own stream, so its CPU is paid once per subscriber.
+    started = time.process_time()
+    frames = [encode(data) for data in events]
+    encode_seconds = time.process_time() - started
+
+    compress = deflate_stream()
+    started = time.process_time()
+    deflated = [compress(frame) for frame in frames]
+    deflate_seconds = time.process_time() - started
+
+    count = len(events)
+    return (
+        sum(map(len, frames)) / count,
+        sum(map(len, deflated)) / count,
+        encode_seconds / count * 1e6,
+        deflate_seconds / count * 1e6,
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare bytes on the wire and CPU per event for the WebSocket encodings."
+    )
+    parser.add_argument("--events", type=int, default=20_000)
+    args = parser.parse_args()
+
+    events = sample_events(args.events)
+    encodings: dict[str, Callable[[str], bytes]] = {
+        "json": str.encode,
+        "msgpack": msgpack_frame,
+    }
+    print(
+        f"{'encoding':<10} {'bytes':>8} {'deflated':>9} "
+        f"{'encode us (once)':>17} {'deflate us (per client)':>24}"
+    )
+    for name, encode in encodings.items():
+        size, deflated, encode_us, deflate_us = measure(events, encode)
+        print(f"{name:<10} {size:>8.1f} {deflated:>9.1f} {encode_us:>17.2f} {deflate_us:>24.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
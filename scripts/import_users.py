@@ -0,0 +1,54 @@
+import argparse
+import asyncio
+import json
+import sys
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, async_engine
+from app.services.bulk_io import iter_json_array_rows, iter_ndjson_rows
+from app.services.password_hasher import password_hasher
+from app.services.user_import_service import import_users
+
+READ_SIZE = 256 * 1024
+
+
+async def read_chunks(path: Path) -> AsyncIterator[bytes]:
+    with path.open("rb") as file:
+        while chunk := await asyncio.to_thread(file.read, READ_SIZE):
+            yield chunk
+
+
+async def run(path: Path, chunk_size: int) -> int:
+    iter_rows = iter_json_array_rows if path.suffix == ".json" else iter_ndjson_rows
+    outcomes: dict[str, int] = {}
+    await asyncio.to_thread(password_hasher.start)
+    try:
+        async with AsyncSessionLocal() as db:
+            async for lines in import_users(db, iter_rows(read_chunks(path)), chunk_size):
+                sys.stdout.buffer.write(lines)
+                for line in lines.splitlines():
+                    result = json.loads(line)
+                    outcome = result.get("status", "error")
+                    outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    finally:
+        await asyncio.to_thread(password_hasher.shutdown)
+        await async_engine.dispose()
+
+    summary = ", ".join(f"{outcome}={count}" for outcome, count in sorted(outcomes.items()))
+    print(summary or "no rows", file=sys.stderr)
+    return 1 if outcomes.get("error") else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import users from an NDJSON or JSON file")
+    parser.add_argument("path", type=Path, help=".ndjson/.jsonl (one user per line) or .json")
+    parser.add_argument("--chunk-size", type=int, default=settings.user_import_chunk_size)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.path, args.chunk_size)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,36 @@
-from collections.abc import Generator
+import os
+import tempfile
+from collections.abc import AsyncGenerator, Generator
+from pathlib import Path
 
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 from app.core.config import get_settings
 from app.db.base import Base
-from app.db.session import get_db
+from app.db.session import async_database_url, get_async_db, get_async_read_db, get_db
 from app.main import create_app
+from app.services.principal_cache import principal_cache
 from scripts.create_dummy_model import main as create_dummy_model
 
-SQLALCHEMY_DATABASE_URL = "sqlite+pysqlite:///:memory:"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
+# The sync and async engines must see the same database, so tests use a SQLite file
+# rather than a per-connection in-memory database.
+TEST_DATABASE_PATH = Path(tempfile.gettempdir()) / f"fastapi-template-tests-{os.getpid()}.db"
+SQLALCHEMY_DATABASE_URL = f"sqlite+pysqlite:///{TEST_DATABASE_PATH}"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Every TestClient runs its own event loop, so async connections are never pooled.
+async_engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 
 @pytest.fixture(autouse=True, scope="session")
@@ -26,6 +38,13 @@ def ensure_model_file() -> None:
     create_dummy_model()
 
 
+@pytest.fixture(autouse=True, scope="session")
+def remove_test_database() -> Generator[None, None, None]:
+    yield
+    engine.dispose()
+    TEST_DATABASE_PATH.unlink(missing_ok=True)
+
+
 @pytest.fixture
 def db_session() -> Generator[Session, None, None]:
     Base.metadata.create_all(bind=engine)
@@ -37,6 +56,11 @@ def db_session() -> Generator[Session, None, None]:
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture
+def primary_async_engine() -> AsyncEngine:
+    return async_engine
+
+
 @pytest.fixture
 def client(db_session: Session) -> Generator[TestClient, None, None]:
     app = create_app()
@@ -44,7 +68,15 @@ def client(db_session: Session) -> Generator[TestClient, None, None]:
     def override_get_db() -> Generator[Session, None, None]:
         yield db_session
 
+    async def override_get_async_db() -> AsyncGenerator[AsyncSession, None]:
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
+    # Each test recreates the schema, so user ids repeat between tests.
+    principal_cache.clear()
 
     settings = get_settings()
     settings.database_url = SQLALCHEMY_DATABASE_URL
@@ -0,0 +1,158 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException, Request
+
+from app.api.v1.endpoints import predict as predict_endpoint
+from app.services import bulk_prediction_service
+from app.services.admission import (
+    AdmissionController,
+    AdmissionRejectedError,
+    admission_rejections_counter,
+    cancelled_counter,
+)
+
+
+def test_admission_queues_in_fifo_order_and_rejects_overflow() -> None:
+    async def scenario() -> list[str]:
+        controller = AdmissionController(max_in_flight=1, max_queue=2)
+        order: list[str] = []
+        release = asyncio.Event()
+
+        async def job(name: str) -> None:
+            async with controller.admit():
+                order.append(name)
+                await release.wait()
+
+        first = asyncio.create_task(job("first"))
+        await asyncio.sleep(0)
+        queued = [asyncio.create_task(job(name)) for name in ("second", "third")]
+        await asyncio.sleep(0)
+        assert controller.in_flight == 1
+        assert controller.queue_depth == 2
+
+        with pytest.raises(AdmissionRejectedError) as rejected:
+            async with controller.admit():
+                pass
+        assert rejected.value.reason == "queue_full"
+        assert rejected.value.retry_after_seconds >= 1
+
+        release.set()
+        await asyncio.gather(first, *queued)
+        assert controller.in_flight == 0
+        return order
+
+    assert asyncio.run(scenario()) == ["first", "second", "third"]
+
+
+def test_admission_rejects_requests_that_cannot_start_before_deadline() -> None:
+    async def scenario() -> None:
+        controller = AdmissionController(
+            max_in_flight=1, max_queue=10, rejections=admission_rejections_counter
+        )
+        loop = asyncio.get_running_loop()
+        async with controller.admit():
+            with pytest.raises(AdmissionRejectedError) as rejected:
+                async with controller.admit(deadline=loop.time() + 0.01):
+                    pass
+            assert rejected.value.reason == "deadline"
+            assert controller.queue_depth == 0
+        assert controller.in_flight == 0
+
+    before = admission_rejections_counter.value(reason="deadline")
+    asyncio.run(scenario())
+    assert admission_rejections_counter.value(reason="deadline") == before + 1
+
+
+def test_cancelled_waiter_gives_up_its_place() -> None:
+    async def scenario() -> None:
+        controller = AdmissionController(max_in_flight=1, max_queue=10)
+
+        async def waiter() -> None:
+            async with controller.admit():
+                pass
+
+        async with controller.admit():
+            task = asyncio.create_task(waiter())
+            await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            assert controller.queue_depth == 0
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_predict_sheds_load_with_retry_after(client, monkeypatch) -> None:
+    saturated = AdmissionController(max_in_flight=1, max_queue=0)
+    saturated._in_flight = 1
+    monkeypatch.setattr(predict_endpoint, "predict_admission", saturated)
+
+    response = client.post("/api/v1/predict/", json={"features": [1, 2, 3, 4]})
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_batch_predict_chunks_are_admitted_and_shed(client, monkeypatch) -> None:
+    saturated = AdmissionController(max_in_flight=1, max_queue=0)
+    saturated._in_flight = 1
+    monkeypatch.setattr(bulk_prediction_service, "predict_admission", saturated)
+
+    response = client.post("/api/v1/predict/batch", json=[[1, 2, 3, 4], [2, 2, 2, 2]])
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines] == [0, 1]
+    assert all("overloaded" in line["error"] for line in lines)
+
+
+def test_predict_rejects_invalid_deadline_header(client) -> None:
+    response = client.post(
+        "/api/v1/predict/",
+        json={"features": [1, 2, 3, 4]},
+        headers={"X-Request-Timeout-Ms": "soon"},
+    )
+
+    assert response.status_code == 400
+
+
+def test_predict_honours_deadline_header(client) -> None:
+    response = client.post(
+        "/api/v1/predict/",
+        json={"features": [1, 2, 3, 4]},
+        headers={"X-Request-Timeout-Ms": "5000"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["prediction"] == 2.5
+
+
+def test_client_disconnect_cancels_admitted_work() -> None:
+    cancelled = asyncio.Event()
+
+    async def slow_work() -> float:
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return 0.0
+
+    async def receive() -> dict[str, str]:
+        await asyncio.sleep(0.01)
+        return {"type": "http.disconnect"}
+
+    async def scenario() -> None:
+        request = Request({"type": "http", "method": "POST", "headers": []}, receive)
+        with pytest.raises(HTTPException) as aborted:
+            await predict_endpoint._run_admitted(request, slow_work)
+        assert aborted.value.status_code == 499
+        assert cancelled.is_set()
+        assert predict_endpoint.predict_admission.in_flight == 0
+
+    before = cancelled_counter.value()
+    asyncio.run(scenario())
+    assert cancelled_counter.value() == before + 1
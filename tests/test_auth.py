@@ -1,3 +1,15 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.db.models.refresh_token import RefreshToken
+from app.services.admission import AdmissionRejectedError
+from app.services.password_hasher import password_hasher
+from app.services.token_service import purge_expired_refresh_tokens
+
+
 def test_create_user_then_login(client) -> None:
     create_response = client.post(
         "/api/v1/users/",
@@ -14,3 +26,100 @@ def test_create_user_then_login(client) -> None:
     payload = login_response.json()
     assert "access_token" in payload
     assert payload["token_type"] == "bearer"
+
+
+def _login(client, email: str = "refresh@example.com") -> dict[str, str]:
+    client.post("/api/v1/users/", json={"email": email, "password": "secret123"})
+    response = client.post("/api/v1/auth/login", data={"username": email, "password": "secret123"})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_refresh_rotates_tokens_without_password_check(client, monkeypatch) -> None:
+    tokens = _login(client)
+
+    async def no_bcrypt(*_: str) -> bool:
+        raise AssertionError("refresh must not verify a password")
+
+    monkeypatch.setattr(password_hasher, "verify", no_bcrypt)
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    me = client.get(
+        "/api/v1/users/me", headers={"Authorization": f"Bearer {rotated['access_token']}"}
+    )
+    assert me.status_code == 200
+
+
+def test_reused_refresh_token_revokes_the_whole_family(client) -> None:
+    tokens = _login(client)
+    rotated = client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    ).json()
+
+    replay = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert replay.status_code == 401
+
+    descendant = client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": rotated["refresh_token"]}
+    )
+    assert descendant.status_code == 401
+
+
+def test_logout_revokes_refresh_token(client) -> None:
+    tokens = _login(client)
+
+    assert (
+        client.post("/api/v1/auth/logout", json={"refresh_token": tokens["refresh_token"]})
+    ).status_code == 204
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+
+def test_token_types_are_not_interchangeable(client) -> None:
+    tokens = _login(client)
+
+    as_bearer = client.get(
+        "/api/v1/users/me", headers={"Authorization": f"Bearer {tokens['refresh_token']}"}
+    )
+    as_refresh = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["access_token"]})
+
+    assert as_bearer.status_code == 401
+    assert as_refresh.status_code == 401
+
+
+def test_login_is_shed_with_retry_after_when_hashing_is_saturated(client, monkeypatch) -> None:
+    client.post("/api/v1/users/", json={"email": "busy@example.com", "password": "secret123"})
+
+    async def saturated(*_: str) -> bool:
+        raise AdmissionRejectedError("password_hash_queue_full", 3)
+
+    monkeypatch.setattr(password_hasher, "verify", saturated)
+    response = client.post(
+        "/api/v1/auth/login", data={"username": "busy@example.com", "password": "secret123"}
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+
+
+def test_expired_refresh_tokens_are_purged(
+    client, db_session: Session, primary_async_engine: AsyncEngine
+) -> None:
+    tokens = _login(client)
+    client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    rows = db_session.query(RefreshToken).all()
+    assert len(rows) == 2
+    rows[0].expires_at = datetime.now(UTC) - timedelta(seconds=1)
+    db_session.commit()
+    kept = rows[1].jti
+
+    async def purge() -> int:
+        async with async_sessionmaker(primary_async_engine)() as db:
+            return await purge_expired_refresh_tokens(db)
+
+    assert asyncio.run(purge()) == 1
+    db_session.expire_all()
+    assert [row.jti for row in db_session.query(RefreshToken).all()] == [kept]
@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.core.config import get_settings
+from app.db.pool import (
+    TimedQueuePool,
+    checked_out_gauge,
+    checkout_timeouts_counter,
+    checkout_wait_histogram,
+    engine_options,
+    instrument_engine,
+    invalidations_counter,
+)
+
+
+def _pooled_engine(tmp_path, name: str):
+    engine = create_engine(
+        f"sqlite+pysqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+        pool_logging_name=name,
+    )
+    instrument_engine(engine)
+    return engine
+
+
+def test_pool_exhaustion_is_measured(tmp_path) -> None:
+    engine = _pooled_engine(tmp_path, "test-exhaustion")
+
+    with engine.connect():
+        assert checked_out_gauge.value(pool="test-exhaustion") == 1
+        with pytest.raises(exc.TimeoutError), engine.connect():
+            pass
+
+    assert checked_out_gauge.value(pool="test-exhaustion") == 0
+    assert checkout_timeouts_counter.value(pool="test-exhaustion") == 1
+    assert checkout_wait_histogram.count(pool="test-exhaustion") == 2
+    engine.dispose()
+
+
+def test_idle_connection_failing_ping_is_replaced(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(get_settings(), "db_pool_ping_idle_seconds", 0.0)
+    engine = _pooled_engine(tmp_path, "test-ping")
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+    # Only the stale connection is pinged; its fresh replacement is not.
+    def failing_ping(_dbapi_connection) -> bool:
+        raise RuntimeError("server went away")
+
+    monkeypatch.setattr(engine.dialect, "do_ping", failing_ping)
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT 1")).scalar() == 1
+
+    assert invalidations_counter.value(pool="test-ping", reason="ping") == 1
+    engine.dispose()
+
+
+def test_engine_options_come_from_settings(monkeypatch) -> None:
+    monkeypatch.setattr(get_settings(), "db_pool_size", 20)
+    monkeypatch.setattr(get_settings(), "db_max_overflow", 0)
+
+    options = engine_options("postgresql+psycopg://user:pw@db/app", "sync")
+
+    assert options["pool_size"] == 20
+    assert options["max_overflow"] == 0
+    assert options["pool_pre_ping"] is False
+    assert options["poolclass"] is TimedQueuePool
+    assert engine_options("sqlite+pysqlite:///app.db", "sync") == {}
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import pickle
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import get_settings
+from app.ml.dummy_model import DummyModel
+from app.ml.inference_worker import PackedOutputs
+from app.ml.model_loader import load_model_artifact
+from app.services import inference_pool
+from app.services.inference_pool import InferencePool, pool_restarts_counter
+
+
+def test_process_pool_predicts_batches() -> None:
+    pool = InferencePool(get_settings().model_path, size=1, task_timeout_seconds=30, max_restarts=1)
+    pool.start()
+    try:
+        outputs, _ = asyncio.run(pool.predict_batch([[1.0, 2.0, 3.0, 4.0], [2.0, 2.0, 2.0, 2.0]]))
+    finally:
+        pool.shutdown()
+
+    assert outputs == [2.5, 2.0]
+
+
+def test_process_pool_recovers_from_worker_crash() -> None:
+    pool = InferencePool(get_settings().model_path, size=1, task_timeout_seconds=30, max_restarts=2)
+    restarts_before = pool_restarts_counter.value(reason="crash")
+    pool.start()
+    try:
+        assert asyncio.run(pool.predict_batch([[1.0, 1.0, 1.0, 1.0]]))[0] == [1.0]
+        for process in list(pool._executor._processes.values()):  # type: ignore[union-attr]
+            os.kill(process.pid, signal.SIGKILL)
+            process.join()
+
+        outputs, _ = asyncio.run(pool.predict_batch([[4.0, 4.0, 4.0, 4.0]]))
+    finally:
+        pool.shutdown()
+
+    assert outputs == [4.0]
+    assert pool_restarts_counter.value(reason="crash") == restarts_before + 1
+
+
+def test_outputs_carry_the_version_the_worker_loaded(tmp_path) -> None:
+    path = tmp_path / "model.pkl"
+    path.write_bytes(pickle.dumps(DummyModel(), protocol=4))
+    pool = InferencePool(str(path), size=1, task_timeout_seconds=30, max_restarts=2)
+    pool.start()
+    try:
+        _, first = asyncio.run(pool.predict_batch([[1.0, 1.0, 1.0, 1.0]]))
+        # The artifact changes and a crash restart loads it before anything else notices.
+        path.write_bytes(pickle.dumps(DummyModel(), protocol=5))
+        for process in list(pool._executor._processes.values()):  # type: ignore[union-attr]
+            os.kill(process.pid, signal.SIGKILL)
+            process.join()
+        _, second = asyncio.run(pool.predict_batch([[1.0, 1.0, 1.0, 1.0]]))
+    finally:
+        pool.shutdown()
+
+    assert first != second
+    assert second == load_model_artifact(str(path)).version
+
+
+def test_time_queued_behind_busy_workers_does_not_count_as_a_timeout(monkeypatch) -> None:
+    def slow_predict(payload: bytes, width: int, dtype: str) -> PackedOutputs:
+        time.sleep(0.2)
+        return PackedOutputs(payload[: len(payload) // width], "slow")
+
+    pool = InferencePool(
+        get_settings().model_path, size=1, task_timeout_seconds=0.5, max_restarts=0
+    )
+    restarts_before = pool_restarts_counter.value(reason="timeout")
+    # A one-thread executor has the same queueing semantics as one worker process.
+    monkeypatch.setattr(inference_pool, "predict_packed", slow_predict)
+    pool._executor = ThreadPoolExecutor(max_workers=1)  # type: ignore[assignment]
+
+    async def scenario() -> list[tuple[list[float], str]]:
+        return await asyncio.gather(*(pool.predict_batch([[float(n)]]) for n in range(5)))
+
+    try:
+        outputs = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+
+    assert outputs == [([float(n)], "slow") for n in range(5)]
+    assert pool_restarts_counter.value(reason="timeout") == restarts_before
+
+
+def test_default_pool_is_split_across_web_workers(monkeypatch) -> None:
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+
+    def size(web_workers: int) -> int:
+        return InferencePool("model.pkl", None, 30, 1, web_workers=web_workers).size
+
+    assert size(1) == 8
+    assert size(4) == 2
+    assert size(16) == 1
+    assert InferencePool("model.pkl", 3, 30, 1, web_workers=4).size == 3
@@ -0,0 +1,112 @@
+import asyncio
+
+from app.services.micro_batcher import MicroBatcher
+
+
+def test_concurrent_rows_share_one_model_call() -> None:
+    batches: list[int] = []
+
+    async def run_batch(features_batch: list[list[float]]) -> list[float]:
+        batches.append(len(features_batch))
+        return [sum(features) for features in features_batch]
+
+    async def scenario() -> list[float]:
+        batcher = MicroBatcher(run_batch, max_batch_size=8, max_wait_ms=50)
+        await batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit([float(i), 1.0]) for i in range(5)))
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(scenario())
+
+    assert results == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert batches == [5]
+
+
+def test_batches_are_capped_at_max_size() -> None:
+    batches: list[int] = []
+
+    async def run_batch(features_batch: list[list[float]]) -> list[float]:
+        batches.append(len(features_batch))
+        return [features[0] for features in features_batch]
+
+    async def scenario() -> list[float]:
+        batcher = MicroBatcher(run_batch, max_batch_size=4, max_wait_ms=50)
+        await batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit([float(i)]) for i in range(10)))
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(scenario())
+
+    assert results == [float(i) for i in range(10)]
+    assert batches == [4, 4, 2]
+
+
+def test_batch_failure_is_delivered_to_every_caller() -> None:
+    async def run_batch(features_batch: list[list[float]]) -> list[float]:
+        raise ValueError("model exploded")
+
+    async def scenario() -> list[object]:
+        batcher = MicroBatcher(run_batch, max_batch_size=8, max_wait_ms=5)
+        await batcher.start()
+        try:
+            return await asyncio.gather(
+                *(batcher.submit([1.0]) for _ in range(3)), return_exceptions=True
+            )
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(scenario())
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_batches_run_concurrently_up_to_the_limit() -> None:
+    running = 0
+    peak = 0
+
+    async def run_batch(features_batch: list[list[float]]) -> list[float]:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return [features[0] for features in features_batch]
+
+    async def scenario() -> list[float]:
+        batcher = MicroBatcher(run_batch, max_batch_size=2, max_wait_ms=0)
+        await batcher.start(max_concurrent_batches=3)
+        try:
+            return await asyncio.gather(*(batcher.submit([float(i)]) for i in range(16)))
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(scenario())
+
+    assert results == [float(i) for i in range(16)]
+    assert peak == 3
+
+
+def test_stop_resolves_rows_that_are_being_scored() -> None:
+    started = asyncio.Event()
+
+    async def run_batch(features_batch: list[list[float]]) -> list[float]:
+        started.set()
+        await asyncio.sleep(10)
+        return [0.0 for _ in features_batch]
+
+    async def scenario() -> list[object]:
+        batcher = MicroBatcher(run_batch, max_batch_size=2, max_wait_ms=0)
+        await batcher.start()
+        pending = [asyncio.ensure_future(batcher.submit([float(i)])) for i in range(4)]
+        await started.wait()
+        await batcher.stop()
+        async with asyncio.timeout(1):
+            return await asyncio.gather(*pending, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
@@ -0,0 +1,86 @@
+import asyncio
+import pickle
+
+from app.ml.dummy_model import DummyModel
+from app.services import model_registry as registry_module
+from app.services.model_registry import ModelRegistry, estimate_model_bytes
+
+
+class SizedModel:
+    def __init__(self, memory_bytes: int, offset: float = 0.0) -> None:
+        self.memory_bytes = memory_bytes
+        self.offset = offset
+
+    def predict(self, features_batch: list[list[float]]) -> list[float]:
+        return [sum(features) + self.offset for features in features_batch]
+
+
+def _write_model(directory, name: str, model: object) -> None:
+    (directory / f"{name}.pkl").write_bytes(pickle.dumps(model))
+
+
+def test_concurrent_first_requests_share_one_load(tmp_path, monkeypatch) -> None:
+    _write_model(tmp_path, "tenant-a", DummyModel())
+    registry = ModelRegistry(str(tmp_path), memory_budget_bytes=10**9)
+    loads: list[str] = []
+    original = ModelRegistry._load_and_measure
+
+    def counting_load(path):
+        loads.append(str(path))
+        return original(path)
+
+    monkeypatch.setattr(ModelRegistry, "_load_and_measure", staticmethod(counting_load))
+
+    async def scenario():
+        return await asyncio.gather(*(registry.get("tenant-a") for _ in range(5)))
+
+    handles = asyncio.run(scenario())
+
+    assert len(loads) == 1
+    assert all(handle is handles[0] for handle in handles)
+
+
+def test_least_recently_used_models_are_unloaded_over_budget(tmp_path) -> None:
+    for name in ("a", "b", "c"):
+        _write_model(tmp_path, name, SizedModel(memory_bytes=400))
+    registry = ModelRegistry(str(tmp_path), memory_budget_bytes=1000)
+
+    async def scenario() -> None:
+        await registry.get("a")
+        await registry.get("b")
+        await registry.get("a")
+        await registry.get("c")
+
+    asyncio.run(scenario())
+
+    assert registry.loaded_models() == ["a", "c"]
+    assert registry.resident_bytes == 800
+
+
+def test_estimate_model_bytes_walks_object_graph() -> None:
+    small = SizedModel.__new__(SizedModel)
+    small.offset = 0.0
+    large = SizedModel.__new__(SizedModel)
+    large.offset = 0.0
+    large.table = [float(i) for i in range(10_000)]  # type: ignore[attr-defined]
+
+    assert estimate_model_bytes(large) > estimate_model_bytes(small) + 10_000 * 8
+
+
+def test_named_prediction_route(client, tmp_path, monkeypatch) -> None:
+    _write_model(tmp_path, "tenant-b", SizedModel(memory_bytes=10, offset=100.0))
+    monkeypatch.setattr(
+        registry_module, "model_registry", ModelRegistry(str(tmp_path), memory_budget_bytes=10**6)
+    )
+    monkeypatch.setattr(
+        "app.api.v1.endpoints.predict.model_registry", registry_module.model_registry
+    )
+
+    found = client.post("/api/v1/predict/tenant-b", json={"features": [1, 2, 3, 4]})
+    missing = client.post("/api/v1/predict/unknown", json={"features": [1, 2, 3, 4]})
+    traversal = client.post("/api/v1/predict/..%2Fsecret", json={"features": [1, 2, 3, 4]})
+
+    assert found.status_code == 200
+    assert found.json()["prediction"] == 110.0
+    assert missing.status_code == 404
+    assert traversal.status_code == 404
@@ -0,0 +1,92 @@
+import mmap
+import pickle
+import signal
+from typing import Any, cast
+
+import pytest
+
+from app.core.config import get_settings
+from app.ml.dummy_model import DummyModel
+from app.ml.model_loader import load_model_artifact
+from app.services import prediction_service
+
+
+class ScaledModel:
+    def __init__(self, factor: float) -> None:
+        self.factor = factor
+
+    def predict(self, features_batch: list[list[float]]) -> list[float]:
+        return [sum(features) * self.factor for features in features_batch]
+
+
+class WeightedModel:
+    def bind_weights(self, weights: memoryview) -> None:
+        self.weights = weights
+
+    def predict(self, features_batch: list[list[float]]) -> list[float]:
+        return [float(self.weights[0]) for _ in features_batch]
+
+
+@pytest.fixture
+def model_file(tmp_path, monkeypatch):
+    path = tmp_path / "model.pkl"
+    path.write_bytes(pickle.dumps(DummyModel()))
+    monkeypatch.setattr(get_settings(), "model_path", str(path))
+    monkeypatch.setattr(prediction_service, "_active", None)
+    return path
+
+
+def test_reload_swaps_in_new_version(model_file) -> None:
+    old = prediction_service.active_model()
+
+    model_file.write_bytes(pickle.dumps(ScaledModel(2.0)))
+    result = prediction_service.reload_model()
+
+    assert result.reloaded is True
+    assert result.previous_version == old.version
+    assert result.model_version != old.version
+    assert prediction_service.predict([1.0, 1.0, 1.0, 1.0]).value == 8.0
+    # A caller that grabbed the old handle keeps a working model.
+    assert cast(Any, old.model).predict([[1.0, 1.0, 1.0, 1.0]]) == [1.0]
+
+
+def test_reload_is_noop_when_artifact_unchanged(model_file) -> None:
+    version = prediction_service.model_version()
+
+    result = prediction_service.reload_model(force=True)
+
+    assert result == (version, version, False)
+
+
+def test_weights_sidecar_is_memory_mapped(tmp_path) -> None:
+    path = tmp_path / "weighted.pkl"
+    path.write_bytes(pickle.dumps(WeightedModel()))
+    (tmp_path / "weighted.pkl.weights").write_bytes(bytes([7, 8, 9]))
+
+    model = cast(WeightedModel, load_model_artifact(str(path)).model)
+
+    assert isinstance(model.weights.obj, mmap.mmap)
+    assert model.predict([[0.0]]) == [7.0]
+
+
+def test_admin_reload_requires_key(client, model_file, monkeypatch) -> None:
+    monkeypatch.setattr(get_settings(), "admin_api_key", "s3cret")
+
+    denied = client.post("/api/v1/admin/model/reload", headers={"X-Admin-Key": "nope"})
+    allowed = client.post("/api/v1/admin/model/reload", headers={"X-Admin-Key": "s3cret"})
+
+    assert denied.status_code == 403
+    assert allowed.status_code == 200
+    assert allowed.json()["reloaded"] is False
+
+
+def test_admin_reload_is_forwarded_to_the_prefork_master(client, monkeypatch) -> None:
+    signals: list[tuple[int, int]] = []
+    monkeypatch.setattr(get_settings(), "admin_api_key", "s3cret")
+    monkeypatch.setattr(prediction_service.os, "kill", lambda pid, sig: signals.append((pid, sig)))
+    monkeypatch.setattr(prediction_service, "_reload_master_pid", 4242)
+
+    response = client.post("/api/v1/admin/model/reload", headers={"X-Admin-Key": "s3cret"})
+
+    assert response.status_code == 202
+    assert signals == [(4242, signal.SIGHUP)]
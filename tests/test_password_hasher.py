@@ -0,0 +1,73 @@
+import asyncio
+import os
+
+import pytest
+
+from app.services.admission import AdmissionRejectedError
+from app.services.password_hasher import PasswordHasher, hash_task_histogram
+
+
+def test_process_pool_hashes_and_verifies_passwords() -> None:
+    hasher = PasswordHasher(pool_size=1, max_concurrency=1)
+    hasher.start()
+    try:
+
+        async def scenario() -> tuple[bool, bool]:
+            hashed = await hasher.hash("secret123")
+            return await hasher.verify("secret123", hashed), await hasher.verify("wrong", hashed)
+
+        assert hasher.running
+        assert asyncio.run(scenario()) == (True, False)
+    finally:
+        hasher.shutdown()
+
+    assert hash_task_histogram.count(operation="verify") >= 2
+
+
+def test_concurrency_cap_queues_excess_operations() -> None:
+    hasher = PasswordHasher(pool_size=0, max_concurrency=1)
+    hasher.start()
+
+    async def scenario() -> tuple[int, int, list[bool]]:
+        hashed = await hasher.hash("secret123")
+        tasks = [asyncio.create_task(hasher.verify("secret123", hashed)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        observed = (hasher.in_flight, hasher.queue_depth)
+        return *observed, await asyncio.gather(*tasks)
+
+    in_flight, queue_depth, results = asyncio.run(scenario())
+
+    assert not hasher.running
+    assert (in_flight, queue_depth) == (1, 2)
+    assert results == [True, True, True]
+    assert hasher.queue_depth == 0
+
+
+def test_default_pool_is_split_across_web_workers(monkeypatch) -> None:
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+
+    assert PasswordHasher(None, None)._pool_size == 8
+    assert PasswordHasher(None, None, web_workers=4)._pool_size == 2
+    assert PasswordHasher(None, None, web_workers=8)._pool_size == 1
+    assert PasswordHasher(None, None, web_workers=16)._pool_size == 1
+
+
+def test_full_queue_sheds_interactive_operations() -> None:
+    hasher = PasswordHasher(pool_size=0, max_concurrency=1, max_queue=1)
+    hasher.start()
+
+    async def scenario() -> tuple[AdmissionRejectedError, tuple[str, str, str]]:
+        first = asyncio.create_task(hasher.hash("one"))
+        queued = asyncio.create_task(hasher.hash("two"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejectedError) as rejected:
+            await hasher.hash("three")
+        # Bulk callers wait for a slot instead of being rejected.
+        bulk = asyncio.create_task(hasher.hash("four", shed_load=False))
+        return rejected.value, await asyncio.gather(first, queued, bulk)
+
+    rejection, hashes = asyncio.run(scenario())
+
+    assert rejection.reason == "queue_full"
+    assert rejection.retry_after_seconds >= 1
+    assert len(hashes) == 3
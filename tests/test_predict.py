@@ -4,3 +4,14 @@ def test_predict_returns_value(client) -> None:
     assert response.status_code == 200
     body = response.json()
     assert body["prediction"] == 2.5
+    assert body["model_version"] == response.headers["X-Model-Version"]
+
+
+def test_metrics_expose_batching_histograms(client) -> None:
+    client.post("/api/v1/predict/", json={"features": [1, 2, 3, 4]})
+
+    response = client.get("/api/v1/metrics")
+
+    assert response.status_code == 200
+    assert "predict_batch_size_bucket" in response.text
+    assert "predict_batch_queue_wait_seconds_count" in response.text
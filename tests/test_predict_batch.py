@@ -0,0 +1,63 @@
+import json
+from typing import Any
+
+
+def _lines(response) -> list[dict[str, Any]]:
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_batch_predict_accepts_json_array(client) -> None:
+    rows = [{"features": [1, 2, 3, 4]}, {"features": [2, 2, 2, 2]}, [0, 0, 0, 4]]
+
+    response = client.post("/api/v1/predict/batch", json=rows)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert _lines(response) == [
+        {"index": 0, "prediction": 2.5},
+        {"index": 1, "prediction": 2.0},
+        {"index": 2, "prediction": 1.0},
+    ]
+
+
+def test_batch_predict_streams_ndjson_and_reports_bad_rows(client) -> None:
+    def body():
+        yield b'{"features": [1, 2, 3, 4]}\n{"features": [1, 2]}\n'
+        yield b'not json\n{"features": [4, 4,'
+        yield b" 4, 4]}"
+
+    response = client.post(
+        "/api/v1/predict/batch",
+        content=body(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    lines = sorted(_lines(response), key=lambda line: line["index"])
+    assert lines[0] == {"index": 0, "prediction": 2.5}
+    assert "error" in lines[1]
+    assert lines[2] == {"index": 2, "error": "invalid JSON"}
+    assert lines[3] == {"index": 3, "prediction": 4.0}
+
+
+def test_batch_predict_rejects_non_finite_values(client) -> None:
+    body = b'{"features": [1, 2, 3, NaN]}\n[Infinity, 0, 0, 0]\n[1e308, 1e308, 1e308, 1e308]\n'
+
+    response = client.post(
+        "/api/v1/predict/batch", content=body, headers={"Content-Type": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 200
+    assert "NaN" not in response.text and "Infinity" not in response.text
+    lines = sorted(_lines(response), key=lambda line: line["index"])
+    assert lines[0] == {"index": 0, "error": "features must be finite numbers"}
+    assert lines[1] == {"index": 1, "error": "features must be finite numbers"}
+    assert lines[2] == {"index": 2, "error": "prediction is not a finite number"}
+
+
+def test_batch_predict_rejects_unknown_content_type(client) -> None:
+    response = client.post(
+        "/api/v1/predict/batch", content=b"1,2,3,4", headers={"Content-Type": "text/csv"}
+    )
+
+    assert response.status_code == 415
@@ -0,0 +1,91 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.core.config import get_settings
+from app.ml.dummy_model import DummyModel
+from app.ml.float32_matrix import MEDIA_TYPE, MatrixFormatError, decode_matrix, encode_matrix
+from app.ml.inference_worker import PackedOutputs
+from app.services import prediction_service
+from app.services.inference_pool import InferencePool
+
+
+def test_decode_matrix_is_a_zero_copy_view() -> None:
+    body = bytearray(encode_matrix(np.array([[1, 2, 3, 4], [5, 6, 7, 8]], dtype=np.float32)))
+
+    matrix = decode_matrix(body)
+    body[-4:] = np.float32(80).tobytes()
+
+    assert matrix.shape == (2, 4)
+    assert matrix[1, 3] == 80.0
+
+
+def test_decode_matrix_rejects_truncated_body() -> None:
+    body = encode_matrix(np.ones((3, 4), dtype=np.float32))
+
+    with pytest.raises(MatrixFormatError):
+        decode_matrix(body[:-1])
+
+
+def test_batch_predict_accepts_float32_matrix(client) -> None:
+    features = np.array([[1, 2, 3, 4], [2, 2, 2, 2], [0, 0, 0, 4]], dtype=np.float32)
+
+    response = client.post(
+        "/api/v1/predict/batch",
+        content=encode_matrix(features),
+        headers={"Content-Type": MEDIA_TYPE},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == MEDIA_TYPE
+    assert "X-Model-Version" in response.headers
+    assert decode_matrix(response.content).ravel().tolist() == [2.5, 2.0, 1.0]
+
+
+def test_batch_predict_rejects_wrong_matrix_width(client) -> None:
+    response = client.post(
+        "/api/v1/predict/batch",
+        content=encode_matrix(np.ones((2, 3), dtype=np.float32)),
+        headers={"Content-Type": MEDIA_TYPE},
+    )
+
+    assert response.status_code == 400
+
+
+def test_batched_single_predictions_use_the_vectorized_entry_point(monkeypatch) -> None:
+    def no_list_predict(self: DummyModel, features_batch: list[list[float]]) -> list[float]:
+        raise AssertionError("list-based predict() should not be called")
+
+    prediction_service.preload_model()
+    monkeypatch.setattr(DummyModel, "predict", no_list_predict)
+
+    outputs = asyncio.run(
+        prediction_service.predict_batch_async([[1.0, 2.0, 3.0, 4.0], [2.0, 2.0, 2.0, 2.0]])
+    )
+
+    assert [prediction.value for prediction in outputs] == [2.5, 2.0]
+
+
+def test_process_backend_sends_float32_matrices_without_widening(monkeypatch) -> None:
+    pool = InferencePool(get_settings().model_path, size=1, task_timeout_seconds=30, max_restarts=1)
+    sent: list[tuple[int, str]] = []
+    original = pool.predict_packed
+
+    async def recording_predict_packed(
+        payload: bytes, width: int, dtype: str = "<f8"
+    ) -> PackedOutputs:
+        sent.append((len(payload), dtype))
+        return await original(payload, width, dtype)
+
+    monkeypatch.setattr(pool, "predict_packed", recording_predict_packed)
+    monkeypatch.setattr(prediction_service, "_inference_pool", pool)
+    features = np.array([[1, 2, 3, 4], [0, 0, 0, 4]], dtype="<f4")
+    pool.start()
+    try:
+        result = asyncio.run(prediction_service.predict_matrix_async(features))
+    finally:
+        pool.shutdown()
+
+    assert result.values.tolist() == [2.5, 1.0]
+    assert sent == [(features.nbytes, "<f4")]
@@ -0,0 +1,61 @@
+import asyncio
+
+from app.core.cache import TTLCache, cache_evictions_counter, cache_hits_counter
+from app.services.prediction_cache import PredictionCache, cache_key
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_cache_evicts_least_recently_used_and_expired_entries() -> None:
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache("test-lru", maxsize=2, ttl_seconds=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    clock.now = 11
+    assert cache.get("a") is None
+    assert cache_evictions_counter.value(cache="test-lru", reason="size") == 1
+    assert cache_evictions_counter.value(cache="test-lru", reason="ttl") == 1
+
+
+def test_cache_key_is_canonical_and_versioned() -> None:
+    assert cache_key([0.0, 1, 2, 3], "v1") == cache_key([-0.0, 1.0, 2.0, 3.0], "v1")
+    assert cache_key([0.0, 1, 2, 3], "v1") != cache_key([0.0, 1, 2, 3], "v2")
+
+
+def test_model_version_change_invalidates_entries() -> None:
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+
+    async def scenario() -> tuple[float | None, float | None]:
+        await cache.set([1.0, 2.0], "v1", 1.5)
+        hit = await cache.get([1.0, 2.0], "v1")
+        after_reload = await cache.get([1.0, 2.0], "v2")
+        return hit, after_reload
+
+    hit, after_reload = asyncio.run(scenario())
+
+    assert hit == 1.5
+    assert after_reload is None
+    assert len(cache._local) == 0
+
+
+def test_repeated_predict_requests_hit_the_cache(client) -> None:
+    hits_before = cache_hits_counter.value(cache="prediction", tier="local")
+
+    first = client.post("/api/v1/predict/", json={"features": [9, 9, 9, 1]})
+    second = client.post("/api/v1/predict/", json={"features": [9, 9, 9, 1]})
+
+    assert first.json() == second.json()
+    assert first.json()["prediction"] == 7.0
+    assert cache_hits_counter.value(cache="prediction", tier="local") == hits_before + 1
@@ -0,0 +1,144 @@
+import json
+import os
+import pickle
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+from app.ml.dummy_model import DummyModel
+from app.prefork import PreforkServer
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "fork") or not os.path.exists(f"/proc/{os.getpid()}/task"),
+    reason="prefork test needs fork() and /proc",
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def _wait_live(port: int, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/v1/health/live", timeout=1):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def _children(pid: int) -> set[int]:
+    path = f"/proc/{pid}/task/{pid}/children"
+    with open(path) as file:
+        return {int(child) for child in file.read().split()}
+
+
+def test_prefork_master_rolls_workers_and_stops_cleanly() -> None:
+    port = _free_port()
+    env = {
+        **os.environ,
+        "SERVER_HOST": "127.0.0.1",
+        "SERVER_PORT": str(port),
+        "WEB_CONCURRENCY": "2",
+        "MODEL_RELOAD_INTERVAL_SECONDS": "0",
+    }
+    master = subprocess.Popen([sys.executable, "-m", "app.prefork"], env=env)
+    try:
+        _wait_live(port)
+        workers = _children(master.pid)
+        assert len(workers) == 2
+
+        master.send_signal(signal.SIGHUP)
+        deadline = time.monotonic() + 20
+        while _children(master.pid) & workers and time.monotonic() < deadline:
+            # Each old worker drains only after its replacement is serving.
+            _wait_live(port, timeout=1)
+            time.sleep(0.05)
+        replacements = _children(master.pid)
+        assert len(replacements) == 2
+        assert not replacements & workers
+        _wait_live(port)
+
+        master.send_signal(signal.SIGTERM)
+        assert master.wait(timeout=30) == 0
+    finally:
+        if master.poll() is None:
+            master.kill()
+            master.wait()
+
+
+def _served_version(port: int) -> str:
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/api/v1/predict/",
+        data=json.dumps({"features": [1.0, 2.0, 3.0, 4.0]}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return str(response.headers["X-Model-Version"])
+
+
+def test_master_polls_the_model_and_rolls_workers_onto_it(tmp_path) -> None:
+    model_path = tmp_path / "model.pkl"
+    model_path.write_bytes(pickle.dumps(DummyModel(), protocol=4))
+    port = _free_port()
+    env = {
+        **os.environ,
+        "SERVER_HOST": "127.0.0.1",
+        "SERVER_PORT": str(port),
+        "WEB_CONCURRENCY": "2",
+        "MODEL_PATH": str(model_path),
+        "MODEL_RELOAD_INTERVAL_SECONDS": "0.2",
+    }
+    master = subprocess.Popen([sys.executable, "-m", "app.prefork"], env=env)
+    try:
+        _wait_live(port)
+        workers = _children(master.pid)
+        old_version = _served_version(port)
+
+        model_path.write_bytes(pickle.dumps(DummyModel(), protocol=5))
+        deadline = time.monotonic() + 20
+        while _children(master.pid) & workers and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        assert not _children(master.pid) & workers
+        versions = {_served_version(port) for _ in range(10)}
+        assert len(versions) == 1
+        assert versions != {old_version}
+    finally:
+        master.terminate()
+        master.wait(timeout=30)
+
+
+def test_spawned_pool_workers_do_not_import_the_application() -> None:
+    # A spawned child re-imports `python -m app.prefork` as its main module.
+    probe = (
+        "import sys, app.prefork; "
+        "print(sorted(name for name in sys.modules"
+        " if name.split('.')[0] == 'sqlalchemy' or name.startswith(('app.main', 'app.db'))))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", probe], capture_output=True, text=True, check=True
+    ).stdout
+
+    assert output.strip() == "[]"
+
+
+def test_worker_readiness_requires_the_ready_byte() -> None:
+    ready_read, ready_write = os.pipe()
+    os.write(ready_write, b"1")
+    os.close(ready_write)
+    died_read, died_write = os.pipe()
+    os.close(died_write)
+
+    assert PreforkServer._wait_ready(ready_read, timeout=1)
+    assert not PreforkServer._wait_ready(died_read, timeout=1)
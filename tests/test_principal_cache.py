@@ -0,0 +1,106 @@
+import asyncio
+
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.db.models.user import User
+from app.schemas.user import UserRead
+from app.services import principal_cache as principal_cache_module
+from app.services.principal_cache import PrincipalCache, principal_cache
+
+
+def _create_user_and_token(client, email: str) -> str:
+    client.post("/api/v1/users/", json={"email": email, "password": "secret123"})
+    response = client.post("/api/v1/auth/login", data={"username": email, "password": "secret123"})
+    return response.json()["access_token"]
+
+
+def test_hot_token_skips_verification_and_database(client, monkeypatch) -> None:
+    token = _create_user_and_token(client, "cached@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    decodes: list[str] = []
+    lookups: list[int] = []
+    decode = principal_cache_module.decode_access_token_claims
+    get_user_async = deps.get_user_async
+
+    def counting_decode(value: str):
+        decodes.append(value)
+        return decode(value)
+
+    async def counting_get_user(db, user_id: int):
+        lookups.append(user_id)
+        return await get_user_async(db, user_id)
+
+    monkeypatch.setattr(principal_cache_module, "decode_access_token_claims", counting_decode)
+    monkeypatch.setattr(deps, "get_user_async", counting_get_user)
+
+    for _ in range(3):
+        response = client.get("/api/v1/users/me", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["email"] == "cached@example.com"
+
+    assert len(decodes) == 1
+    assert len(lookups) == 1
+
+
+def test_committed_user_change_invalidates_cached_principal(client, db_session: Session) -> None:
+    token = _create_user_and_token(client, "before@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/v1/users/me", headers=headers).json()["email"] == "before@example.com"
+
+    user = db_session.query(User).filter_by(email="before@example.com").one()
+    user.email = "after@example.com"
+    db_session.commit()
+
+    assert client.get("/api/v1/users/me", headers=headers).json()["email"] == "after@example.com"
+
+
+def test_deleted_user_is_rejected_after_commit(client, db_session: Session) -> None:
+    token = _create_user_and_token(client, "gone@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 200
+
+    db_session.delete(db_session.query(User).filter_by(email="gone@example.com").one())
+    db_session.commit()
+
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 401
+
+
+def test_invalid_tokens_are_not_cached(client) -> None:
+    before = len(principal_cache._tokens)
+
+    response = client.get("/api/v1/users/me", headers={"Authorization": "Bearer not-a-jwt"})
+
+    assert response.status_code == 401
+    assert len(principal_cache._tokens) == before
+
+
+def test_invalidation_reaches_other_processes_local_tier(monkeypatch) -> None:
+    server = FakeServer()
+    monkeypatch.setattr(
+        principal_cache_module.Redis,
+        "from_url",
+        lambda _url, **_kwargs: FakeRedis(server=server, decode_responses=True),
+    )
+    principal = UserRead(id=7, email="shared@example.com")
+
+    async def scenario() -> UserRead | None:
+        this_worker = PrincipalCache(100, 60, redis_url="redis://fake")
+        other_worker = PrincipalCache(100, 60, redis_url="redis://fake")
+        await this_worker.start()
+        await other_worker.start()
+        try:
+            await other_worker.wait_subscribed()
+            await other_worker.set(principal)
+            await this_worker.invalidate(principal.id)
+            async with asyncio.timeout(5):
+                while other_worker._principals.get(principal.id) is not None:
+                    await asyncio.sleep(0.01)
+            return await other_worker.get(principal.id)
+        finally:
+            await this_worker.stop()
+            await other_worker.stop()
+
+    assert asyncio.run(scenario()) is None
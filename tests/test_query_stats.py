@@ -0,0 +1,41 @@
+import logging
+
+from app.core.config import get_settings
+from app.db.query_stats import QueryStats, repeated_statements_counter
+
+
+def _register_and_login(client) -> str:
+    client.post("/api/v1/users/", json={"email": "timing@example.com", "password": "secret123"})
+    response = client.post(
+        "/api/v1/auth/login", data={"username": "timing@example.com", "password": "secret123"}
+    )
+    return response.json()["access_token"]
+
+
+def test_server_timing_reports_database_time(client) -> None:
+    token = _register_and_login(client)
+
+    response = client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {token}"})
+    live = client.get("/api/v1/health/live")
+
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    assert 'desc="1 queries"' in timing
+    assert "db-slowest;dur=" in timing
+    assert 'desc="0 queries"' in live.headers["Server-Timing"]
+
+
+def test_repeated_statement_shape_warns_once(monkeypatch, caplog) -> None:
+    monkeypatch.setattr(get_settings(), "db_repeated_statement_threshold", 3)
+    stats = QueryStats()
+    before = repeated_statements_counter.value()
+
+    with caplog.at_level(logging.WARNING, logger="app.db.query_stats"):
+        for _ in range(6):
+            stats.record("SELECT * FROM users WHERE id = ?", 0.001)
+        stats.record("SELECT 1", 0.5)
+
+    assert stats.count == 7
+    assert stats.slowest_statement == "SELECT 1"
+    assert repeated_statements_counter.value() == before + 1
+    assert len([record for record in caplog.records if "N+1" in record.message]) == 1
@@ -0,0 +1,189 @@
+import asyncio
+import json
+from typing import Any, cast
+
+from fastapi import WebSocket
+
+from app.services.realtime_replay import EventIds, RealtimeEvent, ReplayLog, is_event_id
+from app.services.realtime_service import (
+    SLOW_CONSUMER_CLOSE_CODE,
+    RealtimeHub,
+    SlowConsumerPolicy,
+    slow_consumer_disconnects_counter,
+)
+
+
+class FakeWebSocket:
+    def __init__(self, stalled: bool = False) -> None:
+        self.sent: list[str] = []
+        self.closed_with: int | None = None
+        self.release = asyncio.Event()
+        if not stalled:
+            self.release.set()
+
+    async def send_text(self, message: str) -> None:
+        await self.release.wait()
+        self.sent.append(message)
+
+    async def close(self, code: int = 1000, reason: str | None = None) -> None:
+        self.closed_with = code
+
+
+async def _connect(hub: RealtimeHub, stalled: bool = False) -> FakeWebSocket:
+    websocket = FakeWebSocket(stalled)
+    await hub.add_websocket(cast(WebSocket, websocket))
+    return websocket
+
+
+async def _broadcast(hub: RealtimeHub, count: int) -> None:
+    for number in range(count):
+        await hub.broadcast({"n": number})
+
+
+def _numbers(websocket: FakeWebSocket) -> list[Any]:
+    return [int(message.split(":")[1].rstrip("}")) for message in websocket.sent]
+
+
+def test_stalled_websocket_does_not_delay_others() -> None:
+    async def scenario() -> tuple[FakeWebSocket, FakeWebSocket]:
+        hub = RealtimeHub(queue_size=10)
+        stalled = await _connect(hub, stalled=True)
+        fast = await _connect(hub)
+
+        async with asyncio.timeout(1):
+            await _broadcast(hub, 3)
+            while len(fast.sent) < 3:
+                await asyncio.sleep(0)
+        await hub.remove_websocket(cast(WebSocket, stalled))
+        await hub.remove_websocket(cast(WebSocket, fast))
+        return stalled, fast
+
+    stalled, fast = asyncio.run(scenario())
+
+    assert _numbers(fast) == [0, 1, 2]
+    assert stalled.sent == []
+
+
+def test_drop_oldest_keeps_the_newest_events() -> None:
+    async def scenario() -> FakeWebSocket:
+        hub = RealtimeHub(queue_size=2)
+        websocket = await _connect(hub, stalled=True)
+        await asyncio.sleep(0)
+        await _broadcast(hub, 6)
+        websocket.release.set()
+        async with asyncio.timeout(1):
+            while len(websocket.sent) < 2:
+                await asyncio.sleep(0)
+        await hub.remove_websocket(cast(WebSocket, websocket))
+        return websocket
+
+    websocket = asyncio.run(scenario())
+
+    assert _numbers(websocket) == [4, 5]
+
+
+def test_disconnect_policy_closes_slow_consumers_with_1013() -> None:
+    policy: SlowConsumerPolicy = "disconnect"
+
+    async def scenario() -> tuple[FakeWebSocket, dict[str, int]]:
+        hub = RealtimeHub(queue_size=2, slow_consumer_policy=policy)
+        websocket = await _connect(hub, stalled=True)
+        await asyncio.sleep(0)
+        await _broadcast(hub, 4)
+        await hub.stop()
+        return websocket, await hub.counts()
+
+    before = slow_consumer_disconnects_counter.value()
+    websocket, counts = asyncio.run(scenario())
+
+    assert websocket.closed_with == SLOW_CONSUMER_CLOSE_CODE
+    assert counts["ws_connections"] == 0
+    assert slow_consumer_disconnects_counter.value() == before + 1
+
+
+def test_broadcast_reaches_only_subscribers_of_the_topic() -> None:
+    async def scenario() -> tuple[list[str], list[str], dict[str, int]]:
+        hub = RealtimeHub()
+        _, rooms = await hub.register_sse(["room-1", "room-2"])
+        _, lobby = await hub.register_sse()
+        await hub.broadcast({"n": 1}, "room-1")
+        await hub.broadcast({"n": 2}, "room-3")
+        await hub.broadcast({"n": 3})
+        counts = await hub.counts()
+        return (
+            [rooms.get_nowait().data for _ in range(rooms.qsize())],
+            [lobby.get_nowait().data for _ in range(lobby.qsize())],
+            counts,
+        )
+
+    rooms, lobby, counts = asyncio.run(scenario())
+
+    assert rooms == ['{"n": 1}']
+    assert lobby == ['{"n": 3}']
+    assert counts["topics"] == 3
+
+
+def test_replay_returns_missed_events_until_they_fall_out_of_the_log() -> None:
+    async def scenario() -> tuple[list[str], list[RealtimeEvent] | None, bool]:
+        hub = RealtimeHub(replay_size=3)
+        ids = [await hub.broadcast({"n": n}, f"room-{n % 2}") for n in range(3)]
+        resumed = await hub.replay(["room-0"], ids[0])
+        assert resumed is not None
+        await hub.broadcast({"n": 3}, "room-0")
+        evicted = await hub.replay(["room-0"], ids[0])
+        unknown = await hub.replay(["room-0"], "1-0") is None
+        return [event.data for event in resumed], evicted, unknown
+
+    resumed, evicted, unknown = asyncio.run(scenario())
+
+    assert resumed == ['{"n": 2}']
+    assert evicted is None
+    assert unknown
+
+
+def test_event_is_encoded_once_and_shared_by_every_subscriber(monkeypatch) -> None:
+    encodes: list[object] = []
+    dumps = json.dumps
+
+    def counting_dumps(obj: object, **kwargs: Any) -> str:
+        encodes.append(obj)
+        return dumps(obj, **kwargs)
+
+    monkeypatch.setattr(json, "dumps", counting_dumps)
+
+    async def scenario() -> tuple[str, list[RealtimeEvent], FakeWebSocket]:
+        hub = RealtimeHub()
+        queues = [(await hub.register_sse())[1] for _ in range(3)]
+        websocket = await _connect(hub)
+        event_id = await hub.broadcast({"n": 1})
+        async with asyncio.timeout(1):
+            while not websocket.sent:
+                await asyncio.sleep(0)
+        await hub.remove_websocket(cast(WebSocket, websocket))
+        return event_id, [queue.get_nowait() for queue in queues], websocket
+
+    event_id, events, websocket = asyncio.run(scenario())
+
+    assert len(encodes) == 1
+    assert all(event is events[0] for event in events)
+    assert websocket.sent[0] is events[0].data
+    assert events[0].sse_frame == f'id: {event_id}\nevent: message\ndata: {{"n": 1}}\n\n'.encode()
+
+
+def test_event_ids_are_unique_across_generators() -> None:
+    pods = [EventIds(), EventIds()]
+    ids = [pod.next() for _ in range(100) for pod in pods]
+
+    assert len(set(ids)) == len(ids)
+    assert all(is_event_id(event_id) for event_id in ids)
+
+
+def test_replay_log_eviction_keeps_a_later_event_with_the_same_id() -> None:
+    log = ReplayLog(2)
+    for number, event_id in enumerate(["dup", "dup", "last"]):
+        log.record(RealtimeEvent(event_id, "room", f'{{"n": {number}}}'))
+
+    resumed = log.after("dup", ["room"])
+
+    assert resumed is not None
+    assert [event.data for event in resumed] == ['{"n": 2}']
@@ -49,8 +49,8 @@ def test_redis_pubsub_fanout_across_hubs() -> None:
             }
             await publisher.broadcast(payload)
 
-            raw_message = await asyncio.wait_for(queue.get(), timeout=2)
-            assert json.loads(raw_message) == payload
+            event = await asyncio.wait_for(queue.get(), timeout=2)
+            assert json.loads(event.data) == payload
         finally:
             if subscriber_id is not None:
                 await subscriber.unregister_sse(subscriber_id)
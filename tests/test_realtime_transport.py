@@ -0,0 +1,198 @@
+import asyncio
+import json
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from redis.asyncio.client import PubSub
+from redis.exceptions import ConnectionError, RedisError
+
+from app.services import realtime_transport
+from app.services.realtime_replay import RealtimeEvent
+from app.services.realtime_service import RealtimeHub
+from app.services.realtime_transport import (
+    RedisTransport,
+    publish_batch_histogram,
+    reconnects_counter,
+)
+
+CHANNEL = "test:realtime"
+
+
+@pytest.fixture
+def server(monkeypatch) -> FakeServer:
+    server = FakeServer()
+    monkeypatch.setattr(
+        realtime_transport,
+        "redis_client",
+        lambda _url: FakeRedis(server=server, decode_responses=True),
+    )
+    return server
+
+
+def test_hubs_fan_out_through_redis_with_pipelined_publishes(server) -> None:
+    async def scenario() -> list[dict[str, int]]:
+        publisher = RealtimeHub()
+        subscriber = RealtimeHub()
+        for hub in (publisher, subscriber):
+            hub.configure("redis://fake", CHANNEL)
+            await hub.start()
+        assert subscriber._transport is not None
+        await subscriber._transport.wait_subscribed()
+
+        _, queue = await subscriber.register_sse()
+        await asyncio.gather(*(publisher.broadcast({"n": n}) for n in range(20)))
+        received = [json.loads((await asyncio.wait_for(queue.get(), 2)).data) for _ in range(20)]
+
+        await subscriber.stop()
+        await publisher.stop()
+        return received
+
+    batches_before = publish_batch_histogram.count()
+    received = asyncio.run(scenario())
+
+    assert received == [{"n": n} for n in range(20)]
+    # Twenty concurrent publishes share far fewer pipelined round trips.
+    assert publish_batch_histogram.count() - batches_before < 20
+
+
+def test_each_hub_subscribes_only_to_topics_it_has_subscribers_for(server) -> None:
+    async def scenario() -> tuple[frozenset[str], frozenset[str], list[str]]:
+        publisher = RealtimeHub()
+        subscriber = RealtimeHub()
+        for hub in (publisher, subscriber):
+            hub.configure("redis://fake", CHANNEL)
+            await hub.start()
+        assert publisher._transport is not None
+        assert subscriber._transport is not None
+
+        subscriber_id, queue = await subscriber.register_sse(["room-1"])
+        await subscriber._transport.wait_subscribed()
+        subscribed = subscriber._transport.channels
+        await publisher.broadcast({"n": 0}, "room-2")
+        await publisher.broadcast({"n": 1}, "room-1")
+        received = [(await asyncio.wait_for(queue.get(), 2)).data]
+        await subscriber.unregister_sse(subscriber_id)
+        after_leave = subscriber._transport.channels
+        publisher_channels = publisher._transport.channels
+
+        await subscriber.stop()
+        await publisher.stop()
+        assert publisher_channels == frozenset()
+        return subscribed, after_leave, received
+
+    subscribed, after_leave, received = asyncio.run(scenario())
+
+    assert subscribed == {f"{CHANNEL}:room-1"}
+    assert after_leave == frozenset()
+    assert received == ['{"n": 1}']
+
+
+def test_subscription_is_restored_after_connection_loss(server, monkeypatch) -> None:
+    failures = [ConnectionError("connection lost")]
+    get_message = PubSub.get_message
+
+    async def flaky_get_message(self, *args, **kwargs):
+        if failures:
+            raise failures.pop()
+        return await get_message(self, *args, **kwargs)
+
+    monkeypatch.setattr(PubSub, "get_message", flaky_get_message)
+
+    async def scenario() -> list[str]:
+        received: list[str] = []
+        arrived = asyncio.Event()
+
+        async def on_messages(batch: list[tuple[str, str, str]]) -> None:
+            received.extend(message for _, _, message in batch)
+            arrived.set()
+
+        transport = RedisTransport(
+            "redis://fake", [CHANNEL], on_messages, backoff_initial_seconds=0.01
+        )
+        await transport.start()
+        await transport.wait_subscribed()
+
+        publisher = FakeRedis(server=server, decode_responses=True)
+        async with asyncio.timeout(2):
+            while not arrived.is_set():
+                await publisher.publish(CHANNEL, "1-0 after")
+                await asyncio.sleep(0.02)
+        await publisher.aclose()
+        await transport.stop()
+        return received
+
+    reconnects_before = reconnects_counter.value()
+    received = asyncio.run(scenario())
+
+    assert "after" in received
+    assert reconnects_counter.value() == reconnects_before + 1
+
+
+def test_publish_fails_fast_while_redis_is_down(server) -> None:
+    async def scenario() -> None:
+        transport = RedisTransport("redis://fake", [CHANNEL], lambda _batch: asyncio.sleep(0))
+        await transport.start()
+        server.connected = False
+        try:
+            with pytest.raises(RedisError):
+                await transport.publish(CHANNEL, "lost")
+        finally:
+            server.connected = True
+            await transport.stop()
+
+    asyncio.run(scenario())
+
+
+def test_replay_reads_missed_events_from_the_redis_stream(server) -> None:
+    async def scenario() -> tuple[list[str], list[RealtimeEvent] | None, bool]:
+        publisher = RealtimeHub()
+        late = RealtimeHub()
+        for hub in (publisher, late):
+            hub.configure("redis://fake", CHANNEL, redis_replay=True)
+            await hub.start()
+
+        ids = [await publisher.broadcast({"n": n}, "room-1") for n in range(3)]
+        await publisher.broadcast({"n": 3}, "room-2")
+        # `late` never subscribed to room-1, so only the stream can answer.
+        missed = await late.replay(["room-1"], ids[0])
+        gap = await late.replay(["room-1"], "1-0") is None
+
+        await late.stop()
+        await publisher.stop()
+        return ids, missed, gap
+
+    ids, missed, gap = asyncio.run(scenario())
+
+    assert missed is not None
+    assert [event.id for event in missed] == ids[1:]
+    assert [event.data for event in missed] == ['{"n": 1}', '{"n": 2}']
+    assert gap
+
+
+def test_memory_replay_covers_only_topics_the_hub_was_subscribed_to(server) -> None:
+    async def scenario() -> tuple[list[RealtimeEvent] | None, list[RealtimeEvent] | None]:
+        publisher = RealtimeHub()
+        subscriber = RealtimeHub()
+        for hub in (publisher, subscriber):
+            hub.configure("redis://fake", CHANNEL)
+            await hub.start()
+        assert subscriber._transport is not None
+
+        _, queue = await subscriber.register_sse(["room-1"])
+        await subscriber._transport.wait_subscribed()
+        ids = [await publisher.broadcast({"n": n}, "room-1") for n in range(2)]
+        for _ in ids:
+            await asyncio.wait_for(queue.get(), 2)
+        covered = await subscriber.replay(["room-1"], ids[0])
+        uncovered = await subscriber.replay(["room-1", "room-2"], ids[0])
+
+        await subscriber.stop()
+        await publisher.stop()
+        return covered, uncovered
+
+    covered, uncovered = asyncio.run(scenario())
+
+    assert covered is not None
+    assert [event.data for event in covered] == ['{"n": 1}']
+    assert uncovered is None
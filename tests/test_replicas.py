@@ -0,0 +1,157 @@
+import asyncio
+import tempfile
+import time
+from collections.abc import Generator
+from contextlib import aclosing
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+
+from app.api.deps import load_principal
+from app.db import session
+from app.db.base import Base
+from app.db.models.user import User
+from app.db.replicas import ReplicaSet
+from app.db.session import async_database_url, read_session_factory, use_primary
+from app.services.principal_cache import principal_cache
+from app.services.user_service import get_user_by_email_async
+
+
+def _sqlite_url(path: Path) -> str:
+    return f"sqlite+pysqlite:///{path}"
+
+
+@pytest.fixture
+def replica_urls(db_session: Session) -> Generator[list[str], None, None]:
+    db_session.add(User(email="primary@example.com", hashed_password="x"))
+    db_session.commit()
+    with tempfile.TemporaryDirectory() as directory:
+        urls = []
+        for number in range(2):
+            url = _sqlite_url(Path(directory) / f"replica{number}.db")
+            engine = create_engine(url)
+            Base.metadata.create_all(bind=engine)
+            with Session(engine) as db:
+                db.add(User(email=f"replica{number}@example.com", hashed_password="x"))
+                db.commit()
+            engine.dispose()
+            urls.append(url)
+        yield urls
+
+
+def _replica_set(urls: list[str]) -> ReplicaSet:
+    return ReplicaSet(urls, [async_database_url(url) for url in urls], retry_seconds=60)
+
+
+def test_reads_rotate_across_replicas_and_writes_pin_the_primary(
+    replica_urls: list[str], primary_async_engine: AsyncEngine
+) -> None:
+    async def scenario() -> tuple[list[str | None], list[str]]:
+        replicas = _replica_set(replica_urls)
+        factory = read_session_factory(primary_async_engine, replicas)
+        seen: list[str | None] = []
+        for _ in range(2):
+            async with factory() as db:
+                seen.append(await db.scalar(select(User.email)))
+
+        async with factory() as db:
+            await db.scalar(select(User.email))
+            db.add(User(email="new@example.com", hashed_password="x"))
+            await db.commit()
+            after_write = list(await db.scalars(select(User.email).order_by(User.id)))
+        await replicas.dispose()
+        return seen, after_write
+
+    seen, after_write = asyncio.run(scenario())
+
+    assert seen == ["replica0@example.com", "replica1@example.com"]
+    assert after_write == ["primary@example.com", "new@example.com"]
+
+
+def test_replica_miss_is_not_retried_on_the_primary(
+    replica_urls: list[str], primary_async_engine: AsyncEngine
+) -> None:
+    async def scenario() -> tuple[User | None, User | None]:
+        replicas = _replica_set(replica_urls)
+        factory = read_session_factory(primary_async_engine, replicas)
+        async with factory() as db:
+            missed = await get_user_by_email_async(db, "primary@example.com")
+        async with factory() as db:
+            use_primary(db)
+            found = await get_user_by_email_async(db, "primary@example.com")
+        await replicas.dispose()
+        return missed, found
+
+    missed, found = asyncio.run(scenario())
+
+    assert missed is None
+    assert found is not None
+    assert found.email == "primary@example.com"
+
+
+def test_principal_cache_misses_load_from_the_primary(
+    replica_urls: list[str], primary_async_engine: AsyncEngine
+) -> None:
+    async def scenario() -> str | None:
+        replicas = _replica_set(replica_urls)
+        try:
+            async with read_session_factory(primary_async_engine, replicas)() as db:
+                # Every database here has a different user with id 1.
+                principal = await load_principal(db, 1)
+        finally:
+            await replicas.dispose()
+        return principal.email if principal is not None else None
+
+    principal_cache.clear()
+    try:
+        assert asyncio.run(scenario()) == "primary@example.com"
+    finally:
+        principal_cache.clear()
+
+
+def test_sign_up_sends_the_client_to_the_primary_for_a_while(client, monkeypatch) -> None:
+    monkeypatch.setattr(session, "replicas", _replica_set(["sqlite:///unused.db"]))
+
+    response = client.post(
+        "/api/v1/users/", json={"email": "fresh@example.com", "password": "secret123"}
+    )
+    cookie = response.cookies[session.READ_PRIMARY_COOKIE]
+
+    def connection(value: str) -> Request:
+        header = f"{session.READ_PRIMARY_COOKIE}={value}".encode()
+        return Request({"type": "http", "headers": [(b"cookie", header)]})
+
+    assert session.recently_wrote(connection(cookie))
+    assert not session.recently_wrote(connection(f"{time.time() - 1:.3f}"))
+    assert not session.recently_wrote(connection(f"{time.time() + 3600:.3f}"))
+    assert not session.recently_wrote(connection("soon"))
+
+    async def pinned() -> bool:
+        async with aclosing(session.get_async_read_db(connection(cookie))) as sessions:
+            db = await anext(sessions)
+            return bool(db.info.get(session.USE_PRIMARY_KEY))
+
+    assert asyncio.run(pinned())
+
+
+def test_unavailable_replicas_fall_back_to_the_primary(
+    replica_urls: list[str], primary_async_engine: AsyncEngine
+) -> None:
+    missing = _sqlite_url(Path(tempfile.gettempdir()) / "no-such-dir" / "replica.db")
+
+    async def scenario() -> tuple[dict[str, str], str | None]:
+        replicas = _replica_set([missing])
+        statuses = await replicas.check()
+        async with read_session_factory(primary_async_engine, replicas)() as db:
+            email = await db.scalar(select(User.email))
+        await replicas.dispose()
+        return statuses, email
+
+    statuses, email = asyncio.run(scenario())
+
+    assert statuses == {"replica0": "unavailable"}
+    assert email == "primary@example.com"
@@ -1,3 +1,22 @@
+import time
+from collections.abc import AsyncGenerator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+import msgpack
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.db.session import get_async_read_db
+from app.services.principal_cache import principal_cache
+from app.services.realtime_frames import MSGPACK_SUBPROTOCOL
+from app.services.realtime_service import realtime_hub
+
+
 def _create_user_and_token(client, email: str = "stream@example.com") -> str:
     create_response = client.post(
         "/api/v1/users/",
@@ -37,3 +56,128 @@ def test_websocket_receives_broadcast_message(client) -> None:
 
     assert message_payload["type"] == "message"
     assert message_payload["message"] == "hello websocket"
+
+
+def test_websocket_receives_only_its_topics(client) -> None:
+    token = _create_user_and_token(client, email="stream-topics@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with (
+        client.websocket_connect(f"/api/v1/stream/ws?token={token}&topic=room-1") as room,
+        client.websocket_connect(f"/api/v1/stream/ws?token={token}&topic=room-2") as other,
+    ):
+        room.receive_json()
+        other.receive_json()
+
+        for topic in ("room-1", "room-2"):
+            response = client.post(
+                "/api/v1/stream/messages",
+                json={"message": f"hello {topic}", "topic": topic},
+                headers=headers,
+            )
+            assert response.status_code == 202
+
+        room_payload = room.receive_json()
+        other_payload = other.receive_json()
+
+    assert room_payload["message"] == "hello room-1"
+    assert other_payload["message"] == "hello room-2"
+    assert other_payload["topic"] == "room-2"
+
+
+def test_sse_rejects_invalid_topics(client) -> None:
+    token = _create_user_and_token(client, email="stream-bad-topic@example.com")
+
+    response = client.get(
+        "/api/v1/stream/sse?topic=not%20valid",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 422
+
+
+def test_sse_resumes_from_last_event_id(client) -> None:
+    token = _create_user_and_token(client, email="stream-resume@example.com")
+    first, second, third = (
+        client.portal.call(realtime_hub.broadcast, {"message": f"m{n}"}, "resume") for n in range(3)
+    )
+
+    resumed = client.get(
+        "/api/v1/stream/sse?topic=resume&max_events=3",
+        headers={"Authorization": f"Bearer {token}", "Last-Event-ID": first},
+    )
+    too_old = client.get(
+        "/api/v1/stream/sse?topic=resume&max_events=2",
+        headers={"Authorization": f"Bearer {token}", "Last-Event-ID": "1-0"},
+    )
+
+    assert f"id: {first}\n" not in resumed.text
+    assert f'id: {second}\nevent: message\ndata: {{"message": "m1"}}\n\n' in resumed.text
+    assert f"id: {third}\n" in resumed.text
+    assert "event: gap\n" in too_old.text
+
+
+def test_websocket_msgpack_subprotocol_sends_binary_frames(client) -> None:
+    token = _create_user_and_token(client, email="stream-msgpack@example.com")
+
+    with client.websocket_connect(
+        f"/api/v1/stream/ws?token={token}&topic=packed",
+        subprotocols=[MSGPACK_SUBPROTOCOL],
+    ) as websocket:
+        assert websocket.accepted_subprotocol == MSGPACK_SUBPROTOCOL
+        connected_payload = msgpack.unpackb(websocket.receive_bytes())
+
+        websocket.send_bytes(msgpack.packb("hello binary"))
+        message_payload = msgpack.unpackb(websocket.receive_bytes())
+
+    assert connected_payload["type"] == "connected"
+    assert message_payload["message"] == "hello binary"
+    assert message_payload["topic"] == "packed"
+
+
+def test_open_streams_hold_no_pooled_connections(
+    client, primary_async_engine: AsyncEngine, monkeypatch
+) -> None:
+    token = _create_user_and_token(client, email="stream-pool@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    pooled = create_async_engine(primary_async_engine.url)
+    sessions = async_sessionmaker(pooled, expire_on_commit=False)
+
+    async def pooled_read_db() -> AsyncGenerator[AsyncSession, None]:
+        async with sessions() as db:
+            yield db
+
+    async def cache_miss(_user_id: int) -> None:
+        return None
+
+    # Every stream has to load its user from the database.
+    monkeypatch.setattr(principal_cache, "get", cache_miss)
+    client.app.dependency_overrides[get_async_read_db] = pooled_read_db
+    streams = 4
+
+    with ExitStack() as stack, ThreadPoolExecutor(streams) as executor:
+        for _ in range(streams):
+            websocket = stack.enter_context(
+                client.websocket_connect(f"/api/v1/stream/ws?token={token}&topic=pool")
+            )
+            websocket.receive_json()
+        sse = [
+            executor.submit(
+                client.get, "/api/v1/stream/sse?topic=pool&max_events=2", headers=headers
+            )
+            for _ in range(streams)
+        ]
+        deadline = time.monotonic() + 5
+        while client.portal.call(realtime_hub.counts)["sse_connections"] < streams:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+        checked_out = pooled.pool.checkedout()  # type: ignore[attr-defined]
+        client.post(
+            "/api/v1/stream/messages", json={"message": "done", "topic": "pool"}, headers=headers
+        )
+        responses = [future.result(timeout=5) for future in sse]
+    client.portal.call(pooled.dispose)
+
+    assert checked_out == 0
+    assert all('"message": "done"' in response.text for response in responses)
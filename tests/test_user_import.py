@@ -0,0 +1,74 @@
+import json
+from typing import Any
+
+import pytest
+
+from app.core.config import get_settings
+from app.core.security import get_password_hash
+
+ADMIN_HEADERS = {"X-Admin-Key": "s3cret"}
+
+
+@pytest.fixture(autouse=True)
+def admin_key(monkeypatch) -> None:
+    monkeypatch.setattr(get_settings(), "admin_api_key", "s3cret")
+
+
+def _lines(response) -> list[dict[str, Any]]:
+    lines = [json.loads(line) for line in response.text.splitlines() if line]
+    return sorted(lines, key=lambda line: line["index"])
+
+
+def _login(client, email: str, password: str) -> int:
+    response = client.post("/api/v1/auth/login", data={"username": email, "password": password})
+    return response.status_code
+
+
+def test_import_reports_created_conflicts_and_bad_rows(client, monkeypatch) -> None:
+    monkeypatch.setattr(get_settings(), "user_import_chunk_size", 2)
+    client.post("/api/v1/users/", json={"email": "taken@example.com", "password": "secret123"})
+
+    def body():
+        yield b'{"email": "a@example.com", "password": "secret123"}\n'
+        yield b'{"email": "taken@example.com", "password": "other"}\n{"email": "nope"}\n'
+        yield b'{"email": "a@example.com", "password": "again"}\nnot json\n'
+        yield b'{"email": "b@example.com", "password": "secret456"}'
+
+    response = client.post(
+        "/api/v1/admin/users/import",
+        content=body(),
+        headers={**ADMIN_HEADERS, "Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    lines = _lines(response)
+    assert lines[0] == {"index": 0, "status": "created"}
+    assert lines[1] == {"index": 1, "status": "conflict"}
+    assert "error" in lines[2]
+    assert lines[3] == {"index": 3, "status": "conflict"}
+    assert lines[4] == {"index": 4, "error": "invalid JSON"}
+    assert lines[5] == {"index": 5, "status": "created"}
+    assert _login(client, "a@example.com", "secret123") == 200
+    assert _login(client, "b@example.com", "secret456") == 200
+    assert _login(client, "taken@example.com", "other") == 401
+
+
+def test_import_accepts_pre_hashed_passwords(client) -> None:
+    rows = [
+        {"email": "hashed@example.com", "hashed_password": get_password_hash("secret123")},
+        {"email": "plain@example.com", "hashed_password": "secret123"},
+    ]
+
+    response = client.post("/api/v1/admin/users/import", json=rows, headers=ADMIN_HEADERS)
+
+    assert response.status_code == 200
+    lines = _lines(response)
+    assert lines[0] == {"index": 0, "status": "created"}
+    assert "error" in lines[1]
+    assert _login(client, "hashed@example.com", "secret123") == 200
+
+
+def test_import_requires_admin_key(client) -> None:
+    response = client.post("/api/v1/admin/users/import", json=[])
+
+    assert response.status_code == 403
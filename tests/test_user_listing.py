@@ -0,0 +1,56 @@
+import csv
+import io
+import json
+
+import pytest
+
+from app.core.config import get_settings
+
+ADMIN_HEADERS = {"X-Admin-Key": "s3cret"}
+
+
+@pytest.fixture(autouse=True)
+def admin_key(monkeypatch) -> None:
+    monkeypatch.setattr(get_settings(), "admin_api_key", "s3cret")
+
+
+@pytest.fixture
+def emails(client) -> list[str]:
+    emails = [f"user{n}@example.com" for n in range(5)]
+    rows = [{"email": email, "password": "secret123"} for email in emails]
+    client.post("/api/v1/admin/users/import", json=rows, headers=ADMIN_HEADERS)
+    return emails
+
+
+def test_list_users_walks_keyset_pages(client, emails) -> None:
+    seen: list[str] = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 2} if cursor is None else {"limit": 2, "after": cursor}
+        response = client.get("/api/v1/users/", params=params, headers=ADMIN_HEADERS)
+        assert response.status_code == 200
+        page = response.json()
+        seen.extend(item["email"] for item in page["items"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == emails
+    assert pages == 3
+
+
+def test_list_users_requires_admin_key(client) -> None:
+    assert client.get("/api/v1/users/").status_code == 403
+
+
+def test_export_users_streams_ndjson_and_csv(client, emails) -> None:
+    ndjson = client.get("/api/v1/users/export", headers=ADMIN_HEADERS)
+    exported = client.get("/api/v1/users/export?format=csv", headers=ADMIN_HEADERS)
+
+    assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["email"] for line in ndjson.text.splitlines()] == emails
+    assert exported.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(exported.text)))
+    assert [row["email"] for row in rows] == emails